@@ -14,27 +14,31 @@ def derive_primitives(myd, varnames):
     ymom = myd.get_var("y-momentum")
     ener = myd.get_var("energy")
 
+    if isinstance(varnames, str):
+        wanted = [varnames]
+    else:
+        wanted = list(varnames)
+
     derived_vars = []
 
     u = xmom/dens
     v = ymom/dens
 
-    e = (ener - 0.5*dens*(u*u + v*v))/dens
-
     gamma = myd.get_aux("gamma")
-    p = eos.pres(gamma, dens, e)
 
-    myg = myd.grid
-    vort = myg.scratch_array()
+    # only compute the energy, pressure and vorticity if they are needed
+    e = p = vort = None
+    if set(wanted) & {"e", "eint", "p", "pressure", "primitive", "soundspeed", "machnumber"}:
+        e = (ener - 0.5*dens*(u*u + v*v))/dens
+        p = eos.pres(gamma, dens, e)
 
-    vort.v()[:, :] = \
-        0.5*(v.ip(1) - v.ip(-1))/myg.dx - \
-        0.5*(u.jp(1) - u.jp(-1))/myg.dy
+    if "vorticity" in wanted:
+        myg = myd.grid
+        vort = myg.scratch_array()
 
-    if isinstance(varnames, str):
-        wanted = [varnames]
-    else:
-        wanted = list(varnames)
+        vort.v()[:, :] = \
+            0.5*(v.ip(1) - v.ip(-1))/myg.dx - \
+            0.5*(u.jp(1) - u.jp(-1))/myg.dy
 
     for var in wanted:
 
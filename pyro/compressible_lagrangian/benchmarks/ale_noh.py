@@ -0,0 +1,98 @@
+#!/usr/bin/env python3
+
+"""Steps, timestep and accuracy of ALE remapping on the Noh implosion.
+
+Runs the Noh problem of problems/inputs.noh on an n x n mesh to --tmax
+for each `lagrangian.ale_interval` (0 = purely Lagrangian).  Reports the
+steps taken, the wall time, the last timestep relative to the first CFL
+step, the inverted cells at the end and the L1 density error within
+r < 0.4 of the centre (beyond it the walls matter), against the exact
+solution: rho = 16 behind the shock at r = t/3 and 1 + t/r ahead of it.
+Also reports the cost of one remap relative to a step on a --cost-n^2
+mesh.
+
+usage: python ale_noh.py [-n 64] [--interval 0 1 5 20] [--tmax 0.3]
+                         [--kernel numba] [--cost-n 256]
+"""
+
+import argparse
+import contextlib
+import io
+import time
+
+import numpy as np
+
+from pyro.compressible_lagrangian.benchmarks.suite import make_sim
+
+
+def noh_error(sim):
+    """L1 density error within r < 0.4 of the centre."""
+    c = sim.mesh.cell_centers() - 0.5
+    r = np.hypot(c[..., 0], c[..., 1])
+    rho_exact = np.where(r < sim.t/3.0, 16.0, 1.0 + sim.t/np.maximum(r, 1e-12))
+    area = sim.mesh.cell_area()
+    inside = r < 0.4
+    return np.sum(np.abs(sim.state.rho - rho_exact)[inside]*area[inside])/np.sum(area[inside])
+
+
+def run(n, interval, tmax, kernel):
+    """The finished simulation, its wall time and the CFL step at the start."""
+    sim = make_sim("noh2d", n, kernel, {"lagrangian.ale_interval": interval,
+                                        "driver.tmax": tmax, "driver.max_steps": 10**7})
+    sim.method_compute_timestep()
+    dt0 = sim.dt
+    t0 = time.perf_counter()
+    # keep the warnings of a tangling mesh out of the table
+    with contextlib.redirect_stdout(io.StringIO()):
+        while not sim.finished():
+            sim.evolve(sim.compute_timestep())
+            if not np.all(np.isfinite(sim.state.E)):
+                break
+    return sim, time.perf_counter() - t0, dt0
+
+
+def remap_cost(n, kernel, nrep=10):
+    """Wall time of a step and of one remap."""
+    sim = make_sim("noh2d", n, kernel, {"lagrangian.ale_interval": 1})
+    sim.evolve(1.e-4)
+    step = remap = np.inf
+    for _ in range(nrep):
+        t0 = time.perf_counter()
+        sim.evolve(1.e-4)
+        t1 = time.perf_counter()
+        sim.remap()
+        t2 = time.perf_counter()
+        step = min(step, t1 - t0)
+        remap = min(remap, t2 - t1)
+    return step - remap, remap
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("-n", type=int, default=64, help="cells per side")
+    parser.add_argument("--interval", type=int, nargs="+", default=[0, 1, 5, 20])
+    parser.add_argument("--tmax", type=float, default=0.3)
+    parser.add_argument("--kernel", default="numba", choices=["numpy", "numba"])
+    parser.add_argument("--cost-n", type=int, default=256,
+                        help="cells per side for the cost measurement")
+    args = parser.parse_args()
+
+    # compile the numba kernels outside the timings
+    run(8, 1, 1.e-3, args.kernel)
+
+    print(f"Noh, {args.n}^2 cells, to t = {args.tmax:g}")
+    print(f"{'interval':>8} {'steps':>6} {'wall (s)':>9} {'dt / dt0':>9} "
+          f"{'inverted':>8} {'L1(rho)':>10}")
+    for interval in args.interval:
+        sim, wall, dt0 = run(args.n, interval, args.tmax, args.kernel)
+        q = sim.mesh.quality()
+        print(f"{interval:8d} {sim.n:6d} {wall:9.3f} {sim.dt_old/dt0:9.3g} "
+              f"{q.n_inverted:8d} {noh_error(sim):10.3e}")
+
+    step, remap = remap_cost(args.cost_n, args.kernel)
+    print(f"\n{args.cost_n}^2 step: {1e3*step:.3f} ms, remap {1e3*remap:.3f} ms "
+          f"({remap/step:.2f} steps)")
+
+
+if __name__ == "__main__":
+    main()
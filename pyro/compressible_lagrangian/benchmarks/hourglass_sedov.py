@@ -0,0 +1,99 @@
+#!/usr/bin/env python3
+
+"""How far hourglass control lets the Sedov blast run before the mesh tangles.
+
+Deposits the blast energy in the central cell of an nx x nx box and runs
+each (`lagrangian.hg_coeff`, `driver.cfl`) pair until the quality monitor
+finds an inverted cell (a corner Jacobian <= 0) or t = --tmax.  Reports
+the time reached, the largest CFL number that reaches --tmax for each
+coefficient, and the cost of the hourglass filter relative to a step on a
+--cost-n^2 mesh.
+
+usage: python hourglass_sedov.py [-n 64] [--hg 0 0.5 1] [--cfl 0.1 0.2 0.4 0.8]
+                                 [--tmax 0.08] [--kernel numba] [--cost-n 256]
+"""
+
+import argparse
+import time
+
+import numpy as np
+
+from pyro.compressible_lagrangian.problems import sedov2d
+from pyro.compressible_lagrangian.simulation import Simulation
+
+
+class RP:
+    def __init__(self, d):
+        self.d = d
+
+    def get_param(self, k, default=None):
+        return self.d.get(k, default)
+
+
+def make_sim(nx, cfl, hg, kernel):
+    rp = RP({"mesh.nx": nx, "mesh.ny": nx, "driver.cfl": cfl, "eos.gamma": 1.4,
+             "lagrangian.hg_coeff": hg, "lagrangian.kernel": kernel,
+             "lagrangian.node_velocity": "lsq", "lagrangian.dt_diagnostics": 0})
+    sim = Simulation("compressible_lagrangian_pure", "sedov", sedov2d.init_data, rp)
+    sim.initialize()
+    return sim
+
+
+def run(nx, cfl, hg, tmax, kernel):
+    """Time reached before the first inverted cell (or tmax) and the
+    number of steps."""
+    sim = make_sim(nx, cfl, hg, kernel)
+    nstep = 0
+    while sim.t < tmax:
+        sim.evolve(min(sim.compute_timestep(), tmax - sim.t))
+        nstep += 1
+        if sim.mesh_quality.n_inverted > 0:
+            break
+    return sim.t, nstep
+
+
+def filter_cost(nx, kernel, nrep=10):
+    """Wall time of a step without and with the hourglass filter."""
+    walls = []
+    for hg in (0.0, 1.0):
+        sim = make_sim(nx, 0.2, hg, kernel)
+        sim.evolve(1.e-6)
+        best = np.inf
+        for _ in range(nrep):
+            t0 = time.perf_counter()
+            sim.evolve(1.e-6)
+            best = min(best, time.perf_counter() - t0)
+        walls.append(best)
+    return walls
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("-n", type=int, default=64, help="cells per side")
+    parser.add_argument("--hg", type=float, nargs="+", default=[0.0, 0.5, 1.0])
+    parser.add_argument("--cfl", type=float, nargs="+", default=[0.1, 0.2, 0.4, 0.8])
+    parser.add_argument("--tmax", type=float, default=0.08)
+    parser.add_argument("--kernel", default="numba", choices=["numpy", "numba"])
+    parser.add_argument("--cost-n", type=int, default=256,
+                        help="cells per side for the cost measurement")
+    args = parser.parse_args()
+
+    # compile the numba kernels outside the timings
+    run(8, 0.5, 1.0, 1.e-3, args.kernel)
+
+    print(f"time reached before a cell inverts (tmax = {args.tmax:g}, {args.n}^2 cells)")
+    print(f"{'hg_coeff':>8} " + " ".join(f"{'cfl ' + format(c, 'g'):>10}" for c in args.cfl) +
+          f" {'stable cfl':>11}")
+    for hg in args.hg:
+        t_end = [run(args.n, cfl, hg, args.tmax, args.kernel)[0] for cfl in args.cfl]
+        stable = [cfl for cfl, t in zip(args.cfl, t_end) if t >= args.tmax]
+        best = f"{max(stable):g}" if stable else "none"
+        print(f"{hg:>8g} " + " ".join(f"{t:10.4f}" for t in t_end) + f" {best:>11}")
+
+    w0, w1 = filter_cost(args.cost_n, args.kernel)
+    print(f"\n{args.cost_n}^2 step: {1e3*w0:.3f} ms, with the hourglass filter {1e3*w1:.3f} ms "
+          f"(+{100*(w1 - w0)/w0:.1f}%)")
+
+
+if __name__ == "__main__":
+    main()
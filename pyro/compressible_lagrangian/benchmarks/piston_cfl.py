@@ -0,0 +1,77 @@
+#!/usr/bin/env python3
+
+"""Accuracy of the piston problem against the CFL number.
+
+Runs piston2d (problems/inputs.piston, with Pyro's timestep control) on
+a -n x 4 channel with the piston started impulsively at speed --up from
+the left or right, to t = --tmax, for each CFL number.  Reports the
+steps, the error of the piston position and the L1 error of the density
+against the exact solution: a shock running at
+
+    S = (gamma+1)/4 up + sqrt(((gamma+1)/4 up)^2 + a0^2)
+
+into the gas at rest, with the density S/(S - up) behind it.
+
+usage: python piston_cfl.py [-n 128] [--cfl 0.25 0.5 0.8 1.0] [--up 0.5]
+                            [--tmax 0.4] [--sides left right]
+"""
+
+import argparse
+import contextlib
+import io
+
+import numpy as np
+
+from pyro.compressible_lagrangian.benchmarks.suite import make_sim
+
+
+def run(n, cfl, up, tmax, side):
+    """The finished simulation, its piston position error and L1
+    density error."""
+    sim = make_sim("piston2d", n, "numba", {
+        "mesh.ny": 4, "mesh.ymax": 4/n, "driver.cfl": cfl, "driver.tmax": tmax,
+        "driver.max_steps": 10**6, "piston.ramp_time": 0.0, "piston.side": side,
+        "piston.u": up if side == "left" else -up})
+    with contextlib.redirect_stdout(io.StringIO()):
+        while not sim.finished():
+            sim.evolve(sim.compute_timestep())
+
+    gamma = sim.gamma
+    k = 0.25*(gamma + 1.0)*up
+    S = k + np.sqrt(k*k + gamma)
+    x = sim.mesh.cell_centers()[..., 0]
+    if side == "left":
+        xp = sim.mesh.nodes[:, 0, 0]
+        shocked = x < S*sim.t
+    else:
+        xp = 1.0 - sim.mesh.nodes[:, -1, 0]
+        shocked = x > 1.0 - S*sim.t
+    rho_exact = np.where(shocked, S/(S - up), 1.0)
+    area = sim.mesh.cell_area()
+    err = np.sum(np.abs(sim.state.rho - rho_exact)*area)/np.sum(area)
+    return sim, np.max(np.abs(xp - up*sim.t)), err
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("-n", type=int, default=128, help="cells along the channel")
+    parser.add_argument("--cfl", type=float, nargs="+", default=[0.25, 0.5, 0.8, 1.0])
+    parser.add_argument("--up", type=float, default=0.5, help="piston speed")
+    parser.add_argument("--tmax", type=float, default=0.4)
+    parser.add_argument("--sides", nargs="+", default=["left", "right"],
+                        choices=["left", "right"])
+    args = parser.parse_args()
+
+    # compile the numba kernels outside the table
+    run(8, 0.5, args.up, 0.01, "left")
+
+    print(f"piston at {args.up:g}, {args.n} x 4 cells, to t = {args.tmax:g}")
+    print(f"{'side':>5} {'cfl':>5} {'steps':>6} {'piston err':>10} {'L1(rho)':>10}")
+    for side in args.sides:
+        for cfl in args.cfl:
+            sim, xerr, err = run(args.n, cfl, args.up, args.tmax, side)
+            print(f"{side:>5} {cfl:5g} {sim.n:6d} {xerr:10.3e} {err:10.3e}")
+
+
+if __name__ == "__main__":
+    main()
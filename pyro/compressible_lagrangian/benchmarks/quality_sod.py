@@ -0,0 +1,110 @@
+#!/usr/bin/env python3
+
+"""What the mesh-quality monitor buys on a Sod run past its stable CFL.
+
+Runs the Sod shock tube of `viscosity_sod` (no artificial viscosity) to
+t = 0.2 for each CFL number, once with the monitor only watching and once
+retrying rejected steps (`lagrangian.quality_retries`).  Reports the
+steps, rejected steps, final CFL number, inverted cells and L1 density
+error of each run, and the cost of `MovingQuadMesh.quality` relative to a
+step on a --cost-n x --cost-n/4 channel.
+
+usage: python quality_sod.py [-n 64] [--cfl 0.6 1.0 1.5] [--retries 3]
+                             [--cost-n 256]
+"""
+
+import argparse
+import contextlib
+import io
+import time
+
+import numpy as np
+
+from pyro.compressible_lagrangian.benchmarks.sod_convergence import SOD_EXACT
+from pyro.compressible_lagrangian.benchmarks.viscosity_sod import RP
+from pyro.compressible_lagrangian.problems import sod2d_channel
+from pyro.compressible_lagrangian.simulation import Simulation
+
+
+def make_sim(nx, cfl, retries):
+    ny = max(nx//4, 1)
+    rp = RP({"mesh.nx": nx, "mesh.ny": ny, "mesh.ymax": ny/nx, "driver.cfl": cfl,
+             "driver.tmax": 0.2, "lagrangian.quality_retries": retries,
+             "lagrangian.kernel": "numba", "lagrangian.node_velocity": "lsq",
+             "lagrangian.dt_diagnostics": 0})
+    sim = Simulation("compressible_lagrangian_pure", "sod", sod2d_channel.init_data, rp)
+    sim.initialize()
+    return sim
+
+
+def run(nx, cfl, retries):
+    """The finished simulation and its L1 density error, with Pyro's
+    timestep control (the first step is 0.01 of the CFL step and the step
+    at most doubles)."""
+    sim = make_sim(nx, cfl, retries)
+    dt_old = None
+    while not sim.finished():
+        dt = sim.compute_timestep()
+        dt = 0.01*dt if dt_old is None else min(dt, 2.0*dt_old)
+        sim.evolve(min(dt, sim.tmax - sim.t))
+        dt_old = sim.dt
+        if not np.all(np.isfinite(sim.state.E)):
+            return sim, np.inf
+
+    exact = np.loadtxt(SOD_EXACT)
+    x = sim.mesh.cell_centers()[..., 0]
+    rho_exact = np.interp(x, exact[:, 0], exact[:, 1])
+    err = np.sum(np.abs(sim.state.rho - rho_exact)*sim.mesh.cell_area())/(sim.mesh.ny/nx)
+    return sim, err
+
+
+def monitor_cost(n, nrep=20):
+    """Wall time of a step and of one quality check."""
+    sim = make_sim(n, 0.4, 0)
+    sim.evolve(1.e-6)
+    step = check = np.inf
+    for _ in range(nrep):
+        t0 = time.perf_counter()
+        sim.evolve(1.e-6)
+        t1 = time.perf_counter()
+        sim.mesh.mark_nodes_changed()
+        sim.mesh.face_geometry()
+        t2 = time.perf_counter()
+        sim.mesh.quality()
+        t3 = time.perf_counter()
+        step = min(step, t1 - t0)
+        check = min(check, t3 - t2)
+    return step, check
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("-n", type=int, default=64, help="nx (ny = nx/4)")
+    parser.add_argument("--cfl", type=float, nargs="+", default=[0.6, 1.0, 1.5])
+    parser.add_argument("--retries", type=int, default=3)
+    parser.add_argument("--cost-n", type=int, default=256,
+                        help="nx for the cost measurement")
+    args = parser.parse_args()
+
+    # compile the numba kernels outside the timings
+    run(8, 0.5, 0)
+
+    print(f"Sod, {args.n} x {max(args.n//4, 1)} cells, to t = 0.2")
+    print(f"{'cfl':>5} {'retries':>7} {'steps':>6} {'rejected':>8} {'final cfl':>9} "
+          f"{'inverted':>8} {'L1(rho)':>10}")
+    for cfl in args.cfl:
+        for retries in (0, args.retries):
+            # keep the retry warnings out of the table
+            with contextlib.redirect_stdout(io.StringIO()):
+                sim, err = run(args.n, cfl, retries)
+            q = sim.mesh_quality
+            print(f"{cfl:5g} {retries:7d} {sim.n:6d} {sim.rejected_steps:8d} "
+                  f"{sim.cfl:9.4g} {q.n_inverted:8d} {err:10.3e}")
+
+    step, check = monitor_cost(args.cost_n)
+    print(f"\n{args.cost_n}x{max(args.cost_n//4, 1)} step: {1e3*step:.3f} ms, "
+          f"quality check {1e3*check:.3f} ms ({100*check/step:.1f}%)")
+
+
+if __name__ == "__main__":
+    main()
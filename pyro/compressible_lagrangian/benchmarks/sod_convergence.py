@@ -0,0 +1,89 @@
+#!/usr/bin/env python3
+
+"""Cost per accuracy of first- vs second-order face states on sod2d_channel.
+
+Runs the Sod shock tube at t = 0.2 on a 4:1 channel with nx x nx/4 cells
+for each `lagrangian.order`, and reports the L1 density error against
+the exact solution (analysis/sod-exact.out), the wall time and the
+number of cells each order needs to reach a common error, interpolated
+in log-log.
+
+usage: python sod_convergence.py [-n 32 64 128 256] [--cfl 0.4]
+"""
+
+import argparse
+import os
+import time
+
+import numpy as np
+
+from pyro.compressible_lagrangian.problems import sod2d_channel
+from pyro.compressible_lagrangian.simulation import Simulation
+
+SOD_EXACT = os.path.join(os.path.dirname(__file__), "..", "..", "analysis", "sod-exact.out")
+
+
+class RP:
+    def __init__(self, d):
+        self.d = d
+
+    def get_param(self, k, default=None):
+        return self.d.get(k, default)
+
+
+def run(nx, order, cfl, tmax=0.2):
+    ny = max(nx//4, 1)
+    rp = RP({"mesh.nx": nx, "mesh.ny": ny, "mesh.ymax": ny/nx,
+             "driver.cfl": cfl, "lagrangian.order": order,
+             "lagrangian.node_velocity": "lsq"})
+    sim = Simulation("compressible_lagrangian_pure", "sod", sod2d_channel.init_data, rp)
+    sim.initialize()
+
+    nstep = 0
+    t0 = time.perf_counter()
+    while sim.t < tmax:
+        sim.evolve(min(sim.compute_timestep(), tmax - sim.t))
+        nstep += 1
+    wall = time.perf_counter() - t0
+
+    exact = np.loadtxt(SOD_EXACT)
+    x = sim.mesh.cell_centers()[..., 0]
+    rho_exact = np.interp(x, exact[:, 0], exact[:, 1])
+    err = np.sum(np.abs(sim.state.rho - rho_exact)*sim.mesh.cell_area())/(ny/nx)
+    return nx*ny, nstep, err, wall
+
+
+def cells_for_error(cells, err, target):
+    """Cells needed for `target` error, interpolated in log-log."""
+    return np.exp(np.interp(np.log(target), np.log(err[::-1]), np.log(cells[::-1])))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("-n", type=int, nargs="+", default=[32, 64, 128, 256],
+                        help="values of nx (ny = nx/4)")
+    parser.add_argument("--cfl", type=float, default=0.4)
+    args = parser.parse_args()
+
+    # compile the numba kernels outside the timings
+    run(8, 1, args.cfl, tmax=1.e-3)
+
+    results = {}
+    print(f"{'order':>5} {'nx':>5} {'cells':>8} {'steps':>6} {'L1(rho)':>10} {'wall [s]':>9}")
+    for order in (1, 2):
+        rows = [run(nx, order, args.cfl) for nx in args.n]
+        for nx, (cells, nstep, err, wall) in zip(args.n, rows):
+            print(f"{order:>5} {nx:>5} {cells:>8} {nstep:>6} {err:10.3e} {wall:9.3f}")
+        results[order] = np.array(rows)
+
+    # the finest first-order error, reached by both orders
+    target = results[1][-1, 2]
+    print(f"\nto reach L1 = {target:.3e}:")
+    for order, r in results.items():
+        cells = cells_for_error(r[:, 0], r[:, 2], target)
+        wall = np.exp(np.interp(np.log(cells), np.log(r[:, 0]), np.log(r[:, 3])))
+        print(f"  order {order}: {cells:9.0f} cells, ~{wall:.3f} s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,154 @@
+#!/usr/bin/env python3
+
+"""Throughput of the solver on its benchmark problems.
+
+Sets up each problem from its inputs file in problems/ (with Pyro's
+defaults, as pyro_sim.py does) on an n x n mesh of the unit square and
+times --steps steps of `Simulation.compute_timestep` and `evolve`, after
+--warmup steps that are not timed (and compile the numba kernels).
+Reports the best of --repeat runs as the time per step and the cells
+updated per second, nx ny steps / time.
+
+--json writes the results to a file; --compare reads such a file and
+exits with 1 if any case runs more than --tolerance (a fraction) fewer
+cells per second than it does there.
+
+usage: python suite.py [-n 64 128 256 512 1024] [--problems sod2d_channel ...]
+                       [--kernel numba] [--steps 10] [--warmup 2] [--repeat 3]
+                       [--json out.json] [--compare baseline.json]
+                       [--tolerance 0.1]
+"""
+
+import argparse
+import contextlib
+import importlib
+import io
+import json
+import os
+import platform
+import sys
+import time
+
+import numba
+import numpy as np
+
+from pyro.compressible_lagrangian.simulation import Simulation
+from pyro.util.runparams import RuntimeParameters
+
+PROBLEMS = ["piston2d", "sod2d_channel", "noh2d", "sedov2d"]
+
+PYRO_HOME = os.path.join(os.path.dirname(__file__), "..", "..")
+
+
+def make_sim(problem_name, n, kernel, params=None):
+    """The problem set up as pyro_sim.py would, on an n x n unit square,
+    with the runtime parameters in the dict `params` changed."""
+    problem = importlib.import_module(f"pyro.compressible_lagrangian.problems.{problem_name}")
+
+    rp = RuntimeParameters()
+    rp.load_params(os.path.join(PYRO_HOME, "_defaults"))
+    rp.load_params(os.path.join(PYRO_HOME, "compressible_lagrangian", "_defaults"))
+    for k, v in problem.PROBLEM_PARAMS.items():
+        rp.set_param(k, v, no_new=False)
+    rp.load_params(os.path.join(PYRO_HOME, "compressible_lagrangian", "problems",
+                                problem.DEFAULT_INPUTS), no_new=1)
+    for k, v in {"mesh.nx": n, "mesh.ny": n, "mesh.xmax": 1.0, "mesh.ymax": 1.0,
+                 "lagrangian.kernel": kernel, "driver.verbose": 0, "io.do_io": 0,
+                 **(params or {})}.items():
+        rp.set_param(k, v)
+
+    sim = Simulation("compressible_lagrangian", problem_name, problem.init_data, rp)
+    sim.initialize()
+    return sim
+
+
+def time_problem(problem_name, n, kernel, steps, warmup, repeat):
+    """Best wall time of `steps` steps, each from a fresh setup."""
+    best = np.inf
+    for _ in range(repeat):
+        sim = make_sim(problem_name, n, kernel)
+        for _ in range(warmup):
+            sim.evolve(sim.compute_timestep())
+        t0 = time.perf_counter()
+        for _ in range(steps):
+            sim.evolve(sim.compute_timestep())
+        best = min(best, time.perf_counter() - t0)
+    return best
+
+
+def run_suite(problems, sizes, kernel, steps, warmup, repeat):
+    results = {}
+    for problem_name in problems:
+        for n in sizes:
+            # keep the quality warnings of a tangling mesh out of the table
+            with contextlib.redirect_stdout(io.StringIO()):
+                elapsed = time_problem(problem_name, n, kernel, steps, warmup, repeat)
+            results[f"{problem_name}/{n}"] = {
+                "problem": problem_name, "n": n, "steps": steps,
+                "step_time": elapsed/steps,
+                "cells_per_second": n*n*steps/elapsed}
+            r = results[f"{problem_name}/{n}"]
+            print(f"{problem_name:>14} {n:5d} {1e3*r['step_time']:11.3f} "
+                  f"{r['cells_per_second']:12.4e}", flush=True)
+    return results
+
+
+def compare(results, baseline, tolerance):
+    """Print the speedup of each case present in both, and return the
+    cases slower than the baseline by more than the tolerance."""
+    print(f"\n{'case':>20} {'baseline':>12} {'now':>12} {'speedup':>8}")
+    regressions = []
+    for case, r in results.items():
+        if case not in baseline:
+            continue
+        old = baseline[case]["cells_per_second"]
+        new = r["cells_per_second"]
+        flag = ""
+        if new < (1.0 - tolerance)*old:
+            regressions.append(case)
+            flag = "  REGRESSION"
+        print(f"{case:>20} {old:12.4e} {new:12.4e} {new/old:8.3f}{flag}")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("-n", type=int, nargs="+", default=[64, 128, 256, 512, 1024],
+                        help="cells per side")
+    parser.add_argument("--problems", nargs="+", default=PROBLEMS, choices=PROBLEMS)
+    parser.add_argument("--kernel", default="numba", choices=["numpy", "numba"])
+    parser.add_argument("--steps", type=int, default=10)
+    parser.add_argument("--warmup", type=int, default=2)
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--json", help="write the results to this file")
+    parser.add_argument("--compare", help="results of an earlier run to compare to")
+    parser.add_argument("--tolerance", type=float, default=0.1,
+                        help="allowed fractional loss of cells per second")
+    args = parser.parse_args()
+
+    print(f"kernel {args.kernel}, {numba.get_num_threads()} numba threads, "
+          f"{args.steps} steps, best of {args.repeat}")
+    print(f"{'problem':>14} {'n':>5} {'ms / step':>11} {'cells / s':>12}")
+    results = run_suite(args.problems, args.n, args.kernel,
+                        args.steps, args.warmup, args.repeat)
+
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump({"machine": platform.platform(), "python": platform.python_version(),
+                       "numpy": np.__version__, "numba": numba.__version__,
+                       "kernel": args.kernel, "threads": numba.get_num_threads(),
+                       "results": results}, f, indent=2)
+
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)["results"]
+        regressions = compare(results, baseline, args.tolerance)
+        if regressions:
+            print(f"\n{len(regressions)} case(s) slower than the baseline by more "
+                  f"than {100*args.tolerance:g}%")
+            return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
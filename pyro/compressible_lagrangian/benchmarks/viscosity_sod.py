@@ -0,0 +1,119 @@
+#!/usr/bin/env python3
+
+"""Stable CFL number, steps and accuracy of the edge viscosity on Sod.
+
+Runs the Sod shock tube to t = 0.2 on a 4:1 channel with nx x nx/4 cells
+for each (`lagrangian.visc_linear`, `lagrangian.visc_coeff`) pair and
+CFL number, with Pyro's timestep control (the first step is 0.01 of the
+CFL step and the step at most doubles).  A run fails if a cell inverts,
+the state stops being finite or the L1 density error exceeds 10x the
+smallest one of the sweep.  Reports the steps and L1 error of each run, the
+largest CFL that succeeds, and the cost of the viscosity per stage on a
+--cost-n x --cost-n/4 channel.
+
+usage: python viscosity_sod.py [-n 128] [--cfl 0.4 0.8 1.0 1.2 1.5]
+                               [--visc 0,0 0,1 0.5,1] [--cost-n 256]
+"""
+
+import argparse
+import time
+
+import numpy as np
+
+from pyro.compressible_lagrangian.benchmarks.sod_convergence import SOD_EXACT
+from pyro.compressible_lagrangian.problems import sod2d_channel
+from pyro.compressible_lagrangian.simulation import Simulation
+
+
+class RP:
+    def __init__(self, d):
+        self.d = d
+
+    def get_param(self, k, default=None):
+        return self.d.get(k, default)
+
+
+def make_sim(nx, cfl, c1, c2):
+    ny = max(nx//4, 1)
+    rp = RP({"mesh.nx": nx, "mesh.ny": ny, "mesh.ymax": ny/nx, "driver.cfl": cfl,
+             "lagrangian.visc_linear": c1, "lagrangian.visc_coeff": c2,
+             "lagrangian.kernel": "numba", "lagrangian.node_velocity": "lsq",
+             "lagrangian.dt_diagnostics": 0})
+    sim = Simulation("compressible_lagrangian_pure", "sod", sod2d_channel.init_data, rp)
+    sim.initialize()
+    return sim
+
+
+def run(nx, cfl, c1, c2, tmax=0.2):
+    """Steps taken and L1 density error (inf if the run broke down)."""
+    sim = make_sim(nx, cfl, c1, c2)
+    nstep = 0
+    dt_old = None
+    while sim.t < tmax:
+        dt = sim.compute_timestep()
+        dt = 0.01*dt if dt_old is None else min(dt, 2.0*dt_old)
+        dt_old = dt
+        sim.evolve(min(dt, tmax - sim.t))
+        nstep += 1
+        if sim.mesh_quality.n_inverted > 0 or not np.all(np.isfinite(sim.state.E)):
+            return nstep, np.inf
+
+    exact = np.loadtxt(SOD_EXACT)
+    x = sim.mesh.cell_centers()[..., 0]
+    rho_exact = np.interp(x, exact[:, 0], exact[:, 1])
+    err = np.sum(np.abs(sim.state.rho - rho_exact)*sim.mesh.cell_area())/(sim.mesh.ny/nx)
+    return nstep, err
+
+
+def viscosity_cost(n, nrep=20):
+    """Wall time of a numba stage without and with the edge viscosity."""
+    walls = []
+    for c2 in (0.0, 1.0):
+        sim = make_sim(n, 0.4, 0.0, c2)
+        # a compressive velocity field, so that half of the faces are viscous
+        x = sim.mesh.cell_centers()[..., 0]
+        sim.state.u[..., 0] = np.sin(8*np.pi*x)
+        sim._rhs()
+        best = np.inf
+        for _ in range(nrep):
+            t0 = time.perf_counter()
+            sim._rhs()
+            best = min(best, time.perf_counter() - t0)
+        walls.append(best)
+    return walls
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("-n", type=int, default=128, help="nx (ny = nx/4)")
+    parser.add_argument("--cfl", type=float, nargs="+", default=[0.4, 0.8, 1.0, 1.2, 1.5])
+    parser.add_argument("--visc", nargs="+", default=["0,0", "0,1", "0.5,1"],
+                        help="visc_linear,visc_coeff pairs")
+    parser.add_argument("--cost-n", type=int, default=256,
+                        help="cells per side for the cost measurement")
+    args = parser.parse_args()
+
+    # compile the numba kernels outside the timings
+    run(8, 0.5, 1.0, 1.0, tmax=1.e-3)
+
+    print(f"Sod, {args.n} x {max(args.n//4, 1)} cells: steps / L1(rho) to t = 0.2")
+    print(f"{'c1,c2':>8} " + " ".join(f"{'cfl ' + format(c, 'g'):>16}" for c in args.cfl) +
+          f" {'stable cfl':>11}")
+    for pair in args.visc:
+        c1, c2 = (float(v) for v in pair.split(","))
+        rows = [run(args.n, cfl, c1, c2) for cfl in args.cfl]
+        err0 = min(err for _, err in rows)
+        ok = [np.isfinite(err) and err < 10*err0 for _, err in rows]
+        cells = [f"{n:5d} {err:10.3e}" if good else f"{n:5d} {'failed':>10}"
+                 for (n, err), good in zip(rows, ok)]
+        stable = [cfl for cfl, good in zip(args.cfl, ok) if good]
+        best = f"{max(stable):g}" if stable else "none"
+        print(f"{pair:>8} " + " ".join(f"{c:>16}" for c in cells) + f" {best:>11}")
+
+    w0, w1 = viscosity_cost(args.cost_n)
+    print(f"\n{args.cost_n}x{max(args.cost_n//4, 1)} stage: {1e3*w0:.3f} ms, "
+          f"with the edge viscosity {1e3*w1:.3f} ms (+{1e3*(w1 - w0):.3f} ms)")
+
+
+if __name__ == "__main__":
+    main()
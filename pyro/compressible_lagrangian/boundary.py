@@ -1,36 +1,134 @@
+"""Boundary conditions of the Lagrangian mesh.
+
+Each side of the domain (left, right, bottom, top, in that order) is one
+of
+
+  * OUTFLOW: the boundary faces move with the normal velocity of the
+    cell next to them, at its pressure (Pyro's "outflow");
+  * WALL: the boundary faces move with a prescribed normal speed, 0 for
+    a fixed wall (Pyro's "reflect") or the piston speed, and take the
+    pressure of the Riemann problem against the mirrored cell;
+  * PERIODIC: the boundary faces are solved between the first and last
+    cell of the row or column, and opposite boundary nodes move
+    together.
+
+The face conditions are applied by the Riemann solves of every stage
+(`riemann.face_states_and_star` and the numba kernels), which read the
+side kinds and wall speeds from `kinds` and `wall_speed`, and the node
+conditions by `apply_nodes` after the node velocity is recovered.
+"""
 
 from __future__ import annotations
+
 import numpy as np
 
+import pyro.mesh.boundary as bnd
+
+OUTFLOW = 0
+WALL = 1
+PERIODIC = 2
+
+SIDES = ("left", "right", "bottom", "top")
+_BC_PARAMS = ("mesh.xlboundary", "mesh.xrboundary", "mesh.ylboundary", "mesh.yrboundary")
+
+
+def side_kind(bc):
+    """The kind of side a Pyro boundary condition name stands for."""
+    if bc == "periodic":
+        return PERIODIC
+    if bc not in bnd.bc_solid:
+        raise ValueError(f"invalid boundary condition: {bc}")
+    return WALL if bnd.bc_solid[bc] else OUTFLOW
+
+
 class BoundaryManager:
+    """The side conditions and the piston.
+
+    The kind of each side comes from the mesh.[xy][lr]boundary
+    parameters.  A piston (piston.kind = constant, sine or table) makes
+    its side (piston.side) a wall moving with the piston speed, the
+    velocity component normal to that side (so a piston on the right
+    moves into the gas for piston.u < 0).  A table piston interpolates
+    its speed linearly in the (time, speed) columns of the file
+    piston.profile.  The speed of every wall is set for the time of
+    each stage by `set_time`.
+    """
     def __init__(self, rp):
+        self.kinds = np.array([side_kind(rp.get_param(p, "reflect")) for p in _BC_PARAMS],
+                              dtype=np.int64)
+        for a, b in ((0, 1), (2, 3)):
+            if (self.kinds[a] == PERIODIC) != (self.kinds[b] == PERIODIC):
+                raise ValueError(f"{SIDES[a]} and {SIDES[b]} boundaries must both be periodic")
+        self.wall_speed = np.zeros(4)
+
         self.kind = rp.get_param("piston.kind", "none")
-        self.U = float(rp.get_param("piston.U", 0.0))
-        self.A = float(rp.get_param("piston.A", 0.0))
+        self.U = float(rp.get_param("piston.u", 0.0))
+        self.A = float(rp.get_param("piston.a", 0.0))
         self.f = float(rp.get_param("piston.f", 0.0))
-        self.ramp = float(rp.get_param("piston.rampTime", 0.0))
-        self.side = rp.get_param("piston.side", "left")  # "left" or "right"
+        self.ramp = float(rp.get_param("piston.ramp_time", 0.0))
+        self.side = rp.get_param("piston.side", "left")
+        if self.kind not in ("none", "constant", "sine", "table"):
+            raise ValueError(f"invalid piston.kind: {self.kind}")
+        self.piston = None
+        if self.kind != "none":
+            if self.side not in SIDES:
+                raise ValueError(f"invalid piston.side: {self.side}")
+            self.piston = SIDES.index(self.side)
+            if self.kinds[self.piston] == PERIODIC:
+                raise ValueError(f"the piston cannot be on a periodic side ({self.side})")
+            self.kinds[self.piston] = WALL
+        if self.kind == "table":
+            profile = np.loadtxt(rp.get_param("piston.profile", ""), ndmin=2)
+            if profile.shape[1] < 2 or np.any(np.diff(profile[:, 0]) <= 0.0):
+                raise ValueError("piston.profile needs increasing times and a speed column")
+            self.profile_t = profile[:, 0]
+            self.profile_u = profile[:, 1]
+
+        # the node velocity components set on each side: the component
+        # normal to a wall, and both components of paired periodic nodes
+        self._walls = [(side, (slice(None), 0, 0) if side == 0 else
+                              (slice(None), -1, 0) if side == 1 else
+                              (0, slice(None), 1) if side == 2 else
+                              (-1, slice(None), 1))
+                       for side in range(4) if self.kinds[side] == WALL]
+        self._periodic = []
+        if self.kinds[0] == PERIODIC:
+            self._periodic.append(((slice(None), 0), (slice(None), -1)))
+        if self.kinds[2] == PERIODIC:
+            self._periodic.append(((0, slice(None)), (-1, slice(None))))
 
     def piston_speed(self, t):
         if self.kind == "constant":
             vel = self.U
         elif self.kind == "sine":
             vel = self.U + self.A*np.sin(2.0*np.pi*self.f*t)
+        elif self.kind == "table":
+            vel = float(np.interp(t, self.profile_t, self.profile_u))
         else:
             return 0.0
         if t < self.ramp:
             return vel * (t/self.ramp)
         return vel
 
-    def apply(self, mesh, state, t):
-        u = state.u
-        if self.kind != "none":
-            up = self.piston_speed(t)
-            if self.side == "left":
-                u[:, 0, 0] = up
-            else:
-                u[:, -1, 0] = up
-        # Periodic in y
-        u[0, :, 1] = u[1, :, 1]; u[-1, :, 1] = u[-2, :, 1]
-        # Outflow at opposite x: zero-gradient
-        u[:, -1, 0] = u[:, -2, 0]
+    def set_time(self, t):
+        """Set the wall speeds for a stage evaluated at time `t`."""
+        if self.piston is not None:
+            self.wall_speed[self.piston] = self.piston_speed(t)
+
+    def slides(self):
+        """Whether the nodes of each side may slide along it when the
+        mesh is smoothed: only a wall is sure to stay straight."""
+        return self.kinds == WALL
+
+    def apply_nodes(self, u_node):
+        """Impose the side conditions on the node velocity `u_node`,
+        (ny+1, nx+1, 2), in place: periodic pairs move together and
+        every wall moves with its speed."""
+        for a, b in self._periodic:
+            ua, ub = u_node[a], u_node[b]
+            ua += ub
+            ua *= 0.5
+            ub[:] = ua
+        for side, idx in self._walls:
+            u_node[idx] = self.wall_speed[side]
+        return u_node
@@ -0,0 +1,75 @@
+from __future__ import annotations
+
+import numpy as np
+
+from .output import H5Series
+
+
+class TimestepDiagnostics:
+    """Where the CFL timestep comes from.
+
+    Each `record` call takes the field of local timesteps
+    cfl * ell / a and keeps the cell that limits the step, its local
+    timestep, and a running histogram of the local/global timestep
+    ratios in power-of-two bins: bin k counts the cells with
+    2^k <= dt_local / dt < 2^(k+1), and the last bin is open ended.
+    """
+    def __init__(self, ny, nx, nbins=16):
+        self.edges = 2.0**np.arange(nbins+1)
+        self.counts = np.zeros(nbins, dtype=np.int64)
+        self.nsteps = 0
+        self.limiting_cell = None
+        self.dt_limit = np.inf
+
+        self._ratio = np.empty((ny, nx))
+        self._ibin = np.empty((ny, nx), dtype=np.intp)
+
+    def record(self, dt_local):
+        """Add the (ny, nx) local timesteps of one step."""
+        k = int(np.argmin(dt_local))
+        self.limiting_cell = np.unravel_index(k, dt_local.shape)
+        self.dt_limit = float(dt_local.flat[k])
+        self.nsteps += 1
+        if not np.isfinite(self.dt_limit):
+            return
+
+        r = self._ratio
+        np.divide(dt_local, self.dt_limit, out=r)
+        np.log2(r, out=r)
+        np.minimum(r, len(self.counts)-1, out=r)
+        np.copyto(self._ibin, r, casting="unsafe")
+        self.counts += np.bincount(self._ibin.ravel(), minlength=len(self.counts))
+
+    def fraction_within(self, factor):
+        """Fraction of the recorded cells whose local timestep is below
+        `factor` times the global one (rounded up to a bin edge)."""
+        nb = int(np.searchsorted(self.edges, factor))
+        return self.counts[:nb].sum() / max(self.counts.sum(), 1)
+
+    def summary(self):
+        """A short printable report."""
+        lines = [f"timestep limited by cell {tuple(int(i) for i in self.limiting_cell)}"
+                 f" with dt = {self.dt_limit:.6g} ({self.nsteps} steps recorded)",
+                 "  dt_local/dt      fraction of cells"]
+        total = max(self.counts.sum(), 1)
+        for k, c in enumerate(self.counts):
+            hi = f"{self.edges[k+1]:g}" if k < len(self.counts)-1 else "inf"
+            lines.append(f"  [{self.edges[k]:g}, {hi})".ljust(18) + f"{c/total:.4f}")
+        return "\n".join(lines)
+
+
+class CFLDump:
+    """Per-step dump of the local timestep field to an HDF5 file.
+
+    Every `write` appends the (ny, nx) "dt_local" field, the time,
+    timestep and limiting cell as one more entry of an `H5Series`.
+    """
+    def __init__(self, filename, mode="w"):
+        self.series = H5Series(filename, mode)
+        self.filename = self.series.filename
+
+    def write(self, t, dt, dt_local, limiting_cell):
+        self.series.append(dt_local=dt_local, t=t, dt=dt, limiting_cell=limiting_cell)
+
+    def close(self):
+        self.series.close()
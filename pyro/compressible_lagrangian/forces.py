@@ -1,28 +1,47 @@
-
 from __future__ import annotations
 import numpy as np
 
-def accumulate_pressure_forces_and_work(mesh, faces):
-    """Sum pressure forces and work for each cell."""
+from .workspace import LagrangianWorkspace
+
+
+def accumulate_pressure_forces_and_work(mesh, faces, work=None):
+    """Sum pressure forces and work for each cell.
+
+    Uses the current face normals and lengths from `mesh.face_geometry`.
+    The outward normal of a cell is the face normal on its east/north
+    sides and minus the face normal on its west/south sides, so each side
+    adds -(+/-) p* L n to the force and -(+/-) p* (u_face . n) L to the work.
+
+    The sums are accumulated into `work.mom_rhs` and `work.ener_rhs` of
+    the given `LagrangianWorkspace` (a new one if `work` is None).
+    """
     ny, nx = mesh.ny, mesh.nx
-    mom_rhs = np.zeros((ny, nx, 2))
-    ener_rhs = np.zeros((ny, nx))
+    if work is None:
+        work = LagrangianWorkspace(ny, nx)
+    mom_rhs, ener_rhs = work.mom_rhs, work.ener_rhs
+    mom_rhs[...] = 0.0
+    ener_rhs[...] = 0.0
+    pL, un, tmp = work.cell[0], work.cell[1], work.cell[2]
 
-    (nw, ne, ns, nn), (Lw, Le, Ls, Ln) = mesh.face_geometry()
+    (normal_x, normal_y), (length_x, length_y) = mesh.face_geometry()
 
-    n_w = np.dstack([-np.ones_like(Lw), np.zeros_like(Lw)])
-    n_e = np.dstack([ np.ones_like(Le), np.zeros_like(Le)])
-    n_s = np.dstack([ np.zeros_like(Ls),-np.ones_like(Ls)])
-    n_n = np.dstack([ np.zeros_like(Ln), np.ones_like(Ln)])
+    sides = [("w", 1.0, normal_x[:, :-1], length_x[:, :-1]),
+             ("e", -1.0, normal_x[:, 1:], length_x[:, 1:]),
+             ("s", 1.0, normal_y[:-1, :], length_y[:-1, :]),
+             ("n", -1.0, normal_y[1:, :], length_y[1:, :])]
 
-    mom_rhs[:, :, :] += -faces["pstar_w"][..., None] * n_w * Lw[..., None]
-    mom_rhs[:, :, :] += -faces["pstar_e"][..., None] * n_e * Le[..., None]
-    mom_rhs[:, :, :] += -faces["pstar_s"][..., None] * n_s * Ls[..., None]
-    mom_rhs[:, :, :] += -faces["pstar_n"][..., None] * n_n * Ln[..., None]
+    for side, sign, n, L in sides:
+        np.multiply(faces["pstar_" + side], L, out=pL)
+        np.multiply(pL, sign, out=pL)
+        for d in range(2):
+            np.multiply(pL, n[..., d], out=tmp)
+            np.add(mom_rhs[..., d], tmp, out=mom_rhs[..., d])
 
-    ener_rhs[:, :] += -(faces["pstar_w"] * (faces["u_vec_w"][...,0])) * Lw
-    ener_rhs[:, :] += -(faces["pstar_e"] * (faces["u_vec_e"][...,0])) * Le
-    ener_rhs[:, :] += -(faces["pstar_s"] * (faces["u_vec_s"][...,1])) * Ls
-    ener_rhs[:, :] += -(faces["pstar_n"] * (faces["u_vec_n"][...,1])) * Ln
+        u_face = faces["u_vec_" + side]
+        np.multiply(u_face[..., 0], n[..., 0], out=un)
+        np.multiply(u_face[..., 1], n[..., 1], out=tmp)
+        np.add(un, tmp, out=un)
+        np.multiply(pL, un, out=un)
+        np.add(ener_rhs, un, out=ener_rhs)
 
     return mom_rhs, ener_rhs
@@ -0,0 +1,284 @@
+"""Numba-compiled kernels for the Lagrangian stage.
+
+These fuse the operations that the NumPy path (riemann.py, viscosity.py,
+forces.py, mesh.py) performs as separate whole-array passes, and are
+selected with ``lagrangian.kernel = numba``.
+"""
+
+import numpy as np
+from numba import njit
+
+from .boundary import PERIODIC, WALL
+from .viscosity import viscosity_x_faces, viscosity_y_faces
+
+
+@njit(cache=True)
+def hllc_star_scalar(gamma, rL, uL, pL, rR, uR, pR):
+    """Contact speed and PVRS star pressure; the same operations as
+    `riemann.hllc_1d`."""
+    aL = np.sqrt(gamma*max(pL, 0.0)/max(rL, 1e-30))
+    aR = np.sqrt(gamma*max(pR, 0.0)/max(rR, 1e-30))
+    SL = min(uL - aL, uR - aR)
+    SR = max(uL + aL, uR + aR)
+    pPV = 0.5*(pL+pR) - 0.5*(uR-uL)*0.5*(rL+rR)*0.5*(aL+aR)
+    pStar = max(0.0, pPV)
+    denom = rL*(SL-uL) - rR*(SR-uR)
+    if abs(denom) < 1e-30:
+        Sstar = 0.5*(uL+uR)
+    else:
+        Sstar = (pR - pL + rL*uL*(SL-uL) - rR*uR*(SR-uR)) / denom
+    return Sstar, pStar
+
+
+@njit(cache=True)
+def boundary_star(gamma, kind, w, inward, r, u, p, r2, u2, p2):
+    """Contact speed and star pressure on a boundary face of a side of
+    `kind` (see `boundary`) with wall speed `w`.  (r, u, p) is the cell
+    next to the face, with u its speed along the face normal, and
+    (r2, u2, p2) the cell across a periodic boundary; the cell is on the
+    right of the face if `inward` (left and bottom sides)."""
+    if kind == WALL:
+        # the mirrored cell: a wall moving at w keeps it symmetric
+        um = 2.0*w - u
+        if inward:
+            _, pstar = hllc_star_scalar(gamma, r, um, p, r, u, p)
+        else:
+            _, pstar = hllc_star_scalar(gamma, r, u, p, r, um, p)
+        return w, pstar
+    if kind == PERIODIC:
+        if inward:
+            return hllc_star_scalar(gamma, r2, u2, p2, r, u, p)
+        return hllc_star_scalar(gamma, r, u, p, r2, u2, p2)
+    return u, p
+
+
+@njit(cache=True)
+def solve_x_faces(j0, j1, gamma, rho, vel, p, normal_x, ustar_x, pstar_x,
+                  bc_kind, bc_speed):
+    """HLLC on the x-faces of cell rows j0 <= j < j1; face i sits
+    between cells i-1 and i.  The faces on the left and right sides
+    follow `boundary_star` with the kinds and speeds of sides 0 and 1."""
+    nx = rho.shape[1]
+    for j in range(j0, j1):
+        for i in range(nx+1):
+            n0 = normal_x[j, i, 0]
+            n1 = normal_x[j, i, 1]
+            if i == 0 or i == nx:
+                side = 0 if i == 0 else 1
+                ic = 0 if i == 0 else nx-1
+                io = nx-1 if i == 0 else 0
+                ustar_x[j, i], pstar_x[j, i] = boundary_star(
+                    gamma, bc_kind[side], bc_speed[side], i == 0,
+                    rho[j, ic], vel[j, ic, 0]*n0 + vel[j, ic, 1]*n1, p[j, ic],
+                    rho[j, io], vel[j, io, 0]*n0 + vel[j, io, 1]*n1, p[j, io])
+            else:
+                ustar_x[j, i], pstar_x[j, i] = hllc_star_scalar(
+                    gamma,
+                    rho[j, i-1], vel[j, i-1, 0]*n0 + vel[j, i-1, 1]*n1, p[j, i-1],
+                    rho[j, i], vel[j, i, 0]*n0 + vel[j, i, 1]*n1, p[j, i])
+
+
+@njit(cache=True)
+def solve_y_faces(j0, j1, gamma, rho, vel, p, normal_y, ustar_y, pstar_y,
+                  bc_kind, bc_speed):
+    """HLLC on the y-faces j0 <= j < j1; face j sits between cells j-1
+    and j.  The faces on the bottom and top sides follow `boundary_star`
+    with the kinds and speeds of sides 2 and 3."""
+    ny, nx = rho.shape
+    for j in range(j0, j1):
+        for i in range(nx):
+            n0 = normal_y[j, i, 0]
+            n1 = normal_y[j, i, 1]
+            if j == 0 or j == ny:
+                side = 2 if j == 0 else 3
+                jc = 0 if j == 0 else ny-1
+                jo = ny-1 if j == 0 else 0
+                ustar_y[j, i], pstar_y[j, i] = boundary_star(
+                    gamma, bc_kind[side], bc_speed[side], j == 0,
+                    rho[jc, i], vel[jc, i, 0]*n0 + vel[jc, i, 1]*n1, p[jc, i],
+                    rho[jo, i], vel[jo, i, 0]*n0 + vel[jo, i, 1]*n1, p[jo, i])
+            else:
+                ustar_y[j, i], pstar_y[j, i] = hllc_star_scalar(
+                    gamma,
+                    rho[j-1, i], vel[j-1, i, 0]*n0 + vel[j-1, i, 1]*n1, p[j-1, i],
+                    rho[j, i], vel[j, i, 0]*n0 + vel[j, i, 1]*n1, p[j, i])
+
+
+@njit(cache=True)
+def cell_forces(j0, j1, normal_x, normal_y, length_x, length_y,
+                ustar_x, pstar_x, ustar_y, pstar_y, mom_rhs, ener_rhs):
+    """Pressure force and work for the cells of rows j0 <= j < j1, from
+    the already solved faces."""
+    nx = mom_rhs.shape[1]
+    for j in range(j0, j1):
+        for i in range(nx):
+            # face velocity u* n on the four sides
+            uwx = ustar_x[j, i]*normal_x[j, i, 0]
+            uwy = ustar_x[j, i]*normal_x[j, i, 1]
+            uex = ustar_x[j, i+1]*normal_x[j, i+1, 0]
+            uey = ustar_x[j, i+1]*normal_x[j, i+1, 1]
+            usx = ustar_y[j, i]*normal_y[j, i, 0]
+            usy = ustar_y[j, i]*normal_y[j, i, 1]
+            unx = ustar_y[j+1, i]*normal_y[j+1, i, 0]
+            uny = ustar_y[j+1, i]*normal_y[j+1, i, 1]
+
+            # pressure force and work; the outward normal is minus the
+            # face normal on the west and south sides
+            fx = 0.0
+            fy = 0.0
+            work = 0.0
+
+            pL = pstar_x[j, i]*length_x[j, i]
+            fx += pL*normal_x[j, i, 0]
+            fy += pL*normal_x[j, i, 1]
+            work += pL*(uwx*normal_x[j, i, 0] + uwy*normal_x[j, i, 1])
+
+            pL = -(pstar_x[j, i+1]*length_x[j, i+1])
+            fx += pL*normal_x[j, i+1, 0]
+            fy += pL*normal_x[j, i+1, 1]
+            work += pL*(uex*normal_x[j, i+1, 0] + uey*normal_x[j, i+1, 1])
+
+            pL = pstar_y[j, i]*length_y[j, i]
+            fx += pL*normal_y[j, i, 0]
+            fy += pL*normal_y[j, i, 1]
+            work += pL*(usx*normal_y[j, i, 0] + usy*normal_y[j, i, 1])
+
+            pL = -(pstar_y[j+1, i]*length_y[j+1, i])
+            fx += pL*normal_y[j+1, i, 0]
+            fy += pL*normal_y[j+1, i, 1]
+            work += pL*(unx*normal_y[j+1, i, 0] + uny*normal_y[j+1, i, 1])
+
+            mom_rhs[j, i, 0] = fx
+            mom_rhs[j, i, 1] = fy
+            ener_rhs[j, i] = work
+
+
+@njit(cache=True)
+def node_average(j0, j1, normal_x, normal_y, ustar_x, ustar_y, w_node, u_node):
+    """Average of the face velocities u* n around the nodes of rows
+    j0 <= j < j1, each face counted once per cell it bounds."""
+    ny = ustar_x.shape[0]
+    nx = ustar_y.shape[1]
+    for j in range(j0, j1):
+        for i in range(nx+1):
+            vx = 0.0
+            vy = 0.0
+            # x-faces above and below the node
+            for jf in (j-1, j):
+                if 0 <= jf < ny:
+                    c = 1.0 if i == 0 or i == nx else 2.0
+                    s = c*ustar_x[jf, i]
+                    vx += s*normal_x[jf, i, 0]
+                    vy += s*normal_x[jf, i, 1]
+            # y-faces left and right of the node
+            for i_f in (i-1, i):
+                if 0 <= i_f < nx:
+                    c = 1.0 if j == 0 or j == ny else 2.0
+                    s = c*ustar_y[j, i_f]
+                    vx += s*normal_y[j, i_f, 0]
+                    vy += s*normal_y[j, i_f, 1]
+            u_node[j, i, 0] = vx/w_node[j, i]
+            u_node[j, i, 1] = vy/w_node[j, i]
+
+
+@njit(cache=True)
+def node_lsq(j0, j1, normal_x, normal_y, ustar_x, ustar_y, w_node, u_node):
+    """Weighted least-squares fit of the velocities of the nodes of rows
+    j0 <= j < j1 to the normal speeds of the faces around them; the same
+    weights and operations as `node_velocity.csr_lsq`, including the
+    fall back to the average where the normals are (nearly) parallel."""
+    ny = ustar_x.shape[0]
+    nx = ustar_y.shape[1]
+    for j in range(j0, j1):
+        for i in range(nx+1):
+            a11 = 0.0
+            a12 = 0.0
+            a22 = 0.0
+            b1 = 0.0
+            b2 = 0.0
+            # x-faces above and below the node, then y-faces right and
+            # left, in the order of the CSR stencil
+            for k in range(4):
+                if k < 2:
+                    jf = j - k
+                    if jf < 0 or jf >= ny:
+                        continue
+                    c = 1.0 if i == 0 or i == nx else 2.0
+                    s = ustar_x[jf, i]
+                    n0 = normal_x[jf, i, 0]
+                    n1 = normal_x[jf, i, 1]
+                else:
+                    i_f = i - (k - 2)
+                    if i_f < 0 or i_f >= nx:
+                        continue
+                    c = 1.0 if j == 0 or j == ny else 2.0
+                    s = ustar_y[j, i_f]
+                    n0 = normal_y[j, i_f, 0]
+                    n1 = normal_y[j, i_f, 1]
+                w = c/w_node[j, i]
+                a11 += w*n0*n0
+                a12 += w*n0*n1
+                a22 += w*n1*n1
+                b1 += w*n0*s
+                b2 += w*n1*s
+            det = a11*a22 - a12*a12
+            if det > 1.e-12*(a11*a22):
+                u_node[j, i, 0] = (a22*b1 - a12*b2)/det
+                u_node[j, i, 1] = (a11*b2 - a12*b1)/det
+            else:
+                u_node[j, i, 0] = b1
+                u_node[j, i, 1] = b2
+
+
+@njit(cache=True)
+def lagrangian_stage(gamma, c1, c2, rho, vel, p,
+                     normal_x, normal_y, length_x, length_y, w_node, lsq,
+                     ustar_x, pstar_x, ustar_y, pstar_y,
+                     mom_rhs, ener_rhs, u_node, bc_kind, bc_speed):
+    r"""
+    One fused Lagrangian stage: face HLLC solve, edge viscosity,
+    pressure force/work accumulation and node velocity recovery, with no
+    intermediate face dictionaries.
+
+    Parameters
+    ----------
+    gamma : float
+        Adiabatic index
+    c1, c2 : float
+        Linear and quadratic edge viscosity coefficients (both 0
+        disable the viscosity)
+    rho, p : ndarray
+        Cell density and pressure, (ny, nx)
+    vel : ndarray
+        Cell velocity, (ny, nx, 2)
+    normal_x, length_x, normal_y, length_y : ndarray
+        Unit normals and lengths of the x-faces (ny, nx+1) and
+        y-faces (ny+1, nx)
+    w_node : ndarray
+        Number of face contributions per node, (ny+1, nx+1)
+    lsq : bool
+        Recover the node velocities by least squares (`node_lsq`)
+        rather than as the average of the face velocities
+    ustar_x, pstar_x, ustar_y, pstar_y : ndarray
+        Output: face contact speed and star pressure (including the
+        viscosity)
+    mom_rhs, ener_rhs : ndarray
+        Output: cell pressure force (ny, nx, 2) and work (ny, nx)
+    u_node : ndarray
+        Output: node velocity, (ny+1, nx+1, 2)
+    bc_kind, bc_speed : ndarray
+        Kind and wall speed of the left, right, bottom and top sides
+        (`boundary.BoundaryManager.kinds` and `wall_speed`)
+    """
+    ny = rho.shape[0]
+    solve_x_faces(0, ny, gamma, rho, vel, p, normal_x, ustar_x, pstar_x, bc_kind, bc_speed)
+    solve_y_faces(0, ny+1, gamma, rho, vel, p, normal_y, ustar_y, pstar_y, bc_kind, bc_speed)
+    if c1 > 0.0 or c2 > 0.0:
+        viscosity_x_faces(0, ny, gamma, c1, c2, rho, vel, p, normal_x, pstar_x)
+        viscosity_y_faces(0, ny+1, gamma, c1, c2, rho, vel, p, normal_y, pstar_y)
+    cell_forces(0, ny, normal_x, normal_y, length_x, length_y,
+                ustar_x, pstar_x, ustar_y, pstar_y, mom_rhs, ener_rhs)
+    if lsq:
+        node_lsq(0, ny+1, normal_x, normal_y, ustar_x, ustar_y, w_node, u_node)
+    else:
+        node_average(0, ny+1, normal_x, normal_y, ustar_x, ustar_y, w_node, u_node)
@@ -3,6 +3,10 @@ from __future__ import annotations
 import numpy as np
 from dataclasses import dataclass
 
+from .node_velocity import NodeVelocityRecovery
+from .quality import MeshQuality, cell_quality
+from . import tiling
+
 @dataclass
 class MovingQuadMesh:
     nx: int
@@ -12,7 +16,7 @@ class MovingQuadMesh:
     ymin: float
     ymax: float
 
-    def __init__(self, nx, ny, xmin, xmax, ymin, ymax):
+    def __init__(self, nx, ny, xmin, xmax, ymin, ymax, node_velocity="average"):
         self.nx, self.ny = nx, ny
         self.xmin, self.xmax, self.ymin, self.ymax = xmin, xmax, ymin, ymax
         # Node coordinates on a structured grid (ny+1, nx+1, 2)
@@ -21,76 +25,188 @@ class MovingQuadMesh:
         X, Y = np.meshgrid(xs, ys, indexing="xy")
         self.nodes = np.stack([X, Y], axis=-1)
 
+        # Geometry cache, valid while _geom_version == node_version.
+        # Anything that mutates self.nodes must call mark_nodes_changed().
+        self.node_version = 0
+        self._geom = {}
+        self._geom_version = -1
+
+        # row-band tiles (see tiling.make_tiles); when set, the geometry
+        # is computed by the multithreaded tiled kernel
+        self.tiles = None
+
+        # Face geometry lives in preallocated arrays that are refilled in
+        # place.  x-faces are the (ny, nx+1) edges from node (j, i) to
+        # (j+1, i), with unit normal pointing toward increasing i;
+        # y-faces are the (ny+1, nx) edges from node (j, i) to (j, i+1),
+        # with unit normal pointing toward increasing j.
+        self._edge_x = np.empty((ny, nx+1, 2))
+        self._edge_y = np.empty((ny+1, nx, 2))
+        self.normal_x = np.empty((ny, nx+1, 2))
+        self.normal_y = np.empty((ny+1, nx, 2))
+        self.length_x = np.empty((ny, nx+1))
+        self.length_y = np.empty((ny+1, nx))
+
+        # the cell geometry is refilled in place as well
+        self.area = np.empty((ny, nx))
+        self.centers = np.empty((ny, nx, 2))
+        self.ell = np.empty((ny, nx))
+        self._d10 = np.empty((ny, nx, 2))
+        self._d11 = np.empty((ny, nx, 2))
+        self._d01 = np.empty((ny, nx, 2))
+        self._c1 = np.empty((ny, nx))
+        self._c2 = np.empty((ny, nx))
+
+        # per-cell quality (see quality) and its per-row extremes
+        self.jacobian = np.empty((ny, nx))
+        self.aspect = np.empty((ny, nx))
+        self._row_jac = np.empty(ny)
+        self._row_aspect = np.empty(ny)
+        self._row_inverted = np.empty(ny, dtype=np.int64)
+
+        # node velocity, recovered through stencils built once here, and
+        # the (topology-only) number of face contributions each node
+        # receives in the per-cell gather of the fused kernel
+        self.node_recovery = NodeVelocityRecovery(nx, ny, node_velocity)
+        self.node_velocity = np.empty((ny+1, nx+1, 2))
+        self._node_disp = np.empty((ny+1, nx+1, 2))
+        self.w_node = np.zeros((ny+1, nx+1))
+        for js, is_ in ((slice(None, -1), slice(None, -1)), (slice(1, None), slice(None, -1)),
+                        (slice(None, -1), slice(1, None)), (slice(1, None), slice(1, None))):
+            self.w_node[js, is_] += 2.0
+
+    def mark_nodes_changed(self):
+        """Invalidate the cached geometry after the nodes have moved."""
+        self.node_version += 1
+
+    def geometry(self):
+        """Return the cached geometry for the current node positions.
+
+        The dictionary holds the cell "area" and "centers", the face
+        "normals" and "lengths" (x-faces, y-faces; see `face_geometry`),
+        and the "inscribed_diameter".  It is rebuilt only when the node
+        version has changed since the last call.
+        """
+        if self._geom_version != self.node_version and self.tiles is not None:
+            tiling.geometry(self.tiles, self.nodes, self.normal_x, self.normal_y,
+                            self.length_x, self.length_y, self.area, self.centers, self.ell)
+            self._geom["area"] = self.area
+            self._geom["centers"] = self.centers
+            self._geom["normals"] = (self.normal_x, self.normal_y)
+            self._geom["lengths"] = (self.length_x, self.length_y)
+            self._geom["inscribed_diameter"] = self.ell
+            self._geom_version = self.node_version
+        elif self._geom_version != self.node_version:
+            self._geom["area"] = self._compute_cell_area()
+            self._geom["centers"] = self._compute_cell_centers()
+            self._geom["normals"], self._geom["lengths"] = self._compute_face_geometry()
+            np.multiply(self.area, 4.0, out=self.ell)
+            np.divide(self.ell, np.pi, out=self.ell)
+            np.sqrt(self.ell, out=self.ell)
+            self._geom["inscribed_diameter"] = self.ell
+            self._geom_version = self.node_version
+        return self._geom
+
     # Cell-centered geometry
     @property
     def nc(self):
         return self.ny, self.nx
 
     def cell_centers(self):
-        Xc = 0.25*(self.nodes[:-1, :-1, 0] + self.nodes[1:, :-1, 0] +
-                   self.nodes[:-1,  1:, 0] + self.nodes[1:,  1:, 0])
-        Yc = 0.25*(self.nodes[:-1, :-1, 1] + self.nodes[1:, :-1, 1] +
-                   self.nodes[:-1,  1:, 1] + self.nodes[1:,  1:, 1])
-        return np.stack([Xc, Yc], axis=-1)  # (ny, nx, 2)
+        return self.geometry()["centers"]  # (ny, nx, 2)
 
     def cell_area(self):
-        # Bilinear quad area via two triangles
-        A = np.zeros((self.ny, self.nx))
-        for j in range(self.ny):
-            for i in range(self.nx):
-                n00 = self.nodes[j, i]
-                n10 = self.nodes[j, i+1]
-                n01 = self.nodes[j+1, i]
-                n11 = self.nodes[j+1, i+1]
-                # two triangles: (n00,n10,n11) and (n00,n11,n01)
-                A[j,i] = 0.5*np.abs(np.cross(n10-n00, n11-n00)) +                          0.5*np.abs(np.cross(n11-n00, n01-n00))
-        return A
+        return self.geometry()["area"]
 
     def face_geometry(self):
-        """Return per-face normals and lengths for west/east/south/north."""
-        ny, nx = self.ny, self.nx
-        # West/East vertical faces
-        Lw = np.linalg.norm(self.nodes[1:, :-1] - self.nodes[:-1, :-1], axis=-1)
-        Le = np.linalg.norm(self.nodes[1:, 1:]  - self.nodes[:-1, 1:],  axis=-1)
-        # South/North horizontal faces
-        Ls = np.linalg.norm(self.nodes[:-1, 1:] - self.nodes[:-1, :-1], axis=-1)
-        Ln = np.linalg.norm(self.nodes[1:,  1:] - self.nodes[1:,  :-1], axis=-1)
-
-        # Normals in initial layout (unit)
-        nw = np.dstack([-np.ones_like(Lw), np.zeros_like(Lw)]); nw /= np.linalg.norm(nw,axis=-1,keepdims=True)
-        ne = np.dstack([ np.ones_like(Le), np.zeros_like(Le)]); ne /= np.linalg.norm(ne,axis=-1,keepdims=True)
-        ns = np.dstack([ np.zeros_like(Ls),-np.ones_like(Ls)]); ns /= np.linalg.norm(ns,axis=-1,keepdims=True)
-        nn = np.dstack([ np.zeros_like(Ln), np.ones_like(Ln)]); nn /= np.linalg.norm(nn,axis=-1,keepdims=True)
-
-        return (nw, ne, ns, nn), (Lw, Le, Ls, Ln)
+        """Return the unit normals and lengths of the x- and y-faces,
+        ``(normal_x, normal_y), (length_x, length_y)``.
+
+        The west/east faces of cell (j, i) are x-faces i and i+1 and the
+        south/north faces are y-faces j and j+1; the outward normal is
+        minus the face normal on the west and south sides.
+        """
+        geom = self.geometry()
+        return geom["normals"], geom["lengths"]
+
+    def _compute_cell_centers(self):
+        n = self.nodes
+        for d in range(2):
+            c = self.centers[..., d]
+            np.add(n[:-1, :-1, d], n[1:, :-1, d], out=c)
+            np.add(c, n[:-1, 1:, d], out=c)
+            np.add(c, n[1:, 1:, d], out=c)
+            np.multiply(c, 0.25, out=c)
+        return self.centers  # (ny, nx, 2)
+
+    def _compute_cell_area(self):
+        # Bilinear quad area via two triangles, all cells at once:
+        # (n00,n10,n11) and (n00,n11,n01)
+        n00 = self.nodes[:-1, :-1]
+        d10, d11, d01 = self._d10, self._d11, self._d01
+        c1, c2 = self._c1, self._c2
+        np.subtract(self.nodes[:-1, 1:], n00, out=d10)
+        np.subtract(self.nodes[1:, 1:], n00, out=d11)
+        np.subtract(self.nodes[1:, :-1], n00, out=d01)
+        for c, a, b in ((c1, d10, d11), (c2, d11, d01)):
+            np.multiply(a[..., 0], b[..., 1], out=c)
+            np.multiply(a[..., 1], b[..., 0], out=self.area)
+            np.subtract(c, self.area, out=c)
+            np.abs(c, out=c)
+            np.multiply(c, 0.5, out=c)
+        np.add(c1, c2, out=self.area)
+        return self.area
+
+    def _compute_face_geometry(self):
+        # edge vectors from the current node positions
+        np.subtract(self.nodes[1:, :], self.nodes[:-1, :], out=self._edge_x)
+        np.subtract(self.nodes[:, 1:], self.nodes[:, :-1], out=self._edge_y)
+
+        np.hypot(self._edge_x[..., 0], self._edge_x[..., 1], out=self.length_x)
+        np.hypot(self._edge_y[..., 0], self._edge_y[..., 1], out=self.length_y)
+
+        # rotate the edge by -90 (x-faces) or +90 (y-faces) degrees
+        np.divide(self._edge_x[..., 1], self.length_x, out=self.normal_x[..., 0])
+        np.divide(self._edge_x[..., 0], self.length_x, out=self.normal_x[..., 1])
+        np.negative(self.normal_x[..., 1], out=self.normal_x[..., 1])
+
+        np.divide(self._edge_y[..., 1], self.length_y, out=self.normal_y[..., 0])
+        np.negative(self.normal_y[..., 0], out=self.normal_y[..., 0])
+        np.divide(self._edge_y[..., 0], self.length_y, out=self.normal_y[..., 1])
+
+        return (self.normal_x, self.normal_y), (self.length_x, self.length_y)
 
     def move_nodes(self, faces, dt):
-        """Move nodes by averaging adjacent face velocities (simple, robust)."""
-        ny, nx = self.ny, self.nx
-        u_node = np.zeros_like(self.nodes)
-        w_node = np.zeros(self.nodes.shape[:-1])
-
-        u_w = faces["u_vec_w"]  # (ny, nx, 2)
-        u_e = faces["u_vec_e"]
-        u_s = faces["u_vec_s"]
-        u_n = faces["u_vec_n"]
-
-        # Vertical faces -> add to left/right nodes
-        u_node[:-1, :-1] += u_w; w_node[:-1, :-1] += 1.0
-        u_node[ 1:, :-1] += u_w; w_node[ 1:, :-1] += 1.0
-        u_node[:-1,  1:] += u_e; w_node[:-1,  1:] += 1.0
-        u_node[ 1:,  1:] += u_e; w_node[ 1:,  1:] += 1.0
-
-        # Horizontal faces -> add to south/north nodes
-        u_node[:-1, :-1] += u_s; w_node[:-1, :-1] += 1.0
-        u_node[:-1,  1:] += u_s; w_node[:-1,  1:] += 1.0
-        u_node[ 1:, :-1] += u_n; w_node[ 1:, :-1] += 1.0
-        u_node[ 1:,  1:] += u_n; w_node[ 1:,  1:] += 1.0
-
-        w_node = np.maximum(w_node, 1e-30)
-        u_node /= w_node[..., None]
-        self.nodes += dt * u_node
+        """Move nodes with the velocity recovered from the adjacent faces."""
+        self.gather_node_velocity(faces)
+        self.advance_nodes(dt)
+
+    def gather_node_velocity(self, faces):
+        """Recover `node_velocity` from the face contact speeds."""
+        (normal_x, normal_y), _ = self.face_geometry()
+        return self.node_recovery.apply(faces["ustar_x"], faces["ustar_y"],
+                                        normal_x, normal_y, self.node_velocity)
+
+    def advance_nodes(self, dt):
+        """Displace the nodes by dt * node_velocity."""
+        np.multiply(self.node_velocity, dt, out=self._node_disp)
+        self.nodes += self._node_disp
+        self.mark_nodes_changed()
 
     def inscribed_diameter(self):
-        A = self.cell_area()
-        return np.sqrt(4.0*A/np.pi)
+        return self.geometry()["inscribed_diameter"]
+
+    def quality(self):
+        """Return the `MeshQuality` of the current nodes.
+
+        The scaled Jacobian and aspect ratio of every cell are left in
+        `jacobian` and `aspect`.  Both come from the cached face
+        geometry, so after a step this costs one pass over the faces.
+        """
+        (normal_x, normal_y), (length_x, length_y) = self.face_geometry()
+        cell_quality(normal_x, normal_y, length_x, length_y, self.jacobian, self.aspect,
+                     self._row_jac, self._row_aspect, self._row_inverted)
+        j = int(np.argmin(self._row_jac))
+        i = int(np.argmin(self.jacobian[j]))
+        return MeshQuality(float(self._row_jac[j]), float(np.max(self._row_aspect)),
+                           int(np.sum(self._row_inverted)), (j, i))
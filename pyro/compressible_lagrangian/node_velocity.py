@@ -0,0 +1,128 @@
+"""Node velocity recovery from the face contact speeds.
+
+The node -> face connectivity of the structured quad mesh is fixed, so it
+is built once, in CSR form, when the mesh is created.  Each stage then
+recovers the node velocities with one compiled sweep over that stencil (a
+``prange`` over the nodes, each of which only writes its own entry),
+either as the weighted average of the adjacent face velocities u* n
+("average") or as the least-squares fit of a node velocity v to the
+adjacent face normal speeds, min sum_f w_f (v . n_f - u*_f)^2 ("lsq").
+
+This is the recovery of the NumPy path.  The numba stage kernels do the
+same recovery, with the same weights, in the node sweep of the fused
+stage (`kernels.node_average` and `kernels.node_lsq`), so there is no
+separate pass over the nodes there.
+"""
+
+import numpy as np
+from numba import njit, prange
+
+
+class NodeVelocityRecovery:
+    """Precomputed node -> face stencils for an (ny, nx) cell mesh.
+
+    Faces are numbered with the x-faces first, row-major over
+    (ny, nx+1), followed by the y-faces, row-major over (ny+1, nx).
+    Each face is weighted by the number of cells it bounds, so the
+    "average" method reproduces the per-cell gather of the face
+    velocities.
+    """
+
+    methods = ("average", "lsq")
+
+    def __init__(self, nx, ny, method="average"):
+        if method not in self.methods:
+            raise ValueError(f"invalid node velocity method: {method}")
+        self.nx, self.ny = nx, ny
+        self.method = method
+
+        nxf = ny*(nx+1)
+        self.nfaces = nxf + (ny+1)*nx
+
+        J, I = np.meshgrid(np.arange(ny+1), np.arange(nx+1), indexing="ij")
+
+        # the (up to) four edges meeting at each node:
+        # x-face above and below, y-face to the right and left
+        cand = np.stack([J*(nx+1) + I,
+                         (J-1)*(nx+1) + I,
+                         nxf + J*nx + I,
+                         nxf + J*nx + I - 1], axis=-1).reshape(-1, 4)
+        valid = np.stack([J < ny, J > 0, I < nx, I > 0], axis=-1).reshape(-1, 4)
+
+        # number of cells bounded by each face
+        mult = np.full(self.nfaces, 2.0)
+        mult[:nxf].reshape(ny, nx+1)[:, [0, -1]] = 1.0
+        mult[nxf:].reshape(ny+1, nx)[[0, -1], :] = 1.0
+
+        self.indices = cand[valid]
+        self.indptr = np.zeros(len(cand)+1, dtype=np.int64)
+        np.cumsum(valid.sum(axis=1), out=self.indptr[1:])
+        weights = mult[self.indices]
+        wsum = np.add.reduceat(weights, self.indptr[:-1])
+        self.weights = weights / np.repeat(wsum, np.diff(self.indptr))
+
+        # stage buffers for the packed face data
+        self.face_speed = np.empty(self.nfaces)
+        self.face_normal = np.empty((self.nfaces, 2))
+
+    def apply(self, ustar_x, ustar_y, normal_x, normal_y, out):
+        """Recover the node velocities, (ny+1, nx+1, 2), into `out` from
+        the face normal speeds and unit normals of the x- and y-faces."""
+        nxf = ustar_x.size
+        self.face_speed[:nxf] = ustar_x.reshape(-1)
+        self.face_speed[nxf:] = ustar_y.reshape(-1)
+        self.face_normal[:nxf] = normal_x.reshape(-1, 2)
+        self.face_normal[nxf:] = normal_y.reshape(-1, 2)
+
+        if self.method == "lsq":
+            csr_lsq(self.indptr, self.indices, self.weights,
+                    self.face_speed, self.face_normal, out.reshape(-1, 2))
+        else:
+            csr_average(self.indptr, self.indices, self.weights,
+                        self.face_speed, self.face_normal, out.reshape(-1, 2))
+        return out
+
+
+@njit(cache=True, parallel=True)
+def csr_average(indptr, indices, weights, speed, normal, out):
+    """out[k] = sum_f w_kf u*_f n_f over the CSR stencil of node k."""
+    for k in prange(len(indptr)-1):
+        vx = 0.0
+        vy = 0.0
+        for m in range(indptr[k], indptr[k+1]):
+            f = indices[m]
+            s = weights[m]*speed[f]
+            vx += s*normal[f, 0]
+            vy += s*normal[f, 1]
+        out[k, 0] = vx
+        out[k, 1] = vy
+
+
+@njit(cache=True, parallel=True)
+def csr_lsq(indptr, indices, weights, speed, normal, out):
+    """Weighted least-squares node velocity from the adjacent face normal
+    speeds; falls back to the average where the normals are (nearly)
+    parallel."""
+    for k in prange(len(indptr)-1):
+        a11 = 0.0
+        a12 = 0.0
+        a22 = 0.0
+        b1 = 0.0
+        b2 = 0.0
+        for m in range(indptr[k], indptr[k+1]):
+            f = indices[m]
+            w = weights[m]
+            n0 = normal[f, 0]
+            n1 = normal[f, 1]
+            a11 += w*n0*n0
+            a12 += w*n0*n1
+            a22 += w*n1*n1
+            b1 += w*n0*speed[f]
+            b2 += w*n1*speed[f]
+        det = a11*a22 - a12*a12
+        if det > 1.e-12*(a11*a22):
+            out[k, 0] = (a22*b1 - a12*b2)/det
+            out[k, 1] = (a11*b2 - a12*b1)/det
+        else:
+            out[k, 0] = b1
+            out[k, 1] = b2
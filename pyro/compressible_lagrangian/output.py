@@ -0,0 +1,50 @@
+from __future__ import annotations
+
+import h5py
+import numpy as np
+
+
+class H5Series:
+    """Records appended to an HDF5 file one entry at a time.
+
+    Each keyword of `append` names a dataset whose first axis grows by
+    one per call; the datasets are created on the first call, chunked
+    one entry per chunk and gzip-compressed.  With ``mode="a"`` an
+    existing file is extended, so a restarted run continues the series.
+    """
+    def __init__(self, filename, mode="w"):
+        if not filename.endswith(".h5"):
+            filename += ".h5"
+        self.filename = filename
+        self.mode = mode
+        self._f = None
+
+    def __len__(self):
+        if self._f is None or not self._f.keys():
+            return 0
+        return self._f[next(iter(self._f.keys()))].shape[0]
+
+    def append(self, **records):
+        if self._f is None:
+            self._f = h5py.File(self.filename, self.mode)
+        n = len(self)
+        for name, value in records.items():
+            value = np.asarray(value)
+            if name not in self._f:
+                self._f.create_dataset(name, shape=(0,) + value.shape,
+                                       maxshape=(None,) + value.shape,
+                                       chunks=(1,) + value.shape,
+                                       compression="gzip" if value.ndim else None,
+                                       dtype=value.dtype)
+            dset = self._f[name]
+            dset.resize(n+1, axis=0)
+            dset[n] = value
+
+    def flush(self):
+        if self._f is not None:
+            self._f.flush()
+
+    def close(self):
+        if self._f is not None:
+            self._f.close()
+            self._f = None
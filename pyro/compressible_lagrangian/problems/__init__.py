@@ -0,0 +1 @@
+__all__ = ['noh2d', 'piston2d', 'sedov2d', 'sod2d_channel']
@@ -1,7 +1,14 @@
+"""The cylindrical Noh implosion: a cold (p = 1e-6), unit density gas
+moving toward the centre of the domain at unit speed."""
 
 import numpy as np
 from ..state import cons_from_prim
 
+DEFAULT_INPUTS = "inputs.noh"
+
+PROBLEM_PARAMS = {}
+
+
 def init_data(ccdata, rp):
     gamma = rp.get_param("eos.gamma", 5.0/3.0)
     ny, nx = ccdata._s.mesh.ny, ccdata._s.mesh.nx
@@ -19,3 +26,7 @@ def init_data(ccdata, rp):
     ccdata.get_var("x-momentum")[:] = mom[...,0]
     ccdata.get_var("y-momentum")[:] = mom[...,1]
     ccdata.get_var("energy")[:] = Et
+
+
+def finalize():
+    """ print out any information to the user at the end of the run """
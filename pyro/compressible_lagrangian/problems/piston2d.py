@@ -1,7 +1,17 @@
+"""A uniform gas driven by a piston on one of the boundaries (see the
+[piston] parameters)."""
 
 import numpy as np
 from ..state import cons_from_prim
 
+DEFAULT_INPUTS = "inputs.piston"
+
+PROBLEM_PARAMS = {"ic.density": 1.0,  # initial state of the gas
+                  "ic.pressure": 1.0,
+                  "ic.u": 0.0,
+                  "ic.v": 0.0}
+
+
 def init_data(ccdata, rp):
     gamma = rp.get_param("eos.gamma", 1.4)
     ny, nx = ccdata._s.mesh.ny, ccdata._s.mesh.nx
@@ -18,3 +28,7 @@ def init_data(ccdata, rp):
     ccdata.get_var("x-momentum")[:] = mom[...,0]
     ccdata.get_var("y-momentum")[:] = mom[...,1]
     ccdata.get_var("energy")[:] = Et
+
+
+def finalize():
+    """ print out any information to the user at the end of the run """
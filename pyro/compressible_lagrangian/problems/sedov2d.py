@@ -1,7 +1,14 @@
+"""A Sedov blast wave: a cold (p = 1e-6) gas at rest with a unit
+pressure deposited in the single cell at the centre of the domain."""
 
 import numpy as np
 from ..state import cons_from_prim
 
+DEFAULT_INPUTS = "inputs.sedov"
+
+PROBLEM_PARAMS = {}
+
+
 def init_data(ccdata, rp):
     gamma = rp.get_param("eos.gamma", 1.4)
     ny, nx = ccdata._s.mesh.ny, ccdata._s.mesh.nx
@@ -16,3 +23,7 @@ def init_data(ccdata, rp):
     ccdata.get_var("x-momentum")[:] = mom[...,0]
     ccdata.get_var("y-momentum")[:] = mom[...,1]
     ccdata.get_var("energy")[:] = Et
+
+
+def finalize():
+    """ print out any information to the user at the end of the run """
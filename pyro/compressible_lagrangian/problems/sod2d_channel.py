@@ -1,7 +1,15 @@
+"""The Sod shock tube along x in a reflecting channel: the left half
+of the domain at rho = 1, p = 1 and the right half at rho = 0.125,
+p = 0.1, both at rest."""
 
 import numpy as np
 from ..state import cons_from_prim
 
+DEFAULT_INPUTS = "inputs.sod"
+
+PROBLEM_PARAMS = {}
+
+
 def init_data(ccdata, rp):
     gamma = rp.get_param("eos.gamma", 1.4)
     ny, nx = ccdata._s.mesh.ny, ccdata._s.mesh.nx
@@ -18,3 +26,12 @@ def init_data(ccdata, rp):
     ccdata.get_var("x-momentum")[:] = mom[...,0]
     ccdata.get_var("y-momentum")[:] = mom[...,1]
     ccdata.get_var("energy")[:] = Et
+
+
+def finalize():
+    """ print out any information to the user at the end of the run """
+
+    print("""
+          The script benchmarks/sod_convergence.py compares this problem
+          to the exact solution, analysis/sod-exact.out
+          """)
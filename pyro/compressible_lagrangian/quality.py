@@ -0,0 +1,68 @@
+
+from __future__ import annotations
+import numpy as np
+from dataclasses import dataclass
+from numba import njit, prange
+
+
+@dataclass
+class MeshQuality:
+    """Worst-case quality of the mesh at one time.
+
+    The scaled Jacobian of a cell is the smallest sine of its four corner
+    angles, cross(e1, e2) / (|e1| |e2|) for the two edges leaving a
+    corner: 1 for a rectangle, 0 for a degenerate corner and negative for
+    an inverted cell.  Its aspect ratio is the longest over the shortest
+    of its four edges.
+    """
+    min_jacobian: float
+    max_aspect: float
+    n_inverted: int
+    worst_cell: tuple
+
+    def __str__(self):
+        return (f"min scaled Jacobian {self.min_jacobian:.4g} in cell {self.worst_cell}, "
+                f"max aspect ratio {self.max_aspect:.4g}, {self.n_inverted} inverted cells")
+
+
+@njit(cache=True, parallel=True)
+def cell_quality(normal_x, normal_y, length_x, length_y, jac, aspect,
+                 row_jac, row_aspect, row_inverted):
+    """Scaled Jacobian and aspect ratio of every cell, and their minimum,
+    maximum and the number of inverted cells of each row.
+
+    The unit edge vectors are the face normals rotated back, so the sine
+    of the corner angle between a y-face and an x-face edge is
+    cross(n_x, n_y)."""
+    ny, nx = jac.shape
+    for j in prange(ny):
+        jmin = np.inf
+        amax = 0.0
+        ninv = 0
+        for i in range(nx):
+            wx = normal_x[j, i, 0]
+            wy = normal_x[j, i, 1]
+            ex = normal_x[j, i+1, 0]
+            ey = normal_x[j, i+1, 1]
+            sx = normal_y[j, i, 0]
+            sy = normal_y[j, i, 1]
+            nx_ = normal_y[j+1, i, 0]
+            ny_ = normal_y[j+1, i, 1]
+            c = min(min(wx*sy - wy*sx, ex*sy - ey*sx),
+                    min(ex*ny_ - ey*nx_, wx*ny_ - wy*nx_))
+            jac[j, i] = c
+
+            lmax = max(max(length_x[j, i], length_x[j, i+1]),
+                       max(length_y[j, i], length_y[j+1, i]))
+            lmin = min(min(length_x[j, i], length_x[j, i+1]),
+                       min(length_y[j, i], length_y[j+1, i]))
+            a = lmax/lmin if lmin > 0.0 else np.inf
+            aspect[j, i] = a
+
+            jmin = min(jmin, c)
+            amax = max(amax, a)
+            if c <= 0.0:
+                ninv += 1
+        row_jac[j] = jmin
+        row_aspect[j] = amax
+        row_inverted[j] = ninv
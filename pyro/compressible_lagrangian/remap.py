@@ -0,0 +1,211 @@
+
+from __future__ import annotations
+import numpy as np
+from numba import njit, prange
+
+
+@njit(cache=True, parallel=True)
+def winslow_sweep(x, out, slide):
+    """One Jacobi sweep of `winslow_smooth` from the nodes `x` to `out`."""
+    ny1, nx1 = x.shape[0], x.shape[1]
+    for j in prange(1, ny1-1):
+        for i in range(1, nx1-1):
+            xi0 = 0.5*(x[j, i+1, 0] - x[j, i-1, 0])
+            xi1 = 0.5*(x[j, i+1, 1] - x[j, i-1, 1])
+            xj0 = 0.5*(x[j+1, i, 0] - x[j-1, i, 0])
+            xj1 = 0.5*(x[j+1, i, 1] - x[j-1, i, 1])
+            alpha = xj0*xj0 + xj1*xj1
+            beta = xi0*xj0 + xi1*xj1
+            gamma = xi0*xi0 + xi1*xi1
+            denom = max(2.0*(alpha + gamma), 1e-300)
+            for d in range(2):
+                x_ij = x[j+1, i+1, d] - x[j+1, i-1, d] - x[j-1, i+1, d] + x[j-1, i-1, d]
+                out[j, i, d] = (alpha*(x[j, i+1, d] + x[j, i-1, d]) +
+                                gamma*(x[j+1, i, d] + x[j-1, i, d]) - 0.5*beta*x_ij)/denom
+
+    for d in range(2):
+        for i in range(1, nx1-1):
+            out[0, i, d] = 0.5*(x[0, i-1, d] + x[0, i+1, d]) if slide[2] else x[0, i, d]
+            out[ny1-1, i, d] = (0.5*(x[ny1-1, i-1, d] + x[ny1-1, i+1, d]) if slide[3]
+                                else x[ny1-1, i, d])
+        for j in range(1, ny1-1):
+            out[j, 0, d] = 0.5*(x[j-1, 0, d] + x[j+1, 0, d]) if slide[0] else x[j, 0, d]
+            out[j, nx1-1, d] = (0.5*(x[j-1, nx1-1, d] + x[j+1, nx1-1, d]) if slide[1]
+                                else x[j, nx1-1, d])
+        for j in (0, ny1-1):
+            for i in (0, nx1-1):
+                out[j, i, d] = x[j, i, d]
+
+
+def winslow_smooth(nodes, out, iterations, work=None, slide=None):
+    """Relax the nodes toward the Winslow (equipotential) mesh.
+
+    Each Jacobi sweep solves, node by node,
+
+        alpha x_ii - 2 beta x_ij + gamma x_jj = 0,
+
+    with alpha = x_j . x_j, beta = x_i . x_j and gamma = x_i . x_i the
+    metric terms of the logical (i, j) directions, all by central
+    differences.  The nodes on each side of the domain (left, right,
+    bottom, top) for which `slide` is true (all, by default) are moved to
+    the midpoint of their neighbours along that side, which keeps a
+    straight wall straight and slides its nodes along it; the other
+    sides and the corners are not moved.  A uniform rectangular mesh is a fixed point; a distorted one
+    is pulled toward smoothly varying, orthogonal cells.  The smoothed
+    nodes are written to `out`; `work` is a scratch array of the same
+    shape.
+    """
+    if out.shape != nodes.shape:
+        raise ValueError(f"out has shape {out.shape}, not {nodes.shape}")
+    if iterations == 0:
+        np.copyto(out, nodes)
+        return out
+    if work is None:
+        work = np.empty_like(nodes)
+    if slide is None:
+        slide = np.ones(4, dtype=np.bool_)
+    src = nodes
+    for k in range(iterations):
+        # alternate between the buffers so the last sweep writes out
+        dst = out if (iterations - k) % 2 == 1 else work
+        winslow_sweep(src, dst, slide)
+        src = dst
+    return out
+
+
+def swept_volumes(old, new, swept_x, swept_y):
+    """Signed area swept by every face as its nodes move from `old` to
+    `new`.
+
+    The area of the quadrilateral (a, a', b', b) traced by a face with
+    ends a, b is positive when the face moves along its normal (toward
+    increasing i for x-faces, j for y-faces).  The change of the area
+    of a cell is exactly the sum of the swept areas of its east and
+    north faces minus those of its west and south faces.
+    """
+    # x-faces run from node (j, i) to (j+1, i): 1/2 (b' - a) x (b - a')
+    a, b, a2, b2 = old[:-1], old[1:], new[:-1], new[1:]
+    d1 = b2 - a
+    d2 = b - a2
+    np.multiply(d1[..., 0], d2[..., 1], out=swept_x)
+    swept_x -= d1[..., 1]*d2[..., 0]
+    swept_x *= 0.5
+
+    # y-faces run from node (j, i) to (j, i+1): 1/2 (b - a') x (b' - a)
+    a, b, a2, b2 = old[:, :-1], old[:, 1:], new[:, :-1], new[:, 1:]
+    d1 = b - a2
+    d2 = b2 - a
+    np.multiply(d1[..., 0], d2[..., 1], out=swept_y)
+    swept_y -= d1[..., 1]*d2[..., 0]
+    swept_y *= 0.5
+    return swept_x, swept_y
+
+
+class ALERemap:
+    """Arbitrary Lagrangian-Eulerian rezone and remap.
+
+    `apply` smooths the mesh (`winslow_smooth`)
+    and carries the cell mass, momentum and total energy over to the
+    new mesh with swept-face fluxes: the volume each interior face
+    sweeps is taken from the cell it moves into, at that cell's mean
+    density of the quantity (first-order donor cell).  Every flux leaves
+    one cell and enters its neighbour, so mass, momentum and total
+    energy are conserved to round-off, and a uniform state stays
+    uniform.  Boundary nodes only slide along the (straight) walls, the
+    sides flagged in `slide` (see `boundary.BoundaryManager.slides`),
+    and stay put on the others, so the boundary faces sweep nothing.
+
+    The faces of a cell may not take more than `max_fraction` of its
+    volume in one remap, which keeps the mass positive and the new
+    velocity and specific energy averages of the old ones; a larger
+    move is split into equal sub-remaps through intermediate meshes.
+    The conserved quantities, fluxes and meshes live in arrays
+    allocated here.
+    """
+    def __init__(self, ny, nx, iterations=10, max_fraction=0.5, slide=None):
+        if iterations < 1:
+            raise ValueError(f"invalid lagrangian.ale_iterations: {iterations}")
+        self.iterations = iterations
+        self.max_fraction = max_fraction
+        if slide is None:
+            slide = np.ones(4, dtype=np.bool_)
+        self.slide = np.asarray(slide, dtype=np.bool_)
+        self.nsub = 0
+
+        # mass, x- and y-momentum and total energy of each cell, and
+        # their mean densities
+        self._U = np.empty((4, ny, nx))
+        self._q = np.empty((4, ny, nx))
+        self._area = np.empty((ny, nx))
+
+        self._swept_x = np.empty((ny, nx+1))
+        self._swept_y = np.empty((ny+1, nx))
+        self._flux_x = np.empty((4, ny, nx-1))
+        self._flux_y = np.empty((4, ny-1, nx))
+
+        self._start = np.empty((ny+1, nx+1, 2))
+        self._target = np.empty((ny+1, nx+1, 2))
+        self._next = np.empty((ny+1, nx+1, 2))
+
+    def apply(self, mesh, state):
+        """Smooth the mesh and remap the state onto it."""
+        winslow_smooth(mesh.nodes, self._target, self.iterations, self._next, self.slide)
+
+        # the number of sub-remaps keeping the volume leaving every cell
+        # below max_fraction of it
+        sx, sy = swept_volumes(mesh.nodes, self._target, self._swept_x, self._swept_y)
+        out = self._area
+        out[:] = 0.0
+        out[:, 1:] += np.maximum(sx[:, 1:-1], 0.0)
+        out[:, :-1] -= np.minimum(sx[:, 1:-1], 0.0)
+        out[1:] += np.maximum(sy[1:-1], 0.0)
+        out[:-1] -= np.minimum(sy[1:-1], 0.0)
+        out /= np.maximum(mesh.cell_area(), 1e-300)
+        self.nsub = max(1, int(np.ceil(np.max(out)/self.max_fraction)))
+
+        np.copyto(self._start, mesh.nodes)
+        for k in range(1, self.nsub + 1):
+            if k == self.nsub:
+                new = self._target
+            else:
+                new = self._next
+                np.subtract(self._target, self._start, out=new)
+                new *= k/self.nsub
+                new += self._start
+            self._remap(mesh, state, new)
+
+    def _remap(self, mesh, state, new):
+        U, q = self._U, self._q
+
+        # cell integrals and mean densities on the current mesh
+        np.copyto(U[0], state.m)
+        np.multiply(state.m, state.u[..., 0], out=U[1])
+        np.multiply(state.m, state.u[..., 1], out=U[2])
+        np.multiply(state.m, state.E, out=U[3])
+        np.maximum(mesh.cell_area(), 1e-300, out=self._area)
+        np.divide(U, self._area, out=q)
+
+        sx, sy = swept_volumes(mesh.nodes, new, self._swept_x, self._swept_y)
+
+        # an interior x-face moving toward +i (sx > 0) takes its volume
+        # from the cell at i and gives it to the cell at i-1
+        s = sx[:, 1:-1]
+        np.copyto(self._flux_x, q[:, :, :-1])
+        np.copyto(self._flux_x, q[:, :, 1:], where=(s > 0.0))
+        self._flux_x *= s
+        U[:, :, :-1] += self._flux_x
+        U[:, :, 1:] -= self._flux_x
+
+        s = sy[1:-1]
+        np.copyto(self._flux_y, q[:, :-1])
+        np.copyto(self._flux_y, q[:, 1:], where=(s > 0.0))
+        self._flux_y *= s
+        U[:, :-1] += self._flux_y
+        U[:, 1:] -= self._flux_y
+
+        np.copyto(mesh.nodes, new)
+        mesh.mark_nodes_changed()
+
+        np.copyto(state.m, U[0])
+        state.update_density_from_mass()
+        state.set_cons(np.moveaxis(U[1:3], 0, -1), U[3])
@@ -1,7 +1,9 @@
-
 from __future__ import annotations
 import numpy as np
 
+from .boundary import PERIODIC, WALL
+from .workspace import HLLCScratch, LagrangianWorkspace
+
 def hllc_1d(gamma, rL,uL,pL, rR,uR,pR):
     aL = np.sqrt(gamma*np.maximum(pL,0.0)/np.maximum(rL,1e-30))
     aR = np.sqrt(gamma*np.maximum(pR,0.0)/np.maximum(rR,1e-30))
@@ -17,54 +19,191 @@ def hllc_1d(gamma, rL,uL,pL, rR,uR,pR):
         Sstar = (pR - pL + rL*uL*(SL-uL) - rR*uR*(SR-uR)) / denom
     return Sstar, pStar
 
-def face_states_and_star(mesh, gamma, prim, grad=None):
-    """Compute star normal velocity and star pressure on each face."""
-    rho, u, v, p = prim
-    ny, nx = rho.shape
-    u_vec_w = np.zeros((ny, nx, 2))
-    u_vec_e = np.zeros((ny, nx, 2))
-    u_vec_s = np.zeros((ny, nx, 2))
-    u_vec_n = np.zeros((ny, nx, 2))
-    pstar_w = np.zeros((ny, nx))
-    pstar_e = np.zeros((ny, nx))
-    pstar_s = np.zeros((ny, nx))
-    pstar_n = np.zeros((ny, nx))
-
-    for j in range(ny):
-        for i in range(nx):
-            # WEST
-            if i > 0:
-                rL,uL,vL,pL = rho[j,i-1], u[j,i-1], v[j,i-1], p[j,i-1]
-                rR,uR,vR,pR = rho[j,i],   u[j,i],   v[j,i],   p[j,i]
-                Sstar, pstar = hllc_1d(gamma, rL,uL,pL, rR,uR,pR)
-                u_vec_w[j,i] = np.array([Sstar, 0.0]); pstar_w[j,i] = pstar
-            else:
-                u_vec_w[j,i] = np.array([u[j,i], 0.0]); pstar_w[j,i] = p[j,i]
-            # EAST
-            if i < nx-1:
-                rL,uL,vL,pL = rho[j,i],   u[j,i],   v[j,i],   p[j,i]
-                rR,uR,vR,pR = rho[j,i+1], u[j,i+1], v[j,i+1], p[j,i+1]
-                Sstar, pstar = hllc_1d(gamma, rL,uL,pL, rR,uR,pR)
-                u_vec_e[j,i] = np.array([Sstar, 0.0]); pstar_e[j,i] = pstar
-            else:
-                u_vec_e[j,i] = np.array([u[j,i], 0.0]); pstar_e[j,i] = p[j,i]
-            # SOUTH (normal along y)
-            if j > 0:
-                rL,uL,vL,pL = rho[j-1,i], v[j-1,i], u[j-1,i], p[j-1,i]
-                rR,uR,vR,pR = rho[j,i],   v[j,i],   u[j,i],   p[j,i]
-                Sstar, pstar = hllc_1d(gamma, rL,uL,pL, rR,uR,pR)
-                u_vec_s[j,i] = np.array([0.0, Sstar]); pstar_s[j,i] = pstar
-            else:
-                u_vec_s[j,i] = np.array([0.0, v[j,i]]); pstar_s[j,i] = p[j,i]
-            # NORTH
-            if j < ny-1:
-                rL,uL,vL,pL = rho[j,i],   v[j,i],   u[j,i],   p[j,i]
-                rR,uR,vR,pR = rho[j+1,i], v[j+1,i], u[j+1,i], p[j+1,i]
-                Sstar, pstar = hllc_1d(gamma, rL,uL,pL, rR,uR,pR)
-                u_vec_n[j,i] = np.array([0.0, Sstar]); pstar_n[j,i] = pstar
-            else:
-                u_vec_n[j,i] = np.array([0.0, v[j,i]]); pstar_n[j,i] = p[j,i]
+
+def hllc_star(gamma, rL, uL, pL, rR, uR, pR, out=None, scratch=None):
+    """Array version of `hllc_1d`: same operations, applied elementwise
+    to whole arrays of left/right face states.
+
+    If `out=(Sstar, pStar)` and an `HLLCScratch` are given, the result is
+    written into `out` without allocating any face-sized temporaries.
+    """
+    if scratch is None:
+        scratch = HLLCScratch(np.shape(rL))
+    if out is None:
+        out = (np.empty(np.shape(rL)), np.empty(np.shape(rL)))
+    Sstar, pStar = out
+    aL, aR, SL, SR = scratch.aL, scratch.aR, scratch.SL, scratch.SR
+    t1, t2, degenerate = scratch.t1, scratch.t2, scratch.mask
+
+    # sound speeds
+    for a, r, pp in ((aL, rL, pL), (aR, rR, pR)):
+        np.maximum(pp, 0.0, out=a)
+        np.multiply(a, gamma, out=a)
+        np.maximum(r, 1e-30, out=t1)
+        np.divide(a, t1, out=a)
+        np.sqrt(a, out=a)
+
+    # wave speed estimates
+    np.subtract(uL, aL, out=SL)
+    np.subtract(uR, aR, out=t1)
+    np.minimum(SL, t1, out=SL)
+    np.add(uL, aL, out=SR)
+    np.add(uR, aR, out=t1)
+    np.maximum(SR, t1, out=SR)
+
+    # PVRS estimate for p*
+    np.subtract(uR, uL, out=t1)
+    np.multiply(t1, 0.5, out=t1)
+    np.multiply(t1, 0.5, out=t1)
+    np.add(rL, rR, out=t2)
+    np.multiply(t1, t2, out=t1)
+    np.multiply(t1, 0.5, out=t1)
+    np.add(aL, aR, out=t2)
+    np.multiply(t1, t2, out=t1)
+    np.add(pL, pR, out=pStar)
+    np.multiply(pStar, 0.5, out=pStar)
+    np.subtract(pStar, t1, out=pStar)
+    np.maximum(0.0, pStar, out=pStar)
+
+    # contact speed; the sound speeds are no longer needed, so
+    # aL holds the denominator
+    np.subtract(SL, uL, out=aL)
+    np.multiply(rL, aL, out=aL)
+    np.subtract(SR, uR, out=aR)
+    np.multiply(rR, aR, out=aR)
+    np.subtract(aL, aR, out=aL)
+
+    np.subtract(pR, pL, out=Sstar)
+    np.multiply(rL, uL, out=t1)
+    np.subtract(SL, uL, out=t2)
+    np.multiply(t1, t2, out=t1)
+    np.add(Sstar, t1, out=Sstar)
+    np.multiply(rR, uR, out=t1)
+    np.subtract(SR, uR, out=t2)
+    np.multiply(t1, t2, out=t1)
+    np.subtract(Sstar, t1, out=Sstar)
+
+    np.abs(aL, out=t1)
+    np.less(t1, 1e-30, out=degenerate)
+    np.copyto(aL, 1.0, where=degenerate)
+    np.divide(Sstar, aL, out=Sstar)
+    np.add(uL, uR, out=t1)
+    np.multiply(t1, 0.5, out=t1)
+    np.copyto(Sstar, t1, where=degenerate)
+    return Sstar, pStar
+
+
+def boundary_star(gamma, kind, w, inward, cell, other, out, scratch, mirror):
+    """Array version of `kernels.boundary_star` for the boundary faces
+    of one side, written into `out=(ustar, pstar)`.  `cell` and `other`
+    are the (rho, un, p) of the cells next to the faces and across a
+    periodic boundary; `mirror` is a face-sized scratch array."""
+    rho, un, p = cell
+    ustar, pstar = out
+    if kind == WALL:
+        np.subtract(2.0*w, un, out=mirror)
+        if inward:
+            hllc_star(gamma, rho, mirror, p, rho, un, p, out=out, scratch=scratch)
+        else:
+            hllc_star(gamma, rho, un, p, rho, mirror, p, out=out, scratch=scratch)
+        ustar[:] = w
+    elif kind == PERIODIC:
+        if inward:
+            hllc_star(gamma, *other, *cell, out=out, scratch=scratch)
+        else:
+            hllc_star(gamma, *cell, *other, out=out, scratch=scratch)
+    else:
+        np.copyto(ustar, un)
+        np.copyto(pstar, p)
+
+
+def face_states_and_star(mesh, gamma, prim, states=None, work=None, bcs=None):
+    """Compute star normal velocity and star pressure on each face.
+
+    Every x-face (ny, nx+1) and y-face (ny+1, nx) is solved exactly once,
+    as a whole array, along the current face normal from
+    `mesh.face_geometry`.  The per-cell west/east/south/north entries are
+    views into those shared face arrays; boundary faces take the normal
+    velocity and pressure of the adjacent cell.  The face velocity is
+    u* times the face normal.
+
+    `states` maps each side "w", "e", "s", "n" to the (rho, u, v, p) a
+    cell presents on that side (see `reconstruction`); if None, every
+    side uses the cell values `prim`.
+
+    If a `boundary.BoundaryManager` is passed as `bcs`, the boundary
+    faces follow the conditions of its sides instead (`boundary_star`).
+
+    If a `LagrangianWorkspace` is passed as `work`, the face arrays are
+    its persistent buffers and nothing face- or cell-sized is allocated.
+    """
+    if states is None:
+        states = dict.fromkeys(("w", "e", "s", "n"), prim)
+    ny, nx = prim[0].shape
+    if work is None:
+        work = LagrangianWorkspace(ny, nx)
+    (normal_x, normal_y), _ = mesh.face_geometry()
+
+    # side velocity projected on the normal of that face
+    un_w, un_e, un_s, un_n, tmp = work.cell
+    for un, side, n in ((un_w, "w", normal_x[:, :-1]), (un_e, "e", normal_x[:, 1:]),
+                        (un_s, "s", normal_y[:-1, :]), (un_n, "n", normal_y[1:, :])):
+        _, u, v, _ = states[side]
+        np.multiply(u, n[..., 0], out=un)
+        np.multiply(v, n[..., 1], out=tmp)
+        np.add(un, tmp, out=un)
+    rho_w, _, _, p_w = states["w"]
+    rho_e, _, _, p_e = states["e"]
+    rho_s, _, _, p_s = states["s"]
+    rho_n, _, _, p_n = states["n"]
+
+    # x-faces: face i sits between cells i-1 and i
+    ustar_x, pstar_x = work.ustar_x, work.pstar_x
+    hllc_star(gamma,
+              rho_e[:, :-1], un_e[:, :-1], p_e[:, :-1],
+              rho_w[:, 1:],  un_w[:, 1:],  p_w[:, 1:],
+              out=(ustar_x[:, 1:-1], pstar_x[:, 1:-1]), scratch=work.hllc_x)
+    west = (rho_w[:, 0], un_w[:, 0], p_w[:, 0])
+    east = (rho_e[:, -1], un_e[:, -1], p_e[:, -1])
+    if bcs is None:
+        ustar_x[:, 0] = un_w[:, 0]
+        pstar_x[:, 0] = p_w[:, 0]
+        ustar_x[:, -1] = un_e[:, -1]
+        pstar_x[:, -1] = p_e[:, -1]
+    else:
+        for side, face, cell, other in ((0, 0, west, east), (1, -1, east, west)):
+            boundary_star(gamma, bcs.kinds[side], bcs.wall_speed[side], side == 0,
+                          cell, other, (ustar_x[:, face], pstar_x[:, face]),
+                          work.hllc_bx, work.mirror_x)
+
+    # y-faces: face j sits between cells j-1 and j
+    ustar_y, pstar_y = work.ustar_y, work.pstar_y
+    hllc_star(gamma,
+              rho_n[:-1, :], un_n[:-1, :], p_n[:-1, :],
+              rho_s[1:, :],  un_s[1:, :],  p_s[1:, :],
+              out=(ustar_y[1:-1, :], pstar_y[1:-1, :]), scratch=work.hllc_y)
+    south = (rho_s[0, :], un_s[0, :], p_s[0, :])
+    north = (rho_n[-1, :], un_n[-1, :], p_n[-1, :])
+    if bcs is None:
+        ustar_y[0, :] = un_s[0, :]
+        pstar_y[0, :] = p_s[0, :]
+        ustar_y[-1, :] = un_n[-1, :]
+        pstar_y[-1, :] = p_n[-1, :]
+    else:
+        for side, face, cell, other in ((2, 0, south, north), (3, -1, north, south)):
+            boundary_star(gamma, bcs.kinds[side], bcs.wall_speed[side], side == 2,
+                          cell, other, (ustar_y[face, :], pstar_y[face, :]),
+                          work.hllc_by, work.mirror_y)
+
+    u_vec_x, u_vec_y = work.u_vec_x, work.u_vec_y
+    np.multiply(ustar_x[..., None], normal_x, out=u_vec_x)
+    np.multiply(ustar_y[..., None], normal_y, out=u_vec_y)
+
     return {
-        "u_vec_w": u_vec_w, "u_vec_e": u_vec_e, "u_vec_s": u_vec_s, "u_vec_n": u_vec_n,
-        "pstar_w": pstar_w, "pstar_e": pstar_e, "pstar_s": pstar_s, "pstar_n": pstar_n,
+        "u_vec_w": u_vec_x[:, :-1], "u_vec_e": u_vec_x[:, 1:],
+        "u_vec_s": u_vec_y[:-1, :], "u_vec_n": u_vec_y[1:, :],
+        "pstar_w": pstar_x[:, :-1], "pstar_e": pstar_x[:, 1:],
+        "pstar_s": pstar_y[:-1, :], "pstar_n": pstar_y[1:, :],
+        "ustar_x": ustar_x, "pstar_x": pstar_x,
+        "ustar_y": ustar_y, "pstar_y": pstar_y,
     }
@@ -1,40 +1,83 @@
 
 from __future__ import annotations
+import h5py
+import matplotlib.pyplot as plt
+import numba
 import numpy as np
-from dataclasses import dataclass
 from typing import Callable, Optional, Tuple, Dict, Any
 
+import pyro.util.profile_pyro as profile
+from pyro.mesh.array_indexer import ArrayIndexer
+from pyro.mesh.patch import Cartesian2d
+from pyro.util import msg, plot_tools
+
 from .mesh import MovingQuadMesh
 from .state import LagrangianState, eos_pressure, cons_from_prim, prim_from_cons
 from .time_integration import SSPRK2Stepper
 from .forces import accumulate_pressure_forces_and_work
 from .riemann import face_states_and_star
-from .reconstruction import muscl_reconstruct
-from .viscosity import vn_r_viscosity, HourglassControl
+from .reconstruction import muscl_reconstruct, MUSCLHancock
+from .viscosity import edge_viscosity, add_viscous_speed, HourglassControl
 from .boundary import BoundaryManager
+from .remap import ALERemap
+from .workspace import LagrangianWorkspace
+from .diagnostics import TimestepDiagnostics, CFLDump
+from .output import H5Series
+from .kernels import lagrangian_stage
+from . import tiling
 
-# Minimal cc_data shim to look like Pyro's accessors
 class CCDataShim:
-    def __init__(self, state: LagrangianState):
+    """What Pyro's driver and tools see as `cc_data`.
+
+    `grid` is the initial (logical) grid, without ghost cells, and
+    `get_var` returns the state variables as (nx, ny) transposed views
+    on it, indexed (i, j) as in Pyro; `names` lists the conserved ones
+    that are written out and compared.  The solver applies its own
+    boundary conditions, so `fill_BC_all` has nothing to do.
+    """
+    names = ["density", "x-momentum", "y-momentum", "energy"]
+
+    def __init__(self, state: LagrangianState, grid):
         self._state = state
-        self.grid = state.mesh  # for .ilo etc parity on usage sites
+        self.grid = grid
         self.t = 0.0
+
     def get_var(self, name: str):
-        if name == "density":
-            return self._state.rho
-        if name == "x-momentum":
-            return self._state.rho * self._state.u[..., 0]
-        if name == "y-momentum":
-            return self._state.rho * self._state.u[..., 1]
-        if name == "energy":
-            return self._state.rho * self._state.E
-        if name == "pressure":
-            return eos_pressure(self._state.gamma, self._state.rho, self._state.p_eint())
-        raise KeyError(name)
-
-@dataclass
-class Timers:
-    pass
+        return ArrayIndexer(self._state.get_var(name).T, grid=self.grid)
+
+    def fill_BC_all(self):
+        pass
+
+
+class ParameterLog:
+    """Runtime parameters as read by the solver.
+
+    Wraps a `RuntimeParameters` (or anything with ``get_param(key)``, or
+    a dict), falls back to the given default for missing or unset keys,
+    and records every value handed out in `values`, so the parameters a
+    run depends on can be written to its output and used to restart it.
+    """
+    def __init__(self, source):
+        self.source = source
+        self.values = {}
+
+    def get_param(self, key, default=None):
+        if isinstance(self.source, dict):
+            value = self.source.get(key)
+        else:
+            try:
+                value = self.source.get_param(key)
+            except KeyError:
+                value = None
+        if value is None:
+            value = default
+        if value is not None:
+            self.values[key] = value
+        return value
+
+    def write_params(self, f):
+        if hasattr(self.source, "write_params"):
+            self.source.write_params(f)
 
 class Simulation:
     """Pyro2-compatible driver for a purely Lagrangian compressible solver.
@@ -51,8 +94,18 @@ class Simulation:
         self.problem_func = problem_func
         self.problem_finalize_func = problem_finalize_func
         self.problem_source_func = problem_source_func
+        self.tc = timers if timers is not None else profile.TimerCollection()
+        self.particles = None
+        self.cm = "viridis"
+        self.restarted = False
+
+        # io_pyro.read constructs the simulation without parameters and
+        # sets it up from the file in read_extras
+        if rp is not None:
+            self._setup(ParameterLog(rp))
+
+    def _setup(self, rp):
         self.rp = rp
-        self.timers = timers or Timers()
 
         # Runtime params
         self.gamma = float(self.rp.get_param("eos.gamma", 1.4))
@@ -63,112 +116,597 @@ class Simulation:
         ymin = float(self.rp.get_param("mesh.ymin", 0.0))
         ymax = float(self.rp.get_param("mesh.ymax", 1.0))
 
-        self.mesh = MovingQuadMesh(nx, ny, xmin, xmax, ymin, ymax)
+        node_velocity = self.rp.get_param("lagrangian.node_velocity", "lsq")
+        self.mesh = MovingQuadMesh(nx, ny, xmin, xmax, ymin, ymax,
+                                   node_velocity=node_velocity)
         self.state = LagrangianState(self.mesh, self.gamma)
-        self.cc_data = CCDataShim(self.state)
+        grid = Cartesian2d(nx, ny, ng=0, xmin=xmin, xmax=xmax, ymin=ymin, ymax=ymax)
+        self.cc_data = CCDataShim(self.state, grid)
 
-        # Controls
+        # Controls.  Without the driver's parameters the timestep is the
+        # CFL step throughout.
         self.cfl = float(self.rp.get_param("driver.cfl", 0.5))
+        self.cfl_target = self.cfl
         self.max_steps = int(self.rp.get_param("driver.max_steps", 10000))
         self.tmax = float(self.rp.get_param("driver.tmax", 1.0))
+        self.fix_dt = float(self.rp.get_param("driver.fix_dt", -1.0))
+        self.init_tstep_factor = float(self.rp.get_param("driver.init_tstep_factor", 1.0))
+        self.max_dt_change = float(self.rp.get_param("driver.max_dt_change", np.inf))
+        self.verbose = int(self.rp.get_param("driver.verbose", 0))
+
+        # Output cadence (see do_output)
+        self.do_io = int(self.rp.get_param("io.do_io", 0))
+        self.dt_out = float(self.rp.get_param("io.dt_out", 0.1))
+        self.n_out = int(self.rp.get_param("io.n_out", 10000))
+        self.n_num_out = 0
 
         # Stabilization toggles (off by default)
         self.visc_coeff = float(self.rp.get_param("lagrangian.visc_coeff", 0.0))
+        self.visc_linear = float(self.rp.get_param("lagrangian.visc_linear", 0.0))
         self.hg_coeff = float(self.rp.get_param("lagrangian.hg_coeff", 0.0))
         self.hg = HourglassControl(self.hg_coeff)
 
+        # Stage implementation: "numpy" (reference) or "numba" (fused kernel)
+        self.kernel = self.rp.get_param("lagrangian.kernel", "numpy")
+        if self.kernel not in ("numpy", "numba"):
+            raise ValueError(f"invalid lagrangian.kernel: {self.kernel}")
+
+        # Spatial order of the face states: 1 (cell values) or 2
+        # (MUSCL-Hancock, NumPy stage only)
+        self.order = int(self.rp.get_param("lagrangian.order", 1))
+        if self.order not in (1, 2):
+            raise ValueError(f"invalid lagrangian.order: {self.order}")
+        if self.order == 2 and self.kernel != "numpy":
+            raise ValueError("lagrangian.order = 2 requires lagrangian.kernel = numpy")
+        self.recon = MUSCLHancock(ny, nx) if self.order == 2 else None
+
+        # Multithreaded row-band tiling of the numba step (0 = serial)
+        ntiles = int(self.rp.get_param("lagrangian.ntiles", 0))
+        nthreads = int(self.rp.get_param("lagrangian.nthreads", 0))
+        self.tiles = None
+        if ntiles > 0:
+            if self.kernel != "numba":
+                raise ValueError("lagrangian.ntiles requires lagrangian.kernel = numba")
+            self.tiles = tiling.make_tiles(ny, ntiles)
+            self.mesh.tiles = self.tiles
+            self._tile_min = np.empty(ntiles)
+        if nthreads > 0:
+            numba.set_num_threads(nthreads)
+
+        # Timestep diagnostics: limiting cell and local/global dt
+        # histogram, and an optional per-step dump of the local dt field
+        self.dt_diag = None
+        if int(self.rp.get_param("lagrangian.dt_diagnostics", 1)):
+            self.dt_diag = TimestepDiagnostics(ny, nx)
+        self.cfl_dump = None
+        basename = self.rp.get_param("io.basename", "pyro_")
+        mode = "a" if self.restarted else "w"
+        if int(self.rp.get_param("lagrangian.cfl_dump", 0)):
+            self.cfl_dump = CFLDump(f"{basename}cfl.h5", mode)
+
+        # Node positions appended to one file at every output
+        self.mesh_history = None
+        if int(self.rp.get_param("lagrangian.mesh_history", 0)):
+            self.mesh_history = H5Series(f"{basename}mesh.h5", mode)
+
+        # Mesh-quality monitor: a step that leaves a cell with a scaled
+        # Jacobian <= min_jacobian (or an aspect ratio above max_aspect,
+        # if > 0) is retried from its start with the CFL number reduced
+        # by cfl_shrink, up to quality_retries times.  If it still fails,
+        # quality_abort = 1 keeps the last good state, writes it to a
+        # checkpoint and stops the run; otherwise the step is kept.  A
+        # retry that would take the CFL number below min_cfl aborts the
+        # run.  After every step accepted at the first try the CFL
+        # number grows by cfl_recovery, back up to driver.cfl.
+        self.quality_monitor = int(self.rp.get_param("lagrangian.quality_monitor", 1))
+        self.min_jacobian = float(self.rp.get_param("lagrangian.min_jacobian", 0.0))
+        self.max_aspect = float(self.rp.get_param("lagrangian.max_aspect", 0.0))
+        self.quality_retries = int(self.rp.get_param("lagrangian.quality_retries", 0))
+        self.cfl_shrink = float(self.rp.get_param("lagrangian.cfl_shrink", 0.5))
+        self.quality_abort = int(self.rp.get_param("lagrangian.quality_abort", 0))
+        self.min_cfl = float(self.rp.get_param("lagrangian.min_cfl", 1.e-3))
+        self.cfl_recovery = float(self.rp.get_param("lagrangian.cfl_recovery", 1.1))
+        if not 0.0 < self.cfl_shrink < 1.0:
+            raise ValueError(f"invalid lagrangian.cfl_shrink: {self.cfl_shrink}")
+        if self.cfl_recovery < 1.0:
+            raise ValueError(f"invalid lagrangian.cfl_recovery: {self.cfl_recovery}")
+        if self.quality_retries < 0:
+            raise ValueError(f"invalid lagrangian.quality_retries: {self.quality_retries}")
+        self.mesh_quality = None
+        self.rejected_steps = 0
+        self.aborted = False
+        self.basename = basename
+
         # Boundaries
         self.bcs = BoundaryManager(self.rp)
 
-        # Time integrator
+        # ALE: every ale_interval steps (0 = never) the interior nodes
+        # are smoothed and the state remapped onto the smoothed mesh
+        self.ale_interval = int(self.rp.get_param("lagrangian.ale_interval", 0))
+        if self.ale_interval < 0:
+            raise ValueError(f"invalid lagrangian.ale_interval: {self.ale_interval}")
+        self.ale = None
+        if self.ale_interval > 0:
+            self.ale = ALERemap(ny, nx, int(self.rp.get_param("lagrangian.ale_iterations", 10)),
+                                slide=self.bcs.slides())
+
+        # Time integrator and its persistent stage arrays
         self.stepper = SSPRK2Stepper()
+        self.work = LagrangianWorkspace(ny, nx)
 
         # bookkeeping
-        self.nstep = 0
+        self.n = 0
         self.t = 0.0
+        self.dt = -1.e33
+        self.dt_old = np.inf
 
     # ---- API hooks expected by pyro_sim.py ----
     def initialize(self):
         # Delegate to problem init to fill density/momentum/energy
-        self.problem_func(self.state.as_pyro_cc_like(), self.rp)
+        cc = self.state.as_pyro_cc_like()
+        self.problem_func(cc, self.rp)
+        cc.commit()
         # Initialize per-cell mass from density and area
         self.state.initialize_cell_mass_from_density()
 
     def preevolve(self):
         pass
 
+    def method_compute_timestep(self):
+        """The CFL step: self.dt = min over the cells of the local
+        timestep cfl * ell / a, which is kept in `work.dt_local` (and
+        recorded by the timestep diagnostics, if enabled).  With the
+        edge viscosity on, a is the viscous signal speed (see
+        `viscosity.viscous_speed`)."""
+        w = self.work
+        if self.tiles is not None:
+            st = self.state
+            (normal_x, normal_y), _ = self.mesh.face_geometry()
+            dt = tiling.timestep(self.tiles, self.gamma, self.cfl,
+                                 self.visc_linear, self.visc_coeff, st.rho, st.u, st.E,
+                                 self.mesh.inscribed_diameter(), normal_x, normal_y,
+                                 w.dt_local, self._tile_min)
+        else:
+            a, tmp = self.state.sound_speed(), w.dt_local
+            if self.visc_linear > 0.0 or self.visc_coeff > 0.0:
+                # the viscous signal speed, on a copy of the cached sound speed
+                np.copyto(w.cell[0], a)
+                a = w.cell[0]
+                (normal_x, normal_y), _ = self.mesh.face_geometry()
+                add_viscous_speed(self.gamma, self.visc_linear, self.visc_coeff,
+                                  self.state.u, normal_x, normal_y, a)
+            ell = self.mesh.inscribed_diameter()
+            with np.errstate(divide="ignore"):
+                np.divide(ell, a, out=tmp)
+            np.less_equal(a, 0.0, out=w.mask)
+            np.copyto(tmp, np.inf, where=w.mask)
+            np.multiply(tmp, self.cfl, out=tmp)
+            dt = float(np.min(tmp))
+
+        if self.dt_diag is not None:
+            self.dt_diag.record(w.dt_local)
+        if self.cfl_dump is not None:
+            cell = self.dt_diag.limiting_cell if self.dt_diag is not None else \
+                np.unravel_index(np.argmin(w.dt_local), w.dt_local.shape)
+            self.cfl_dump.write(self.t, dt, w.dt_local, cell)
+        self.dt = dt
+
     def compute_timestep(self) -> float:
-        # dt <= CFL * min(ell / a)
-        a = np.sqrt(self.gamma * np.maximum(self.state.p(), 0.0) / np.maximum(self.state.rho, 1e-30))
-        ell = self.mesh.inscribed_diameter()
-        dt_loc = np.where(a > 0.0, ell / a, np.inf)
-        dt = self.cfl * float(np.min(dt_loc))
-        return dt
+        """Set and return `self.dt`, the step `evolve` takes by default:
+        driver.fix_dt if > 0, else the CFL step, reduced by
+        driver.init_tstep_factor on the first step and to at most
+        driver.max_dt_change times the previous step after it; in
+        either case cut to end at driver.tmax."""
+        tm_dt = self.tc.timer("compute_timestep")
+        tm_dt.begin()
+
+        if self.fix_dt > 0.0:
+            self.dt = self.fix_dt
+        else:
+            self.method_compute_timestep()
+            if self.n == 0:
+                self.dt = self.init_tstep_factor*self.dt
+            else:
+                self.dt = min(self.max_dt_change*self.dt_old, self.dt)
+            self.dt_old = self.dt
+
+        if self.t + self.dt > self.tmax:
+            self.dt = self.tmax - self.t
+
+        tm_dt.end()
+        return self.dt
 
     # Backwards-compat alias used by some Pyro versions
     dtdrive = compute_timestep
 
-    def evolve(self, dt: float):
-        """One SSP-RK2 step of a purely Lagrangian update."""
-        def rhs():
-            # 1) Reconstruct primitives at faces at half-step (Hancock predictor)
-            prim = self.state.primitive_tuple()
-            grad = muscl_reconstruct(self.mesh, prim)
-            faces = face_states_and_star(self.mesh, self.gamma, prim, grad)
-
-            # Optional stabilization
-            if self.visc_coeff > 0.0:
-                vn_r_viscosity(self.mesh, faces, self.state, self.visc_coeff)
-            if self.hg.coeff > 0.0:
-                self.hg.apply(self.mesh, self.state)
-
-            # 2) Pressure forces & work using p* and face normal speed u*_n
-            mom_rhs, ener_rhs = accumulate_pressure_forces_and_work(self.mesh, faces)
-
-            return mom_rhs, ener_rhs, faces
-
-        # SSP-RK2 for conservative variables (momentum, energy) in Lagrangian form
-        mom0 = (self.state.rho[..., None] * self.state.u).copy()
-        Et0 = (self.state.rho * self.state.E).copy()
+    def _rhs(self, dt=0.0, t=None):
+        """Pressure forces and work (into the workspace) and the node
+        velocity (into the mesh) for the current state and mesh, with
+        the boundary conditions at time `t` (default `self.t`); `dt` is
+        the step the face states are time-centered for (second order
+        only)."""
+        w = self.work
+        mesh = self.mesh
+        bcs = self.bcs
+        bcs.set_time(self.t if t is None else t)
+
+        if self.kernel == "numba":
+            tm_stage = self.tc.timer("stage kernel")
+            tm_stage.begin()
+        lsq = mesh.node_recovery.method == "lsq"
+        if self.tiles is not None:
+            (normal_x, normal_y), (length_x, length_y) = mesh.face_geometry()
+            tiling.lagrangian_stage(self.tiles, self.gamma, self.visc_linear, self.visc_coeff,
+                                    self.state.rho, self.state.u, self.state.E, w.p,
+                                    normal_x, normal_y, length_x, length_y, mesh.w_node, lsq,
+                                    w.ustar_x, w.pstar_x, w.ustar_y, w.pstar_y,
+                                    w.mom_rhs, w.ener_rhs, mesh.node_velocity,
+                                    bcs.kinds, bcs.wall_speed)
+        elif self.kernel == "numba":
+            (normal_x, normal_y), (length_x, length_y) = mesh.face_geometry()
+            lagrangian_stage(self.gamma, self.visc_linear, self.visc_coeff,
+                             self.state.rho, self.state.u, self.state.pressure(),
+                             normal_x, normal_y, length_x, length_y, mesh.w_node, lsq,
+                             w.ustar_x, w.pstar_x, w.ustar_y, w.pstar_y,
+                             w.mom_rhs, w.ener_rhs, mesh.node_velocity,
+                             bcs.kinds, bcs.wall_speed)
+
+        if self.kernel == "numba":
+            tm_stage.end()
+            tm_node = self.tc.timer("node velocity")
+            tm_node.begin()
+            self.hg.apply(mesh)
+            bcs.apply_nodes(mesh.node_velocity)
+            tm_node.end()
+            return
+
+        # 1) Reconstruct primitives at faces at half-step (Hancock predictor)
+        tm_faces = self.tc.timer("face states")
+        tm_faces.begin()
+        prim = self.state.primitive_views()
+        if self.recon is not None:
+            states = self.recon.reconstruct(mesh, self.gamma, prim, dt)
+        else:
+            states = muscl_reconstruct(mesh, prim)
+        faces = face_states_and_star(mesh, self.gamma, prim, states, work=w, bcs=bcs)
+
+        # Optional edge viscosity, added to the face pressures in place
+        if self.visc_linear > 0.0 or self.visc_coeff > 0.0:
+            (normal_x, normal_y), _ = mesh.face_geometry()
+            edge_viscosity(self.gamma, self.visc_linear, self.visc_coeff,
+                           self.state.rho, self.state.u, self.state.pressure(),
+                           normal_x, normal_y, w.pstar_x, w.pstar_y)
+        tm_faces.end()
+
+        # 2) Pressure forces & work using p* and face normal speed u*_n
+        tm_forces = self.tc.timer("forces")
+        tm_forces.begin()
+        accumulate_pressure_forces_and_work(mesh, faces, work=w)
+        tm_forces.end()
+
+        # 3) Node velocities from the face velocities, without their
+        # hourglass modes
+        tm_node = self.tc.timer("node velocity")
+        tm_node.begin()
+        mesh.gather_node_velocity(faces)
+        self.hg.apply(mesh)
+        bcs.apply_nodes(mesh.node_velocity)
+        tm_node.end()
+
+    def evolve(self, dt: Optional[float] = None):
+        """One SSP-RK2 step of a purely Lagrangian update, by `dt` or by
+        the `self.dt` of the last `compute_timestep`.
+
+        The stages advance the cell momentum m*u, total energy m*E and
+        node positions; the pressure forces and work are exactly their
+        rates.  All stage arithmetic is done in place in `self.work`.
+
+        With the quality monitor on, `mesh_quality` holds the quality
+        of the new mesh, and a step it rejects is retried or the run
+        aborted as set up in `_setup`; `self.dt` and `self.dt_old` are
+        the step actually taken.
+        """
+        if dt is None:
+            dt = self.dt
+
+        tm_evolve = self.tc.timer("evolve")
+        tm_evolve.begin()
+
+        # a step is only judged if it starts from an accepted mesh
+        guarded = self.quality_monitor and (self.quality_retries > 0 or self.quality_abort) \
+            and (self.mesh_quality is None or self.mesh_quality_ok(self.mesh_quality))
+        if guarded:
+            self._save_step()
+
+        for attempt in range(self.quality_retries + 1):
+            if self.tiles is not None:
+                self._advance_tiled(dt)
+            else:
+                self._advance(dt)
+            if not self.quality_monitor:
+                break
+            tm_quality = self.tc.timer("mesh quality")
+            tm_quality.begin()
+            self.mesh_quality = self.mesh.quality()
+            tm_quality.end()
+            if not guarded or self.mesh_quality_ok(self.mesh_quality):
+                if attempt == 0:
+                    self.cfl = min(self.cfl*self.cfl_recovery, self.cfl_target)
+                break
+            floor = self.cfl*self.cfl_shrink < self.min_cfl
+            if attempt == self.quality_retries or floor:
+                if self.quality_abort or floor:
+                    self._restore_step()
+                    self._abort()
+                    tm_evolve.end()
+                    return
+                break
+            self._restore_step()
+            self.rejected_steps += 1
+            self.cfl *= self.cfl_shrink
+            dt *= self.cfl_shrink
+            msg.warning(f"step {self.n + 1} rejected ({self.mesh_quality}); "
+                        f"retrying with cfl = {self.cfl:.4g}")
+
+        # Bookkeeping; driver.max_dt_change limits the next step by the
+        # one taken, not by the rejected one
+        if attempt > 0:
+            self.dt_old = dt
+        self.dt = dt
+        self.t += dt
+        self.n += 1
+        self.cc_data.t = self.t
 
-        # Stage 1
-        mom_rhs, ener_rhs, faces = rhs()
-        mom1 = mom0 + dt * mom_rhs
-        Et1  = Et0  + dt * ener_rhs
-        self.state.set_cons(mom1, Et1)
+        if self.ale is not None and self.n % self.ale_interval == 0:
+            self.remap()
+
+        tm_evolve.end()
+
+    def remap(self):
+        """Smooth the mesh and remap the state onto it (see
+        `remap.ALERemap`); the mesh quality is that of the new mesh."""
+        tm_remap = self.tc.timer("remap")
+        tm_remap.begin()
+        self.ale.apply(self.mesh, self.state)
+        if self.quality_monitor:
+            self.mesh_quality = self.mesh.quality()
+        tm_remap.end()
+
+    def mesh_quality_ok(self, q):
+        """Whether the monitor accepts a step that left quality `q`."""
+        if q.n_inverted > 0 or q.min_jacobian <= self.min_jacobian:
+            return False
+        return self.max_aspect <= 0.0 or q.max_aspect <= self.max_aspect
+
+    def _save_step(self):
+        np.copyto(self.work.state_save, self.state.data)
+        np.copyto(self.work.nodes_save, self.mesh.nodes)
+
+    def _restore_step(self):
+        np.copyto(self.state.data, self.work.state_save)
+        self.state.mark_changed()
+        np.copyto(self.mesh.nodes, self.work.nodes_save)
+        self.mesh.mark_nodes_changed()
+
+    def _abort(self):
+        """Stop the run at the last good state and write it out (as a
+        checkpoint only; it is not an output of the mesh history)."""
+        self.aborted = True
+        filename = f"{self.basename}abort_{self.n:04d}"
+        self._write_plotfile(filename)
+        msg.warning(f"aborting at t = {self.t:.6g}: step {self.n + 1} still leaves "
+                    f"{self.mesh_quality} at cfl = {self.cfl:.4g}; "
+                    f"state written to {filename}.h5")
+
+    def finished(self):
+        return self.aborted or self.t >= self.tmax or self.n >= self.max_steps
+
+    def do_output(self):
+        """Is it time to output (every io.dt_out in time or io.n_out
+        steps, if io.do_io)?"""
+        is_time = self.t >= (self.n_num_out + 1)*self.dt_out or self.n % self.n_out == 0
+        if is_time and self.do_io == 1:
+            self.n_num_out += 1
+            return True
+        return False
+
+    def _advance_tiled(self, dt):
+        """The SSP-RK2 stages of `evolve` as multithreaded tile kernels."""
+        w, mesh, st, tiles = self.work, self.mesh, self.state, self.tiles
+        tiling.save_step_start(tiles, st.m, st.u, st.E, mesh.nodes, w.mom0, w.Et0, w.nodes0)
+        for stage in (1, 2):
+            # stage 1 is evaluated at the start of the step, stage 2 at
+            # its end
+            self._rhs(dt, self.t + (stage - 1)*dt)
+            tiling.rk_stage(tiles, stage, dt, st.m, w.mom0, w.Et0, w.mom1, w.Et1,
+                            w.mom_rhs, w.ener_rhs, st.u, st.E,
+                            mesh.nodes, w.nodes0, mesh.node_velocity)
+            mesh.mark_nodes_changed()
+            tiling.update_density(tiles, st.m, mesh.cell_area(), st.rho)
+            st.mark_changed()
+
+    def _advance(self, dt):
+        w = self.work
+        mesh = self.mesh
+
+        self.state.get_cons(w.mom0, w.Et0)
+        np.copyto(w.nodes0, mesh.nodes)
+
+        # Stage 1: U1 = U0 + dt L(U0, t), x1 = x0 + dt v(U0, t)
+        self._rhs(dt, self.t)
+        np.multiply(w.mom_rhs, dt, out=w.mom1)
+        np.add(w.mom0, w.mom1, out=w.mom1)
+        np.multiply(w.ener_rhs, dt, out=w.Et1)
+        np.add(w.Et0, w.Et1, out=w.Et1)
+        self.state.set_cons(w.mom1, w.Et1)
 
         # Move mesh using face velocities from stage-1 star states
-        self.mesh.move_nodes(faces, dt)
+        mesh.advance_nodes(dt)
 
         # Update density from constant mass / new volumes
         self.state.update_density_from_mass()
 
-        # Stage 2
-        mom_rhs, ener_rhs, faces = rhs()
-        mom2 = 0.5 * (mom0 + (mom1 + dt * mom_rhs))
-        Et2  = 0.5 * (Et0  + (Et1  + dt * ener_rhs))
+        # Stage 2: U2 = (U0 + U1 + dt L(U1, t + dt)) / 2, and likewise
+        # for the nodes
+        self._rhs(dt, self.t + dt)
+        mom2, Et2 = w.mom1, w.Et1
+        np.multiply(w.mom_rhs, dt, out=w.mom_rhs)
+        np.add(mom2, w.mom_rhs, out=mom2)
+        np.add(mom2, w.mom0, out=mom2)
+        np.multiply(mom2, 0.5, out=mom2)
+        np.multiply(w.ener_rhs, dt, out=w.ener_rhs)
+        np.add(Et2, w.ener_rhs, out=Et2)
+        np.add(Et2, w.Et0, out=Et2)
+        np.multiply(Et2, 0.5, out=Et2)
         self.state.set_cons(mom2, Et2)
 
-        # Move mesh again for second stage (Heun)
-        self.mesh.move_nodes(faces, dt)
+        mesh.advance_nodes(dt)
+        np.add(mesh.nodes, w.nodes0, out=mesh.nodes)
+        np.multiply(mesh.nodes, 0.5, out=mesh.nodes)
+        mesh.mark_nodes_changed()
 
         # Update density from mass
         self.state.update_density_from_mass()
 
-        # Apply boundary conditions (moving walls, outflow, periodic)
-        self.bcs.apply(self.mesh, self.state, self.t + dt)
-
-        # Bookkeeping
-        self.t += dt
+    def write(self, filename):
+        """Output the state in Pyro's HDF5 layout (readable by
+        `pyro.util.io_pyro.read`), with the Lagrangian data needed for a
+        restart in `write_extras`, and append the nodes to the mesh
+        history."""
+        self._write_plotfile(filename)
+
+        if self.mesh_history is not None:
+            self.mesh_history.append(t=self.t, nstep=self.n, nodes=self.mesh.nodes)
+            self.mesh_history.flush()
+
+    def _write_plotfile(self, filename):
+        """The plotfile of `write`, without the mesh history."""
+        if not filename.endswith(".h5"):
+            filename += ".h5"
+
+        with h5py.File(filename, "w") as f:
+            f.attrs["solver"] = self.solver_name
+            f.attrs["problem"] = self.problem_name
+            f.attrs["time"] = self.t
+            f.attrs["nsteps"] = self.n
+
+            f.create_group("aux")
+
+            mesh = self.mesh
+            grid = f.create_group("grid")
+            grid.attrs["nx"] = mesh.nx
+            grid.attrs["ny"] = mesh.ny
+            grid.attrs["ng"] = self.cc_data.grid.ng
+            grid.attrs["xmin"] = self.rp.get_param("mesh.xmin", 0.0)
+            grid.attrs["xmax"] = self.rp.get_param("mesh.xmax", 1.0)
+            grid.attrs["ymin"] = self.rp.get_param("mesh.ymin", 0.0)
+            grid.attrs["ymax"] = self.rp.get_param("mesh.ymax", 1.0)
+
+            # conserved variables on the initial (logical) grid, indexed
+            # (i, j) as in Pyro
+            gs = f.create_group("state")
+            for name in ("density", "x-momentum", "y-momentum", "energy"):
+                grp = gs.create_group(name)
+                grp.create_dataset("data", data=self.get_var(name).T,
+                                   chunks=True, compression="gzip")
+                for bc in ("xlb", "xrb", "ylb", "yrb"):
+                    grp.attrs[bc] = "outflow"
+
+            self.rp.write_params(f)
+            self.write_extras(f)
+
+    def write_extras(self, f):
+        """The node coordinates and the cell mass, velocity, specific
+        total energy and density, exactly, and the parameters the run
+        was set up with."""
+        st = self.state
+        grp = f.create_group("lagrangian")
+        grp.attrs["dt_old"] = self.dt_old
+        grp.attrs["cfl"] = self.cfl
+        grp.attrs["rejected_steps"] = self.rejected_steps
+        for name, data in (("nodes", self.mesh.nodes), ("mass", st.m),
+                           ("velocity", st.u), ("energy", st.E), ("density", st.rho)):
+            grp.create_dataset(name, data=data, chunks=True, compression="gzip")
+        params = grp.create_group("parameters")
+        for key, value in self.rp.values.items():
+            params.attrs[key] = value
+
+    def read_extras(self, f):
+        """Set up the simulation from a file written by `write`; it then
+        continues exactly as the run that wrote it would have."""
+        grp = f["lagrangian"]
+        self.restarted = True
+        self._setup(ParameterLog(dict(grp["parameters"].attrs)))
+
+        st = self.state
+        np.copyto(self.mesh.nodes, grp["nodes"][()])
+        self.mesh.mark_nodes_changed()
+        np.copyto(st.m, grp["mass"][()])
+        np.copyto(st.u, grp["velocity"][()])
+        np.copyto(st.E, grp["energy"][()])
+        np.copyto(st.rho, grp["density"][()])
+        st.mark_changed()
+
+        self.t = float(f.attrs["time"])
+        self.n = int(f.attrs["nsteps"])
+        self.dt_old = float(grp.attrs["dt_old"])
+        self.cfl = float(grp.attrs.get("cfl", self.cfl))
+        self.rejected_steps = int(grp.attrs.get("rejected_steps", 0))
         self.cc_data.t = self.t
 
+    def dovis(self):
+        """Plot the density, speed, pressure and specific internal
+        energy on the moving mesh."""
+        plt.clf()
+        plt.rc("font", size=10)
+
+        st = self.state
+        rho = st.rho
+        magvel = np.hypot(st.u[..., 0], st.u[..., 1])
+        p = st.pressure()
+        e = p/((self.gamma - 1.0)*np.maximum(rho, 1e-30))
+
+        fields = [rho, magvel, p, e]
+        field_names = [r"$\rho$", r"U", "p", "e"]
+
+        x, y = self.mesh.nodes[..., 0], self.mesh.nodes[..., 1]
+        _, axes, cbar_title = plot_tools.setup_axes(self.cc_data.grid, len(fields))
+
+        for n, ax in enumerate(axes):
+            img = ax.pcolormesh(x, y, fields[n], shading="flat", cmap=self.cm)
+
+            ax.set_xlabel("x")
+            ax.set_ylabel("y")
+
+            # needed for PDF rendering
+            cb = axes.cbar_axes[n].colorbar(img)
+            cb.solids.set_rasterized(True)
+            cb.solids.set_edgecolor("face")
+
+            if cbar_title:
+                cb.ax.set_title(field_names[n])
+            else:
+                ax.set_title(field_names[n])
+
+        plt.figtext(0.05, 0.0125, f"t = {self.t:10.5g}")
+
+        plt.pause(0.001)
+        plt.draw()
+
     def finalize(self):
+        if self.cfl_dump is not None:
+            self.cfl_dump.close()
+        if self.mesh_history is not None:
+            self.mesh_history.close()
         if self.problem_finalize_func:
             self.problem_finalize_func()
 
     # Utilities used by pyro_sim driver
     def get_var(self, name: str):
-        return self.cc_data.get_var(name)
+        """A state variable on the (ny, nx) cells (see
+        `LagrangianState.get_var`); `cc_data.get_var` has it in Pyro's
+        (i, j) layout."""
+        return self.state.get_var(name)
 
     # Simple drive loop (not used by pyro_sim, but handy)
     def timestep(self):
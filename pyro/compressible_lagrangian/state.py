@@ -22,45 +22,184 @@ def eos_pressure(gamma, rho, eint):
 
 @dataclass
 class LagrangianState:
+    """Cell state of the Lagrangian solver in one contiguous buffer.
+
+    `data` holds, one field after the other, the density `rho` (ny, nx),
+    velocity `u` (ny, nx, 2), specific total energy `E` (ny, nx) and the
+    constant cell mass `m` (ny, nx); the named attributes are views of
+    it, so the whole state is saved, restored or sent as one array.
+
+    The pressure and sound speed are computed on demand and cached until
+    the state changes.  Methods that update the state invalidate them;
+    code writing into the views directly must call `mark_changed`.
+    """
     mesh: any
     gamma: float
 
     def __post_init__(self):
         ny, nx = self.mesh.ny, self.mesh.nx
-        self.rho = np.ones((ny, nx))
-        self.u = np.zeros((ny, nx, 2))
-        self.E = np.ones((ny, nx))  # specific total energy
-        self.m = np.ones((ny, nx))  # cell mass (constant)
+        n = ny*nx
+        self.data = np.empty(5*n)
+        self.rho = self.data[:n].reshape(ny, nx)
+        self.u = self.data[n:3*n].reshape(ny, nx, 2)
+        self.E = self.data[3*n:4*n].reshape(ny, nx)  # specific total energy
+        self.m = self.data[4*n:].reshape(ny, nx)  # cell mass (constant)
+        self.rho[:] = 1.0
+        self.u[:] = 0.0
+        self.E[:] = 1.0
+        self.m[:] = 1.0
+        self._tmp = np.empty((ny, nx))
+
+        # derived quantities, valid while their version is the state's
+        self.version = 0
+        self._derived = {name: np.empty((ny, nx)) for name in
+                         ("pressure", "soundspeed", "x-momentum", "y-momentum", "energy")}
+        for v in self._derived.values():
+            v.flags.writeable = False
+        self._derived_version = dict.fromkeys(self._derived, -1)
+
+    def mark_changed(self):
+        """Invalidate the cached derived quantities after the state has
+        been written to."""
+        self.version += 1
+
+    def _cached(self, name):
+        """The cached array of a derived quantity and whether it is
+        current; a stale one is made writeable for refilling."""
+        arr = self._derived[name]
+        if self._derived_version[name] == self.version:
+            return arr, True
+        self._derived_version[name] = self.version
+        arr.flags.writeable = True
+        return arr, False
+
+    def pressure(self):
+        """The cell pressure (read only, cached)."""
+        p, current = self._cached("pressure")
+        if not current:
+            self.p(out=p)
+            p.flags.writeable = False
+        return p
+
+    def sound_speed(self):
+        """The cell sound speed sqrt(gamma p / rho) (read only, cached)."""
+        a, current = self._cached("soundspeed")
+        if not current:
+            np.maximum(self.pressure(), 0.0, out=a)
+            np.multiply(a, self.gamma, out=a)
+            np.maximum(self.rho, 1e-30, out=self._tmp)
+            np.divide(a, self._tmp, out=a)
+            np.sqrt(a, out=a)
+            a.flags.writeable = False
+        return a
+
+    def get_var(self, name):
+        """A state variable by its Pyro name.  "density" is a view of
+        the state; the conserved "x-momentum", "y-momentum" and
+        "energy" densities and the "pressure" and "soundspeed" are
+        cached read-only arrays, so writing to them fails instead of
+        being lost."""
+        if name == "density":
+            return self.rho
+        if name == "pressure":
+            return self.pressure()
+        if name == "soundspeed":
+            return self.sound_speed()
+        if name not in self._derived:
+            raise KeyError(name)
+        arr, current = self._cached(name)
+        if not current:
+            if name == "energy":
+                np.multiply(self.rho, self.E, out=arr)
+            else:
+                np.multiply(self.rho, self.u[..., 0 if name == "x-momentum" else 1], out=arr)
+            arr.flags.writeable = False
+        return arr
+
     def as_pyro_cc_like(self):
-        # Provide just enough for a Pyro problem init function
-        class CC:
-            def __init__(self,_self):
-                self._s=_self
-            def get_var(self, name):
-                if name=="density": return self._s.rho
-                if name=="x-momentum": return self._s.rho*self._s.u[...,0]
-                if name=="y-momentum": return self._s.rho*self._s.u[...,1]
-                if name=="energy": return self._s.rho*self._s.E
-                raise KeyError(name)
-        return CC(self)
+        """Writable conserved variables for a Pyro problem init function;
+        `PyroInitData.commit` converts them into the state."""
+        return PyroInitData(self)
+
+    def set_from_conserved(self, mom_x, mom_y, Et):
+        """Velocity and specific energy from the conserved densities
+        rho*u, rho*v and rho*E for the current density."""
+        np.maximum(self.rho, 1e-30, out=self._tmp)
+        np.divide(mom_x, self._tmp, out=self.u[..., 0])
+        np.divide(mom_y, self._tmp, out=self.u[..., 1])
+        np.divide(Et, self._tmp, out=self.E)
+        self.mark_changed()
+
     def initialize_cell_mass_from_density(self):
         A = self.mesh.cell_area()
-        self.m = self.rho * A
+        np.multiply(self.rho, A, out=self.m)
+
     def update_density_from_mass(self):
         A = self.mesh.cell_area()
-        self.rho = self.m / np.maximum(A, 1e-30)
-    def p(self):
-        u = self.u[...,0]; v=self.u[...,1]
-        ke = 0.5*(u*u+v*v)
-        return (self.gamma-1.0)*self.rho*np.maximum(self.E - ke, 0.0)
-    def p_eint(self):
-        u = self.u[...,0]; v=self.u[...,1]
-        ke = 0.5*(u*u+v*v)
-        return np.maximum(self.E - ke, 0.0)
+        np.maximum(A, 1e-30, out=self._tmp)
+        np.divide(self.m, self._tmp, out=self.rho)
+        self.mark_changed()
+
+    def p(self, out=None):
+        out = self.p_eint(out)
+        np.multiply(self.rho, self.gamma-1.0, out=self._tmp)
+        return np.multiply(self._tmp, out, out=out)
+
+    def p_eint(self, out=None):
+        if out is None:
+            out = np.empty_like(self.rho)
+        u = self.u[..., 0]
+        v = self.u[..., 1]
+        np.multiply(u, u, out=out)
+        np.multiply(v, v, out=self._tmp)
+        np.add(out, self._tmp, out=out)
+        np.multiply(out, 0.5, out=out)
+        np.subtract(self.E, out, out=out)
+        return np.maximum(out, 0.0, out=out)
+
     def primitive_tuple(self):
-        u = self.u[...,0]; v=self.u[...,1]
+        u = self.u[..., 0]
+        v = self.u[..., 1]
         return (self.rho.copy(), u.copy(), v.copy(), self.p().copy())
+
+    def primitive_views(self):
+        """(rho, u, v, p) without copies: views of the state arrays and
+        the cached pressure."""
+        return (self.rho, self.u[..., 0], self.u[..., 1], self.pressure())
+
+    def get_cons(self, mom_out, Et_out):
+        """Cell momentum m*u and total energy m*E (the quantities whose
+        rates are the pressure forces and work)."""
+        np.multiply(self.m[..., None], self.u, out=mom_out)
+        np.multiply(self.m, self.E, out=Et_out)
+        return mom_out, Et_out
+
     def set_cons(self, mom, Et):
-        self.u[...,0] = mom[...,0]/np.maximum(self.rho,1e-30)
-        self.u[...,1] = mom[...,1]/np.maximum(self.rho,1e-30)
-        self.E = Et / np.maximum(self.rho,1e-30)
+        np.maximum(self.m, 1e-30, out=self._tmp)
+        np.divide(mom[..., 0], self._tmp, out=self.u[..., 0])
+        np.divide(mom[..., 1], self._tmp, out=self.u[..., 1])
+        np.divide(Et, self._tmp, out=self.E)
+        self.mark_changed()
+
+
+class PyroInitData:
+    """What a Pyro problem init function sees as its `cc_data`.
+
+    `get_var` hands out the density (a view of the state) and writable
+    "x-momentum", "y-momentum" and "energy" densities of the current
+    state; `commit` sets the velocity and specific energy from them.
+    """
+    def __init__(self, state):
+        self._s = state
+        self.grid = state.mesh
+        self._vars = {"density": state.rho,
+                      "x-momentum": state.rho*state.u[..., 0],
+                      "y-momentum": state.rho*state.u[..., 1],
+                      "energy": state.rho*state.E}
+
+    def get_var(self, name):
+        return self._vars[name]
+
+    def commit(self):
+        v = self._vars
+        self._s.set_from_conserved(v["x-momentum"], v["y-momentum"], v["energy"])
@@ -0,0 +1,123 @@
+import numpy as np
+import pytest
+from numpy.testing import assert_allclose
+
+from pyro.compressible_lagrangian.boundary import OUTFLOW, PERIODIC, WALL, BoundaryManager
+from pyro.compressible_lagrangian.problems import piston2d
+from pyro.compressible_lagrangian.simulation import Simulation
+from pyro.compressible_lagrangian.tests.util import RP
+
+
+def make_sim(kernel="numba", **params):
+    rp = RP({
+        "mesh.nx": 32, "mesh.ny": 4, "mesh.ymax": 0.125,
+        "eos.gamma": 1.4, "driver.cfl": 0.8,
+        "driver.init_tstep_factor": 0.01, "driver.max_dt_change": 2.0,
+        "lagrangian.kernel": kernel, "lagrangian.node_velocity": "lsq",
+        "lagrangian.visc_linear": 0.5, "lagrangian.visc_coeff": 1.0,
+        **{k.replace("__", "."): v for k, v in params.items()}})
+    sim = Simulation("compressible_lagrangian_pure", "piston", piston2d.init_data, rp)
+    sim.initialize()
+    return sim
+
+
+def run(sim, tmax):
+    while sim.t < tmax:
+        sim.evolve(min(sim.compute_timestep(), tmax - sim.t))
+    return sim
+
+
+def test_kinds():
+    bcs = BoundaryManager(RP({"mesh.xlboundary": "outflow", "mesh.ylboundary": "periodic",
+                              "mesh.yrboundary": "periodic"}))
+    assert list(bcs.kinds) == [OUTFLOW, WALL, PERIODIC, PERIODIC]
+    assert list(bcs.slides()) == [False, True, False, False]
+
+    with pytest.raises(ValueError):
+        BoundaryManager(RP({"mesh.xlboundary": "periodic"}))
+    with pytest.raises(ValueError):
+        BoundaryManager(RP({"mesh.xlboundary": "sticky"}))
+    with pytest.raises(ValueError):
+        BoundaryManager(RP({"piston.kind": "constant", "piston.side": "front"}))
+
+
+def test_table_piston(tmp_path):
+    profile = tmp_path / "piston.txt"
+    np.savetxt(profile, [[0.0, 0.0], [0.1, 1.0], [0.3, -1.0]])
+    bcs = BoundaryManager(RP({"piston.kind": "table", "piston.profile": str(profile),
+                              "piston.side": "top", "mesh.yrboundary": "outflow"}))
+    assert bcs.kinds[3] == WALL
+    bcs.set_time(0.05)
+    assert_allclose(bcs.wall_speed, [0.0, 0.0, 0.0, 0.5])
+    bcs.set_time(0.2)
+    assert_allclose(bcs.wall_speed[3], 0.0, atol=1.e-15)
+    bcs.set_time(1.0)
+    assert bcs.wall_speed[3] == -1.0
+
+
+@pytest.mark.parametrize("side", ["left", "right"])
+def test_piston_moves_its_side(side):
+    # the piston pushes into the gas from either side: its wall follows
+    # the piston exactly and the other wall stays put
+    sim = make_sim(**{"piston__kind": "constant", "piston__side": side,
+                      "piston__u": 0.5 if side == "left" else -0.5})
+    run(sim, 0.2)
+    x = sim.mesh.nodes[..., 0]
+    moving, fixed = (x[:, 0], x[:, -1]) if side == "left" else (x[:, -1], x[:, 0])
+    assert_allclose(moving, (0.1 if side == "left" else 0.9), rtol=1.e-12)
+    assert_allclose(fixed, (1.0 if side == "left" else 0.0), atol=1.e-14)
+
+    # the shocked gas is at rest relative to the piston
+    u = sim.state.u[..., 0]
+    near = u[:, :4] if side == "left" else u[:, -4:]
+    assert_allclose(near, 0.5 if side == "left" else -0.5, rtol=0.05)
+
+    # behind the shock the gas has the density of the exact solution,
+    # and the gas the shock has not reached is at rest
+    S = 0.3 + np.sqrt(0.3**2 + 1.4)
+    rho = sim.state.rho if side == "left" else sim.state.rho[:, ::-1]
+    assert_allclose(rho[:, :6], S/(S - 0.5), rtol=0.04)
+    assert_allclose(rho[:, 28:], 1.0, rtol=1.e-6)
+
+
+@pytest.mark.parametrize("kernel", ["numpy", "numba"])
+def test_wall_faces(kernel):
+    sim = make_sim(kernel, **{"ic__u": 0.3})
+    sim._rhs()
+    w = sim.work
+    assert np.all(w.ustar_x[:, 0] == 0.0) and np.all(w.ustar_x[:, -1] == 0.0)
+    # the acoustic pressure of the gas running into the right wall, and
+    # pulling away from the left one
+    a = np.sqrt(1.4)
+    assert_allclose(w.pstar_x[:, -1], 1.0 + a*0.3)
+    assert_allclose(w.pstar_x[:, 0], 1.0 - a*0.3)
+    assert np.all(sim.mesh.node_velocity[:, 0, 0] == 0.0)
+
+
+def test_periodic_channel():
+    # a uniform gas streaming across periodic y sides stays uniform, and
+    # the mesh translates with it
+    sim = make_sim(**{"ic__v": 0.3, "mesh__ylboundary": "periodic",
+                      "mesh__yrboundary": "periodic"})
+    y0 = sim.mesh.nodes[..., 1].copy()
+    run(sim, 0.1)
+    assert_allclose(sim.state.rho, 1.0, rtol=1.e-12)
+    assert_allclose(sim.state.u[..., 1], 0.3, rtol=1.e-12)
+    assert_allclose(sim.mesh.nodes[..., 1] - y0, 0.03, rtol=1.e-10)
+
+
+@pytest.mark.parametrize("kinds", [("outflow", "reflect", "periodic", "periodic"),
+                                   ("reflect", "outflow", "reflect", "outflow"),
+                                   ("periodic", "periodic", "outflow", "reflect")])
+def test_numba_matches_numpy(kinds):
+    params = {"piston__kind": "sine", "piston__u": 0.2, "piston__a": 0.1, "piston__f": 3.0,
+              "piston__side": "left" if kinds[0] != "periodic" else "top",
+              "ic__u": 0.1, "ic__v": -0.2}
+    for name, kind in zip(("xl", "xr", "yl", "yr"), kinds):
+        params[f"mesh__{name}boundary"] = kind
+    sims = [make_sim(kernel, **params) for kernel in ("numpy", "numba")]
+    for sim in sims:
+        run(sim, 0.02)
+    ref, fused = sims
+    assert_allclose(fused.mesh.nodes, ref.mesh.nodes, rtol=1.e-12, atol=1.e-14)
+    assert_allclose(fused.state.data, ref.state.data, rtol=1.e-11, atol=1.e-13)
@@ -1,12 +1,9 @@
 
 import numpy as np
-from ..simulation import Simulation
+from pyro.compressible_lagrangian.problems import sod2d_channel
+from pyro.compressible_lagrangian.simulation import Simulation
+from pyro.compressible_lagrangian.tests.util import RP
 
-class RP:
-    def __init__(self, d):
-        self.d=d
-    def get_param(self,k,default=None):
-        return self.d.get(k,default)
 
 def test_construction():
     rp = RP({
@@ -18,3 +15,26 @@ def test_construction():
     sim = Simulation("compressible_lagrangian_pure", "dummy", dummy, rp)
     sim.initialize()
     assert sim.mesh.nx == 16 and sim.mesh.ny == 8
+
+
+def test_mass_and_total_energy_conserved():
+    rp = RP({
+        "mesh.nx": 32, "mesh.ny": 4,
+        "mesh.xmax": 1.0, "mesh.ymax": 0.125,
+        "eos.gamma": 1.4, "driver.cfl": 0.3,
+    })
+    sim = Simulation("compressible_lagrangian_pure", "sod", sod2d_channel.init_data, rp)
+    sim.initialize()
+    s = sim.state
+    mass0 = s.m.sum()
+    E0 = (s.m*s.E).sum()
+
+    # waves do not reach the (closed) ends in this time
+    for _ in range(10):
+        sim.evolve(sim.compute_timestep())
+
+    assert sim.t > 0.0
+    assert s.m.sum() == mass0
+    assert abs((s.m*s.E).sum() - E0) < 1.e-12*E0
+    assert abs((s.m*s.u[..., 1]).sum()) < 1.e-12
+    assert abs((s.rho*sim.mesh.cell_area()).sum() - mass0) < 1.e-12*mass0
@@ -0,0 +1,69 @@
+
+import h5py
+import numpy as np
+from numpy.testing import assert_array_equal
+
+from pyro.compressible_lagrangian.diagnostics import TimestepDiagnostics
+from pyro.compressible_lagrangian.problems import sod2d_channel
+from pyro.compressible_lagrangian.simulation import Simulation
+from pyro.compressible_lagrangian.tests.util import RP
+
+
+def make_sim(**params):
+    d = {"mesh.nx": 12, "mesh.ny": 8, "eos.gamma": 1.4, "driver.cfl": 0.4}
+    d.update(params)
+    sim = Simulation("compressible_lagrangian_pure", "sod", sod2d_channel.init_data, RP(d))
+    sim.initialize()
+    return sim
+
+
+def test_limiting_cell_and_histogram():
+    sim = make_sim()
+    # a hot spot: the sound speed there is 4x the ambient one
+    sim.state.E[:] = 1.0
+    sim.state.E[5, 3] = 16.0*sim.state.rho[0, 0]/sim.state.rho[5, 3]
+
+    dt = sim.compute_timestep()
+    diag = sim.dt_diag
+    assert diag.limiting_cell == (5, 3)
+    assert diag.dt_limit == dt
+    assert diag.counts.sum() == 12*8
+    assert diag.counts[0] == 1
+    # the ambient local dt is 4x that of the hot spot, so it is alone in
+    # the first bin
+    assert diag.fraction_within(1.0 + 1.e-12) == 1/96
+
+    sim.compute_timestep()
+    assert diag.nsteps == 2 and diag.counts.sum() == 2*12*8
+    assert "limited by cell (5, 3)" in diag.summary()
+
+
+def test_histogram_bins():
+    diag = TimestepDiagnostics(1, 5, nbins=4)
+    diag.record(np.array([[1.0, 1.5, 2.0, 7.9, np.inf]]))
+    assert_array_equal(diag.counts, [2, 1, 1, 1])
+
+
+def test_tiled_local_dt_matches(tmp_path):
+    serial = make_sim(**{"lagrangian.kernel": "numba"})
+    tiled = make_sim(**{"lagrangian.kernel": "numba", "lagrangian.ntiles": 3})
+    assert tiled.compute_timestep() == serial.compute_timestep()
+    assert_array_equal(tiled.work.dt_local, serial.work.dt_local)
+    assert tiled.dt_diag.limiting_cell == serial.dt_diag.limiting_cell
+
+
+def test_cfl_dump(tmp_path):
+    basename = str(tmp_path / "run_")
+    sim = make_sim(**{"lagrangian.cfl_dump": 1, "io.basename": basename})
+    dts = []
+    for _ in range(3):
+        dt = sim.compute_timestep()
+        dts.append(dt)
+        sim.evolve(dt)
+    sim.finalize()
+
+    with h5py.File(basename + "cfl.h5", "r") as f:
+        assert f["dt_local"].shape == (3, 8, 12)
+        assert_array_equal(f["dt"][:], dts)
+        assert f["dt_local"][2].min() == dts[2]
+        assert tuple(f["limiting_cell"][2]) == sim.dt_diag.limiting_cell
@@ -0,0 +1,53 @@
+import numpy as np
+import pytest
+from numpy.testing import assert_array_equal
+
+import pyro.pyro_sim as pyro
+from pyro.util import compare, io_pyro
+
+
+def make_pyro(**params):
+    d = {"mesh.nx": 32, "mesh.ny": 4, "mesh.ymax": 0.125}
+    d.update(params)
+    p = pyro.Pyro("compressible_lagrangian")
+    p.initialize_problem("sod2d_channel", inputs_file="inputs.sod", inputs_dict=d)
+    return p
+
+
+def test_timestep_control():
+    p = make_pyro()
+    sim = p.sim
+    sim.method_compute_timestep()
+    dt_cfl = sim.dt
+    p.single_step()
+    assert sim.dt == pytest.approx(p.rp.get_param("driver.init_tstep_factor")*dt_cfl)
+
+    dt_old = sim.dt
+    p.single_step()
+    assert sim.dt <= p.rp.get_param("driver.max_dt_change")*dt_old
+
+    p = make_pyro(**{"driver.fix_dt": 1.e-4, "driver.max_steps": 3})
+    p.run_sim()
+    assert p.sim.n == 3
+    assert p.sim.t == pytest.approx(3.e-4)
+
+
+def test_tmax():
+    p = make_pyro(**{"driver.tmax": 0.01})
+    p.run_sim()
+    assert p.sim.t == pytest.approx(0.01, abs=1.e-15)
+    assert np.all(np.isfinite(p.get_var("density")))
+
+
+def test_write_read_compare(tmp_path):
+    p = make_pyro()
+    for _ in range(5):
+        p.single_step()
+    sim = p.sim
+
+    filename = f"{tmp_path}/sod_0005"
+    sim.write(filename)
+    new = io_pyro.read(filename)
+    assert compare.compare(sim.cc_data, new.cc_data) == 0
+    assert_array_equal(new.cc_data.get_var("energy"), sim.cc_data.get_var("energy"))
+    assert new.cc_data.get_var("density").shape == (32, 4)
@@ -0,0 +1,69 @@
+
+import numpy as np
+import pytest
+from numpy.testing import assert_allclose
+
+from pyro.compressible_lagrangian.kernels import node_lsq
+from pyro.compressible_lagrangian.problems import noh2d, sod2d_channel
+from pyro.compressible_lagrangian.simulation import Simulation
+from pyro.compressible_lagrangian.tests.util import RP
+
+
+def make_sim(problem, kernel, visc_coeff, node_velocity="average"):
+    rp = RP({
+        "mesh.nx": 16, "mesh.ny": 12,
+        "eos.gamma": 1.4, "driver.cfl": 0.3,
+        "lagrangian.kernel": kernel,
+        "lagrangian.visc_coeff": visc_coeff,
+        "lagrangian.node_velocity": node_velocity,
+    })
+    sim = Simulation("compressible_lagrangian_pure", "test", problem.init_data, rp)
+    sim.initialize()
+    return sim
+
+
+@pytest.mark.parametrize("problem", [sod2d_channel, noh2d])
+@pytest.mark.parametrize("visc_coeff", [0.0, 1.0])
+@pytest.mark.parametrize("node_velocity", ["average", "lsq"])
+def test_numba_matches_numpy(problem, visc_coeff, node_velocity):
+    ref = make_sim(problem, "numpy", visc_coeff, node_velocity)
+    fused = make_sim(problem, "numba", visc_coeff, node_velocity)
+
+    # a single stage
+    ref._rhs()
+    fused._rhs()
+    assert_allclose(fused.work.mom_rhs, ref.work.mom_rhs, rtol=1.e-12, atol=1.e-14)
+    assert_allclose(fused.work.ener_rhs, ref.work.ener_rhs, rtol=1.e-12, atol=1.e-14)
+    assert_allclose(fused.mesh.node_velocity, ref.mesh.node_velocity, rtol=1.e-12, atol=1.e-14)
+
+    # several full steps, with the mesh deforming
+    for _ in range(5):
+        dt = ref.compute_timestep()
+        ref.evolve(dt)
+        fused.evolve(dt)
+
+    assert_allclose(fused.state.rho, ref.state.rho, rtol=1.e-10)
+    assert_allclose(fused.state.E, ref.state.E, rtol=1.e-10)
+    assert_allclose(fused.mesh.nodes, ref.mesh.nodes, rtol=1.e-12, atol=1.e-14)
+
+
+def test_invalid_kernel():
+    with pytest.raises(ValueError):
+        make_sim(sod2d_channel, "fortran", 0.0)
+
+
+def test_node_lsq_matches_csr():
+    # the fused kernel's least-squares recovery is the CSR one, bit for bit
+    sim = make_sim(noh2d, "numba", 0.0, "lsq")
+    rng = np.random.default_rng(3)
+    sim.mesh.nodes[1:-1, 1:-1] += 0.02*rng.standard_normal(sim.mesh.nodes[1:-1, 1:-1].shape)
+    sim.mesh.mark_nodes_changed()
+    (normal_x, normal_y), _ = sim.mesh.face_geometry()
+    ustar_x = rng.standard_normal(normal_x.shape[:-1])
+    ustar_y = rng.standard_normal(normal_y.shape[:-1])
+
+    ref = sim.mesh.node_recovery.apply(ustar_x, ustar_y, normal_x, normal_y,
+                                       np.empty_like(sim.mesh.node_velocity))
+    u_node = np.empty_like(ref)
+    node_lsq(0, u_node.shape[0], normal_x, normal_y, ustar_x, ustar_y, sim.mesh.w_node, u_node)
+    np.testing.assert_array_equal(u_node, ref)
@@ -0,0 +1,81 @@
+
+import numpy as np
+from numpy.testing import assert_array_equal
+
+from pyro.compressible_lagrangian.forces import accumulate_pressure_forces_and_work
+from pyro.compressible_lagrangian.mesh import MovingQuadMesh
+from pyro.compressible_lagrangian.riemann import face_states_and_star
+
+
+def distorted_mesh(nx=6, ny=4, seed=3):
+    mesh = MovingQuadMesh(nx, ny, 0.0, 1.0, 0.0, 0.5)
+    rng = np.random.default_rng(seed)
+    mesh.nodes += rng.uniform(-0.02, 0.02, mesh.nodes.shape)
+    mesh.mark_nodes_changed()
+    return mesh
+
+
+def test_cell_area_matches_per_cell_cross():
+    mesh = distorted_mesh()
+    A_ref = np.zeros((mesh.ny, mesh.nx))
+    for j in range(mesh.ny):
+        for i in range(mesh.nx):
+            n00, n10 = mesh.nodes[j, i], mesh.nodes[j, i+1]
+            n01, n11 = mesh.nodes[j+1, i], mesh.nodes[j+1, i+1]
+            a, b, c = n10-n00, n11-n00, n01-n00
+            A_ref[j, i] = 0.5*abs(a[0]*b[1] - a[1]*b[0]) + 0.5*abs(b[0]*c[1] - b[1]*c[0])
+
+    assert_array_equal(mesh.cell_area(), A_ref)
+
+
+def test_geometry_cache_invalidation():
+    mesh = MovingQuadMesh(4, 3, 0.0, 1.0, 0.0, 1.0)
+    A = mesh.cell_area()
+    A0 = A.copy()
+    assert mesh.cell_area() is A
+    assert mesh.geometry()["area"] is A
+
+    ny, nx = mesh.ny, mesh.nx
+    ustar_x = np.zeros((ny, nx+1))
+    ustar_x[:] = np.linspace(0.0, 1.0, nx+1)[None, :]
+    faces = {"ustar_x": ustar_x, "ustar_y": np.zeros((ny+1, nx))}
+    version = mesh.node_version
+    mesh.move_nodes(faces, 0.01)
+
+    assert mesh.node_version == version + 1
+    # refilled in place with the new areas
+    A1 = mesh.cell_area()
+    assert A1 is A
+    assert not np.array_equal(A1, A0)
+    assert mesh.inscribed_diameter() is mesh.geometry()["inscribed_diameter"]
+
+
+def test_face_normals_follow_rotation():
+    mesh = MovingQuadMesh(5, 3, 0.0, 1.0, 0.0, 0.6)
+    mesh.face_geometry()
+    nx0, ny0 = mesh.normal_x.copy(), mesh.normal_y.copy()
+    lx0, ly0 = mesh.length_x.copy(), mesh.length_y.copy()
+
+    theta = 0.3
+    R = np.array([[np.cos(theta), -np.sin(theta)], [np.sin(theta), np.cos(theta)]])
+    mesh.nodes[:] = mesh.nodes @ R.T
+    mesh.mark_nodes_changed()
+    (normal_x, normal_y), (length_x, length_y) = mesh.face_geometry()
+
+    # refilled in place
+    assert normal_x is mesh.normal_x and length_y is mesh.length_y
+
+    np.testing.assert_allclose(normal_x, nx0 @ R.T, atol=1.e-14)
+    np.testing.assert_allclose(normal_y, ny0 @ R.T, atol=1.e-14)
+    np.testing.assert_allclose(length_x, lx0, rtol=1.e-14)
+    np.testing.assert_allclose(length_y, ly0, rtol=1.e-14)
+
+
+def test_closed_cells_have_no_net_uniform_pressure_force():
+    mesh = distorted_mesh()
+    ny, nx = mesh.ny, mesh.nx
+    faces = face_states_and_star(mesh, 1.4, (np.ones((ny, nx)), np.zeros((ny, nx)),
+                                             np.zeros((ny, nx)), 2.5*np.ones((ny, nx))))
+    mom_rhs, ener_rhs = accumulate_pressure_forces_and_work(mesh, faces)
+    np.testing.assert_allclose(mom_rhs, 0.0, atol=1.e-14)
+    np.testing.assert_allclose(ener_rhs, 0.0, atol=1.e-14)
@@ -0,0 +1,69 @@
+
+import numpy as np
+import pytest
+from numpy.testing import assert_allclose
+
+from pyro.compressible_lagrangian.mesh import MovingQuadMesh
+from pyro.compressible_lagrangian.node_velocity import NodeVelocityRecovery
+from pyro.compressible_lagrangian.riemann import face_states_and_star
+
+
+def distorted_mesh(method, nx=7, ny=5):
+    mesh = MovingQuadMesh(nx, ny, 0.0, 1.0, 0.0, 0.7, node_velocity=method)
+    rng = np.random.default_rng(2)
+    mesh.nodes += rng.uniform(-0.02, 0.02, mesh.nodes.shape)
+    mesh.mark_nodes_changed()
+    return mesh
+
+
+def slice_gather(faces, nodes_shape):
+    """the per-cell scatter of the face velocity vectors"""
+    u_node = np.zeros(nodes_shape)
+    w_node = np.zeros(nodes_shape[:-1])
+    for key, js, is_ in [("u_vec_w", slice(None, -1), slice(None, -1)),
+                         ("u_vec_w", slice(1, None), slice(None, -1)),
+                         ("u_vec_e", slice(None, -1), slice(1, None)),
+                         ("u_vec_e", slice(1, None), slice(1, None)),
+                         ("u_vec_s", slice(None, -1), slice(None, -1)),
+                         ("u_vec_s", slice(None, -1), slice(1, None)),
+                         ("u_vec_n", slice(1, None), slice(None, -1)),
+                         ("u_vec_n", slice(1, None), slice(1, None))]:
+        u_node[js, is_] += faces[key]
+        w_node[js, is_] += 1.0
+    return u_node / w_node[..., None]
+
+
+def random_faces(mesh):
+    rng = np.random.default_rng(9)
+    shape = (mesh.ny, mesh.nx)
+    prim = (rng.uniform(0.5, 1.5, shape), rng.uniform(-1, 1, shape),
+            rng.uniform(-1, 1, shape), rng.uniform(0.5, 1.5, shape))
+    return face_states_and_star(mesh, 1.4, prim)
+
+
+def test_average_matches_cell_gather():
+    mesh = distorted_mesh("average")
+    faces = random_faces(mesh)
+    u_node = mesh.gather_node_velocity(faces)
+    assert_allclose(u_node, slice_gather(faces, mesh.nodes.shape), rtol=1.e-13, atol=1.e-15)
+
+
+def test_lsq_recovers_uniform_translation():
+    mesh = distorted_mesh("lsq")
+    (normal_x, normal_y), _ = mesh.face_geometry()
+    U = np.array([0.3, -1.2])
+    ustar_x = normal_x @ U
+    ustar_y = normal_y @ U
+    u_node = mesh.node_recovery.apply(ustar_x, ustar_y, normal_x, normal_y,
+                                      np.empty_like(mesh.nodes))
+    assert_allclose(u_node, np.broadcast_to(U, u_node.shape), rtol=1.e-12)
+
+
+def test_stencil_is_topology_only():
+    rec = NodeVelocityRecovery(3, 2)
+    # 4 corner nodes with 2 faces, 6 edge nodes with 3, 2 interior with 4
+    assert np.bincount(np.diff(rec.indptr)).tolist() == [0, 0, 4, 6, 2]
+    assert_allclose(np.add.reduceat(rec.weights, rec.indptr[:-1]), 1.0)
+
+    with pytest.raises(ValueError):
+        NodeVelocityRecovery(3, 2, method="spline")
@@ -0,0 +1,85 @@
+import h5py
+import numpy as np
+from numpy.testing import assert_array_equal
+
+from pyro.compressible_lagrangian.output import H5Series
+from pyro.compressible_lagrangian.problems import sod2d_channel
+from pyro.compressible_lagrangian.simulation import Simulation
+from pyro.compressible_lagrangian.tests.util import RP
+from pyro.util import io_pyro
+
+
+def make_sim(tmp_path, **params):
+    d = {"mesh.nx": 12, "mesh.ny": 6, "eos.gamma": 1.4, "driver.cfl": 0.4,
+         "lagrangian.node_velocity": "lsq", "io.basename": f"{tmp_path}/run_"}
+    d.update(params)
+    sim = Simulation("compressible_lagrangian", "sod", sod2d_channel.init_data, RP(d))
+    sim.initialize()
+    return sim
+
+
+def steps(sim, n):
+    for _ in range(n):
+        sim.evolve(sim.compute_timestep())
+
+
+def test_restart_is_bitwise(tmp_path):
+    ref = make_sim(tmp_path)
+    steps(ref, 10)
+
+    sim = make_sim(tmp_path)
+    steps(sim, 5)
+    sim.write(f"{tmp_path}/run_0005")
+
+    new = io_pyro.read(f"{tmp_path}/run_0005")
+    assert new.t == sim.t and new.n == 5
+    assert_array_equal(new.get_var("density"), sim.state.rho)
+    steps(new, 5)
+
+    assert new.t == ref.t
+    assert_array_equal(new.mesh.nodes, ref.mesh.nodes)
+    assert_array_equal(new.state.rho, ref.state.rho)
+    assert_array_equal(new.state.u, ref.state.u)
+    assert_array_equal(new.state.E, ref.state.E)
+
+
+def test_plotfile_layout(tmp_path):
+    sim = make_sim(tmp_path)
+    steps(sim, 2)
+    sim.write(f"{tmp_path}/run_0002")
+    with h5py.File(f"{tmp_path}/run_0002.h5", "r") as f:
+        assert f.attrs["nsteps"] == 2
+        assert f["state/density/data"].shape == (12, 6)
+        assert_array_equal(f["state/energy/data"][()].T, sim.state.rho*sim.state.E)
+        assert f["lagrangian/parameters"].attrs["lagrangian.node_velocity"] == "lsq"
+
+
+def test_mesh_history_appends(tmp_path):
+    sim = make_sim(tmp_path, **{"lagrangian.mesh_history": 1})
+    for n in range(3):
+        sim.write(f"{tmp_path}/run_{n:04d}")
+        steps(sim, 1)
+    sim.finalize()
+
+    # a restarted run continues the series
+    new = io_pyro.read(f"{tmp_path}/run_0002")
+    new.write(f"{tmp_path}/run_0002")
+    new.finalize()
+
+    with h5py.File(f"{tmp_path}/run_mesh.h5", "r") as f:
+        assert_array_equal(f["nstep"][()], [0, 1, 2, 2])
+        assert f["nodes"].shape == (4, 7, 13, 2)
+        assert_array_equal(f["nodes"][3], new.mesh.nodes)
+
+
+def test_h5series_reopen(tmp_path):
+    fn = f"{tmp_path}/series"
+    s = H5Series(fn)
+    s.append(a=np.arange(3.0), b=1)
+    s.close()
+    s = H5Series(fn, mode="a")
+    s.append(a=np.ones(3), b=2)
+    assert len(s) == 2
+    s.close()
+    with h5py.File(fn + ".h5", "r") as f:
+        assert_array_equal(f["b"][()], [1, 2])
@@ -1,12 +1,8 @@
 
 import numpy as np
-from ..simulation import Simulation
+from pyro.compressible_lagrangian.simulation import Simulation
+from pyro.compressible_lagrangian.tests.util import RP
 
-class RP:
-    def __init__(self, d):
-        self.d=d
-    def get_param(self,k,default=None):
-        return self.d.get(k,default)
 
 def init_piston(cc, rp):
     ny, nx = cc._s.mesh.ny, cc._s.mesh.nx
@@ -21,7 +17,7 @@ def test_step():
         "mesh.xmax": 1.0, "mesh.ymax": 0.1,
         "eos.gamma": 1.4,
         "driver.cfl": 0.5, "driver.tmax": 1e-3,
-        "piston.kind": "constant", "piston.U": 0.1, "piston.side": "left"
+        "piston.kind": "constant", "piston.u": 0.1, "piston.side": "left"
     })
     sim = Simulation("compressible_lagrangian_pure", "piston", init_piston, rp)
     sim.initialize()
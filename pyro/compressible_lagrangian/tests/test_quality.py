@@ -0,0 +1,155 @@
+import os
+
+import h5py
+import numpy as np
+import pytest
+from numpy.testing import assert_allclose, assert_array_equal
+
+from pyro.compressible_lagrangian.mesh import MovingQuadMesh
+from pyro.compressible_lagrangian.problems import sod2d_channel
+from pyro.compressible_lagrangian.simulation import Simulation
+from pyro.compressible_lagrangian.tests.util import RP, run_sod, sod_sim
+from pyro.util import io_pyro
+
+
+def corner_jacobians(nodes):
+    """Scaled corner Jacobians of every cell, directly from the nodes."""
+    x0, x1, x2, x3 = nodes[:-1, :-1], nodes[:-1, 1:], nodes[1:, 1:], nodes[1:, :-1]
+    out = []
+    for a, b, c in ((x3, x0, x1), (x0, x1, x2), (x1, x2, x3), (x2, x3, x0)):
+        e1, e2 = c - b, a - b
+        cross = e1[..., 0]*e2[..., 1] - e1[..., 1]*e2[..., 0]
+        out.append(cross/(np.hypot(*np.moveaxis(e1, -1, 0))*np.hypot(*np.moveaxis(e2, -1, 0))))
+    return np.min(out, axis=0)
+
+
+def test_uniform_mesh():
+    mesh = MovingQuadMesh(8, 4, 0.0, 1.0, 0.0, 1.0)
+    q = mesh.quality()
+    assert q.min_jacobian == pytest.approx(1.0)
+    assert q.max_aspect == pytest.approx(2.0)
+    assert q.n_inverted == 0
+
+
+def test_distorted_mesh():
+    mesh = MovingQuadMesh(9, 7, 0.0, 1.0, 0.0, 1.0)
+    rng = np.random.default_rng(3)
+    mesh.nodes[1:-1, 1:-1] += 0.05*rng.standard_normal(mesh.nodes[1:-1, 1:-1].shape)
+    # push one node across the diagonal of its cell
+    mesh.nodes[3, 4] = mesh.nodes[4, 5] + [0.01, 0.01]
+    mesh.mark_nodes_changed()
+
+    q = mesh.quality()
+    jac = corner_jacobians(mesh.nodes)
+    assert_allclose(mesh.jacobian, jac, atol=1.e-13)
+    assert q.min_jacobian == pytest.approx(jac.min())
+    assert q.worst_cell == np.unravel_index(np.argmin(jac), jac.shape)
+    assert q.n_inverted == np.count_nonzero(jac <= 0.0) > 0
+
+
+def test_retry_keeps_mesh_valid():
+    sim = sod_sim(32, 1.5)
+    run_sod(sim)
+    assert sim.mesh_quality.n_inverted > 0
+
+    sim = sod_sim(32, 1.5, {"lagrangian.quality_retries": 3, "lagrangian.cfl_recovery": 1.0})
+    err = run_sod(sim)
+    assert sim.t == pytest.approx(0.2)
+    assert sim.rejected_steps > 0
+    assert sim.cfl < 1.5
+    assert sim.mesh_quality.n_inverted == 0
+    assert err < 0.05
+
+
+def test_abort_writes_checkpoint(tmp_path):
+    d = {"mesh.nx": 32, "mesh.ny": 8, "mesh.ymax": 0.25, "driver.cfl": 1.5,
+         "lagrangian.node_velocity": "lsq", "lagrangian.quality_abort": 1,
+         "lagrangian.mesh_history": 1, "io.basename": f"{tmp_path}/run_"}
+    sim = Simulation("compressible_lagrangian", "sod", sod2d_channel.init_data, RP(d))
+    sim.initialize()
+    sim.write(f"{tmp_path}/run_0000")
+
+    while not sim.finished():
+        t, nodes, E = sim.t, sim.mesh.nodes.copy(), sim.state.E.copy()
+        sim.evolve(sim.compute_timestep())
+    assert sim.aborted
+    assert sim.mesh_quality.n_inverted > 0
+
+    # the failed step is undone
+    assert sim.t == t
+    assert_array_equal(sim.mesh.nodes, nodes)
+    assert_array_equal(sim.state.E, E)
+
+    filename = f"{tmp_path}/run_abort_{sim.n:04d}"
+    assert os.path.isfile(f"{filename}.h5")
+    new = io_pyro.read(filename)
+    assert new.t == t
+    assert_array_equal(new.mesh.nodes, nodes)
+
+    # the checkpoint is not an output of the mesh history
+    sim.finalize()
+    with h5py.File(f"{tmp_path}/run_mesh.h5", "r") as f:
+        assert_array_equal(f["nstep"][()], [0])
+
+
+def test_invalid_shrink():
+    with pytest.raises(ValueError):
+        Simulation("compressible_lagrangian", "sod", sod2d_channel.init_data,
+                   RP({"lagrangian.cfl_shrink": 1.5}))
+
+
+def retry_sim(**params):
+    return sod_sim(32, 1.5, {"lagrangian.quality_retries": 3, "driver.init_tstep_factor": 0.01,
+                             "driver.max_dt_change": 2.0, **params})
+
+
+def steps(sim, n):
+    for _ in range(n):
+        sim.evolve(sim.compute_timestep())
+
+
+def test_cfl_recovers_and_restarts(tmp_path):
+    ref = retry_sim()
+    cfl = []
+    for _ in range(20):
+        steps(ref, 1)
+        cfl.append(ref.cfl)
+    assert ref.rejected_steps > 0
+    # the CFL number shrinks on a retry and grows back to driver.cfl
+    assert min(cfl) < 1.5 and cfl[-1] == 1.5
+
+    sim = retry_sim()
+    n = next(k for k, c in enumerate(cfl) if c < 1.5) + 1
+    steps(sim, n)
+    sim.write(f"{tmp_path}/run")
+
+    new = io_pyro.read(f"{tmp_path}/run")
+    assert new.cfl == sim.cfl < 1.5
+    assert new.rejected_steps == sim.rejected_steps
+    steps(new, 20 - n)
+    assert new.t == ref.t
+    assert new.rejected_steps == ref.rejected_steps
+    assert_array_equal(new.mesh.nodes, ref.mesh.nodes)
+    assert_array_equal(new.state.E, ref.state.E)
+
+
+def test_min_cfl_aborts(tmp_path):
+    sim = retry_sim(**{"lagrangian.quality_retries": 100, "lagrangian.min_cfl": 1.0,
+                       "io.basename": f"{tmp_path}/run_"})
+    while not sim.finished():
+        steps(sim, 1)
+    assert sim.aborted
+    assert sim.cfl == 1.5
+    assert sim.mesh_quality.n_inverted > 0
+    assert os.path.isfile(f"{tmp_path}/run_abort_{sim.n:04d}.h5")
+
+
+def test_retry_sets_dt_old():
+    sim = retry_sim()
+    while sim.rejected_steps == 0:
+        dt = sim.compute_timestep()
+        sim.evolve()
+    # the next step is limited by the shrunk step that was taken
+    assert sim.dt < dt
+    assert sim.dt_old == sim.dt
+    assert sim.compute_timestep() <= 2.0*sim.dt
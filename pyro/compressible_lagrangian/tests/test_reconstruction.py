@@ -0,0 +1,93 @@
+
+import os
+
+import numpy as np
+import pytest
+from numpy.testing import assert_allclose
+
+from pyro.compressible_lagrangian.mesh import MovingQuadMesh
+from pyro.compressible_lagrangian.problems import sod2d_channel
+from pyro.compressible_lagrangian.reconstruction import MUSCLHancock, muscl_reconstruct
+from pyro.compressible_lagrangian.simulation import Simulation
+from pyro.compressible_lagrangian.tests.util import RP
+
+SOD_EXACT = os.path.join(os.path.dirname(__file__), "..", "..", "analysis", "sod-exact.out")
+
+
+def affine_mesh(nx, ny):
+    mesh = MovingQuadMesh(nx, ny, 0.0, 1.0, 0.0, 1.0)
+    mesh.nodes[:] = mesh.nodes @ np.array([[1.0, 0.3], [-0.2, 0.8]]).T
+    mesh.mark_nodes_changed()
+    return mesh
+
+
+def test_green_gauss_exact_for_linear_fields():
+    ny, nx = 6, 8
+    mesh = affine_mesh(nx, ny)
+    x, y = mesh.cell_centers()[..., 0], mesh.cell_centers()[..., 1]
+    prim = (1.0 + 2.0*x - y, 0.5*x, -3.0*y, 2.0 + x + 4.0*y)
+
+    grad = MUSCLHancock(ny, nx).gradients(mesh, prim)
+
+    # boundary faces take the cell value, so only interior cells are exact
+    inner = (slice(1, -1), slice(1, -1))
+    for k, (gx, gy) in enumerate([(2.0, -1.0), (0.5, 0.0), (0.0, -3.0), (1.0, 4.0)]):
+        assert_allclose(grad[k, 0][inner], gx, rtol=1.e-12, atol=1.e-12)
+        assert_allclose(grad[k, 1][inner], gy, rtol=1.e-12, atol=1.e-12)
+
+
+def test_limited_states_bounded_by_neighbours():
+    ny, nx = 10, 12
+    mesh = affine_mesh(nx, ny)
+    rng = np.random.default_rng(3)
+    prim = tuple(rng.uniform(0.5, 1.5, (ny, nx)) for _ in range(4))
+
+    states = MUSCLHancock(ny, nx).reconstruct(mesh, 1.4, prim, 0.0)
+
+    for k in range(4):
+        q = prim[k]
+        lo = np.minimum(q[:, :-1], q[:, 1:]) - 1.e-14
+        hi = np.maximum(q[:, :-1], q[:, 1:]) + 1.e-14
+        for qs in (states["e"][k][:, :-1], states["w"][k][:, 1:]):
+            assert np.all((qs >= lo) & (qs <= hi))
+        lo = np.minimum(q[:-1, :], q[1:, :]) - 1.e-14
+        hi = np.maximum(q[:-1, :], q[1:, :]) + 1.e-14
+        for qs in (states["n"][k][:-1, :], states["s"][k][1:, :]):
+            assert np.all((qs >= lo) & (qs <= hi))
+
+
+def test_uniform_state_is_unchanged():
+    ny, nx = 4, 5
+    mesh = affine_mesh(nx, ny)
+    prim = tuple(np.full((ny, nx), c) for c in (1.0, 0.3, -0.2, 2.0))
+    first = muscl_reconstruct(mesh, prim)
+    second = MUSCLHancock(ny, nx).reconstruct(mesh, 1.4, prim, 0.1)
+    for side in "wesn":
+        for k in range(4):
+            assert_allclose(second[side][k], first[side][k], rtol=1.e-14)
+
+
+def sod_error(order, nx=64):
+    rp = RP({"mesh.nx": nx, "mesh.ny": 2, "mesh.ymax": 2.0/nx,
+             "driver.cfl": 0.4, "lagrangian.order": order,
+             "lagrangian.node_velocity": "lsq"})
+    sim = Simulation("compressible_lagrangian_pure", "sod", sod2d_channel.init_data, rp)
+    sim.initialize()
+
+    while sim.t < 0.2:
+        sim.evolve(min(sim.compute_timestep(), 0.2 - sim.t))
+
+    exact = np.loadtxt(SOD_EXACT)
+    x = sim.mesh.cell_centers()[0, :, 0]
+    dx = sim.mesh.cell_area()[0]*nx
+    return np.sum(np.abs(sim.state.rho[0] - np.interp(x, exact[:, 0], exact[:, 1]))*dx)
+
+
+def test_second_order_more_accurate_on_sod():
+    assert sod_error(2) < 0.8*sod_error(1)
+
+
+def test_second_order_requires_numpy_kernel():
+    with pytest.raises(ValueError):
+        Simulation("compressible_lagrangian_pure", "sod", sod2d_channel.init_data,
+                   RP({"lagrangian.order": 2, "lagrangian.kernel": "numba"}))
@@ -0,0 +1,125 @@
+import numpy as np
+import pytest
+from numpy.testing import assert_allclose, assert_array_equal
+
+from pyro.compressible_lagrangian.benchmarks.suite import make_sim
+from pyro.compressible_lagrangian.mesh import MovingQuadMesh
+from pyro.compressible_lagrangian.problems import noh2d
+from pyro.compressible_lagrangian.remap import ALERemap, swept_volumes, winslow_smooth
+from pyro.compressible_lagrangian.simulation import Simulation
+from pyro.compressible_lagrangian.state import LagrangianState
+from pyro.compressible_lagrangian.tests.util import RP
+
+
+def distorted_mesh(nx, ny, amp, seed=0):
+    mesh = MovingQuadMesh(nx, ny, 0.0, 1.0, 0.0, 1.0)
+    rng = np.random.default_rng(seed)
+    mesh.nodes[1:-1, 1:-1] += amp*rng.standard_normal(mesh.nodes[1:-1, 1:-1].shape)
+    mesh.mark_nodes_changed()
+    return mesh
+
+
+def totals(state):
+    m = state.m
+    return np.array([m.sum(), (m*state.u[..., 0]).sum(), (m*state.u[..., 1]).sum(),
+                     (m*state.E).sum()])
+
+
+def test_swept_volumes():
+    mesh = distorted_mesh(12, 9, 0.005)
+    old = mesh.nodes.copy()
+    area = mesh.cell_area().copy()
+    new = distorted_mesh(12, 9, 0.005, seed=1).nodes
+
+    sx, sy = np.empty((9, 13)), np.empty((10, 12))
+    swept_volumes(old, new, sx, sy)
+    mesh.nodes[:] = new
+    mesh.mark_nodes_changed()
+    assert_allclose(mesh.cell_area(), area + sx[:, 1:] - sx[:, :-1] + sy[1:] - sy[:-1],
+                    rtol=0, atol=1.e-15)
+
+
+def test_winslow():
+    mesh = MovingQuadMesh(10, 6, 0.0, 1.0, 0.0, 2.0)
+    out = np.empty_like(mesh.nodes)
+    winslow_smooth(mesh.nodes, out, 5)
+    assert_allclose(out, mesh.nodes, atol=1.e-15)
+
+    mesh = distorted_mesh(10, 10, 0.02)
+    mesh.nodes[0, 1:-1, 0] += 0.02*np.sin(np.arange(1, 10))
+    q0 = mesh.quality()
+    out = np.empty_like(mesh.nodes)
+    winslow_smooth(mesh.nodes, out, 20)
+    # the walls stay straight and the corners fixed
+    assert_array_equal(out[0, :, 1], 0.0)
+    assert_array_equal(out[:, -1, 0], 1.0)
+    assert_array_equal(out[[0, 0, -1, -1], [0, -1, 0, -1]],
+                       mesh.nodes[[0, 0, -1, -1], [0, -1, 0, -1]])
+    mesh.nodes[:] = out
+    mesh.mark_nodes_changed()
+    assert mesh.quality().min_jacobian > q0.min_jacobian
+
+    # sides that may not slide (outflow or periodic) are not moved
+    mesh = distorted_mesh(10, 10, 0.02)
+    mesh.nodes[1:-1, 0, 1] += 0.01*np.sin(np.arange(1, 10))
+    winslow_smooth(mesh.nodes, out, 20, slide=np.array([False, True, True, True]))
+    assert_array_equal(out[:, 0], mesh.nodes[:, 0])
+    winslow_smooth(mesh.nodes, out, 20)
+    assert not np.array_equal(out[:, 0], mesh.nodes[:, 0])
+
+
+@pytest.mark.parametrize("max_fraction", [0.5, 0.02])
+def test_remap_conservative(max_fraction):
+    mesh = distorted_mesh(16, 12, 0.005)
+    assert mesh.quality().n_inverted == 0
+    rng = np.random.default_rng(2)
+    st = LagrangianState(mesh, 1.4)
+    st.rho[:] = 1.0 + rng.random(st.rho.shape)
+    st.u[:] = rng.standard_normal(st.u.shape)
+    st.E[:] = 3.0 + rng.random(st.E.shape)
+    st.initialize_cell_mass_from_density()
+    before = totals(st)
+    eint = st.E - 0.5*np.sum(st.u**2, axis=-1)
+
+    ale = ALERemap(12, 16, iterations=20, max_fraction=max_fraction)
+    ale.apply(mesh, st)
+    assert (ale.nsub > 1) == (max_fraction < 0.1)
+    assert_allclose(totals(st), before, rtol=1.e-14, atol=1.e-14)
+    assert np.all(st.m > 0.0)
+    assert_allclose(st.rho, st.m/mesh.cell_area())
+    # the remapped velocity and energy are averages of the old ones
+    assert np.min(st.E - 0.5*np.sum(st.u**2, axis=-1)) >= np.min(eint) - 1.e-13
+
+    # a uniform state stays uniform
+    st.rho[:] = 2.0
+    st.u[:] = [0.3, -0.1]
+    st.E[:] = 5.0
+    st.initialize_cell_mass_from_density()
+    mesh.nodes[:] = distorted_mesh(16, 12, 0.005, seed=3).nodes
+    mesh.mark_nodes_changed()
+    st.initialize_cell_mass_from_density()
+    ale.apply(mesh, st)
+    assert_allclose(st.rho, 2.0, rtol=1.e-13)
+    assert_allclose(st.u, np.broadcast_to([0.3, -0.1], st.u.shape), rtol=1.e-13)
+    assert_allclose(st.E, 5.0, rtol=1.e-13)
+
+
+def test_noh_stays_valid():
+    sims = {}
+    for interval in (0, 5):
+        sim = make_sim("noh2d", 32, "numba", {"lagrangian.ale_interval": interval,
+                                              "driver.tmax": 0.3})
+        m0 = totals(sim.state)
+        while not sim.finished():
+            sim.evolve(sim.compute_timestep())
+        sims[interval] = sim
+    assert sims[0].mesh.quality().n_inverted > 0
+    assert sims[5].mesh.quality().n_inverted == 0
+    assert sims[5].n < sims[0].n
+    assert totals(sims[5].state)[0] == pytest.approx(m0[0], rel=1.e-13)
+
+
+def test_invalid_interval():
+    with pytest.raises(ValueError):
+        Simulation("compressible_lagrangian", "noh", noh2d.init_data,
+                   RP({"lagrangian.ale_interval": -1}))
@@ -0,0 +1,100 @@
+
+import numpy as np
+from numpy.testing import assert_array_equal
+
+from pyro.compressible_lagrangian.mesh import MovingQuadMesh
+from pyro.compressible_lagrangian.riemann import face_states_and_star, hllc_1d
+
+
+def scalar_faces(gamma, prim):
+    """Reference: per-cell scalar HLLC on all four faces of every cell."""
+    rho, u, v, p = prim
+    ny, nx = rho.shape
+    out = {k: np.zeros((ny, nx, 2)) for k in ["u_vec_w", "u_vec_e", "u_vec_s", "u_vec_n"]}
+    out.update({k: np.zeros((ny, nx)) for k in ["pstar_w", "pstar_e", "pstar_s", "pstar_n"]})
+    for j in range(ny):
+        for i in range(nx):
+            if i > 0:
+                s, ps = hllc_1d(gamma, rho[j, i-1], u[j, i-1], p[j, i-1], rho[j, i], u[j, i], p[j, i])
+            else:
+                s, ps = u[j, i], p[j, i]
+            out["u_vec_w"][j, i] = [s, 0.0]
+            out["pstar_w"][j, i] = ps
+            if i < nx-1:
+                s, ps = hllc_1d(gamma, rho[j, i], u[j, i], p[j, i], rho[j, i+1], u[j, i+1], p[j, i+1])
+            else:
+                s, ps = u[j, i], p[j, i]
+            out["u_vec_e"][j, i] = [s, 0.0]
+            out["pstar_e"][j, i] = ps
+            if j > 0:
+                s, ps = hllc_1d(gamma, rho[j-1, i], v[j-1, i], p[j-1, i], rho[j, i], v[j, i], p[j, i])
+            else:
+                s, ps = v[j, i], p[j, i]
+            out["u_vec_s"][j, i] = [0.0, s]
+            out["pstar_s"][j, i] = ps
+            if j < ny-1:
+                s, ps = hllc_1d(gamma, rho[j, i], v[j, i], p[j, i], rho[j+1, i], v[j+1, i], p[j+1, i])
+            else:
+                s, ps = v[j, i], p[j, i]
+            out["u_vec_n"][j, i] = [0.0, s]
+            out["pstar_n"][j, i] = ps
+    return out
+
+
+def test_vectorized_matches_scalar():
+    rng = np.random.default_rng(12345)
+    ny, nx = 5, 7
+    mesh = MovingQuadMesh(nx, ny, 0.0, 1.0, 0.0, 0.5)
+    rho = rng.uniform(0.1, 2.0, (ny, nx))
+    u = rng.uniform(-1.0, 1.0, (ny, nx))
+    v = rng.uniform(-1.0, 1.0, (ny, nx))
+    p = rng.uniform(0.05, 3.0, (ny, nx))
+    # include a uniform region, where the wave-speed denominator can vanish
+    rho[0, :] = 1.0
+    u[0, :] = 0.0
+    v[0, :] = 0.0
+    p[0, :] = 1.0
+    prim = (rho, u, v, p)
+
+    faces = face_states_and_star(mesh, 1.4, prim)
+    ref = scalar_faces(1.4, prim)
+
+    for key, val in ref.items():
+        assert_array_equal(faces[key], val)
+
+
+def test_shared_faces_solved_once():
+    ny, nx = 3, 4
+    mesh = MovingQuadMesh(nx, ny, 0.0, 1.0, 0.0, 1.0)
+    rng = np.random.default_rng(7)
+    prim = (rng.uniform(0.5, 1.5, (ny, nx)), rng.uniform(-1, 1, (ny, nx)),
+            rng.uniform(-1, 1, (ny, nx)), rng.uniform(0.5, 1.5, (ny, nx)))
+    faces = face_states_and_star(mesh, 1.4, prim)
+
+    assert faces["pstar_x"].shape == (ny, nx+1)
+    assert faces["pstar_y"].shape == (ny+1, nx)
+    assert np.shares_memory(faces["pstar_w"], faces["pstar_e"])
+    assert_array_equal(faces["pstar_e"][:, :-1], faces["pstar_w"][:, 1:])
+    assert_array_equal(faces["u_vec_n"][:-1, :], faces["u_vec_s"][1:, :])
+
+
+def test_rotation_invariance():
+    ny, nx = 4, 6
+    rng = np.random.default_rng(11)
+    rho = rng.uniform(0.5, 1.5, (ny, nx))
+    u = rng.uniform(-1, 1, (ny, nx))
+    v = rng.uniform(-1, 1, (ny, nx))
+    p = rng.uniform(0.5, 1.5, (ny, nx))
+
+    mesh = MovingQuadMesh(nx, ny, 0.0, 1.0, 0.0, 1.0)
+    faces = face_states_and_star(mesh, 1.4, (rho, u, v, p))
+
+    theta = -0.7
+    c, s = np.cos(theta), np.sin(theta)
+    rmesh = MovingQuadMesh(nx, ny, 0.0, 1.0, 0.0, 1.0)
+    rmesh.nodes[:] = rmesh.nodes @ np.array([[c, -s], [s, c]]).T
+    rmesh.mark_nodes_changed()
+    rfaces = face_states_and_star(rmesh, 1.4, (rho, c*u - s*v, s*u + c*v, p))
+
+    for key in ["ustar_x", "ustar_y", "pstar_x", "pstar_y"]:
+        np.testing.assert_allclose(rfaces[key], faces[key], rtol=1.e-12, atol=1.e-12)
@@ -0,0 +1,64 @@
+import numpy as np
+import pytest
+from numpy.testing import assert_allclose, assert_array_equal
+
+from pyro.compressible_lagrangian.mesh import MovingQuadMesh
+from pyro.compressible_lagrangian.problems import noh2d, sod2d_channel
+from pyro.compressible_lagrangian.simulation import Simulation
+from pyro.compressible_lagrangian.state import LagrangianState
+from pyro.compressible_lagrangian.tests.util import RP
+
+
+def make_sim(problem, **params):
+    d = {"mesh.nx": 8, "mesh.ny": 4, "eos.gamma": 1.4}
+    d.update(params)
+    sim = Simulation("compressible_lagrangian_pure", "test", problem.init_data, RP(d))
+    sim.initialize()
+    return sim
+
+
+def test_views_share_one_buffer():
+    st = LagrangianState(MovingQuadMesh(5, 3, 0.0, 1.0, 0.0, 1.0), 1.4)
+    assert st.data.flags.c_contiguous and st.data.size == 5*15
+    for v in (st.rho, st.u, st.E, st.m):
+        assert np.shares_memory(v, st.data)
+        assert v.flags.c_contiguous
+    st.data[:] = np.arange(st.data.size)
+    assert_array_equal(st.u[0, 1], [17.0, 18.0])
+    assert st.m[-1, -1] == st.data[-1]
+
+
+def test_problem_init_sets_the_state():
+    sim = make_sim(sod2d_channel)
+    x = sim.mesh.cell_centers()[..., 0]
+    assert_allclose(sim.state.rho, np.where(x < 0.5, 1.0, 0.125))
+    assert_allclose(sim.get_var("pressure"), np.where(x < 0.5, 1.0, 0.1))
+    assert_array_equal(sim.state.u, 0.0)
+    assert_allclose(sim.state.m, sim.state.rho*sim.mesh.cell_area())
+
+    sim = make_sim(noh2d)
+    c = sim.mesh.cell_centers() - 0.5
+    assert_allclose(sim.state.u, -c/np.hypot(c[..., 0], c[..., 1])[..., None])
+    assert_allclose(sim.get_var("x-momentum"), sim.state.u[..., 0])
+
+
+def test_derived_cache():
+    sim = make_sim(sod2d_channel)
+    st = sim.state
+    assert st.pressure() is st.pressure()
+    p = st.pressure().copy()
+    assert_allclose(st.sound_speed(), np.sqrt(1.4*p/st.rho))
+    with pytest.raises(ValueError):
+        sim.get_var("energy")[:] = 0.0
+
+    # a write through a view is seen after mark_changed
+    st.E[:] *= 2.0
+    st.mark_changed()
+    assert_allclose(st.pressure(), 2.0*p)
+
+    # set_cons invalidates the cache
+    mom, Et = np.empty(st.u.shape), np.empty(st.E.shape)
+    st.get_cons(mom, Et)
+    st.set_cons(mom, 0.5*Et)
+    assert_allclose(st.pressure(), p)
+    assert_allclose(sim.get_var("energy"), st.rho*st.E)
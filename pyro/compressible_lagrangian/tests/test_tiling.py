@@ -0,0 +1,59 @@
+
+import numpy as np
+import pytest
+from numpy.testing import assert_array_equal
+
+from pyro.compressible_lagrangian.problems import noh2d, sod2d_channel
+from pyro.compressible_lagrangian.simulation import Simulation
+from pyro.compressible_lagrangian.tests.util import RP
+from pyro.compressible_lagrangian.tiling import make_tiles
+
+
+def make_sim(problem, ntiles, node_velocity="average", kernel="numba"):
+    rp = RP({
+        "mesh.nx": 16, "mesh.ny": 13,
+        "eos.gamma": 1.4, "driver.cfl": 0.3,
+        "lagrangian.kernel": kernel,
+        "lagrangian.visc_coeff": 1.0,
+        "lagrangian.node_velocity": node_velocity,
+        "lagrangian.ntiles": ntiles,
+    })
+    sim = Simulation("compressible_lagrangian_pure", "test", problem.init_data, rp)
+    sim.initialize()
+    return sim
+
+
+def test_make_tiles():
+    tiles = make_tiles(13, 4)
+    assert tiles[0] == 0 and tiles[-1] == 13
+    assert np.all(np.diff(tiles) >= 3)
+    with pytest.raises(ValueError):
+        make_tiles(4, 5)
+
+
+@pytest.mark.parametrize("problem", [sod2d_channel, noh2d])
+@pytest.mark.parametrize("node_velocity", ["average", "lsq"])
+def test_tiled_matches_serial(problem, node_velocity):
+    # every tiling computes each entry with the same operations, so the
+    # results (and the reduced timestep) are identical to the serial kernel
+    serial = make_sim(problem, 0, node_velocity)
+    tiled = [make_sim(problem, n, node_velocity) for n in (1, 4, 13)]
+
+    for _ in range(5):
+        dt = serial.compute_timestep()
+        for sim in tiled:
+            assert sim.compute_timestep() == dt
+        serial.evolve(dt)
+        for sim in tiled:
+            sim.evolve(dt)
+
+    for sim in tiled:
+        assert_array_equal(sim.state.rho, serial.state.rho)
+        assert_array_equal(sim.state.u, serial.state.u)
+        assert_array_equal(sim.state.E, serial.state.E)
+        assert_array_equal(sim.mesh.nodes, serial.mesh.nodes)
+
+
+def test_tiles_require_numba():
+    with pytest.raises(ValueError):
+        make_sim(sod2d_channel, 2, kernel="numpy")
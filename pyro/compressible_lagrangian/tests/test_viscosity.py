@@ -0,0 +1,73 @@
+import numpy as np
+import pytest
+from numpy.testing import assert_allclose, assert_array_equal
+
+from pyro.compressible_lagrangian.mesh import MovingQuadMesh
+from pyro.compressible_lagrangian.problems import sod2d_channel
+from pyro.compressible_lagrangian.simulation import Simulation
+from pyro.compressible_lagrangian.tests.util import RP
+from pyro.compressible_lagrangian.viscosity import edge_q, edge_viscosity
+
+
+def face_q(u, c1=0.5, c2=1.0, gamma=1.4, nx=10, ny=4):
+    """Viscous face pressures of the cell x-velocity field u(x)."""
+    mesh = MovingQuadMesh(nx, ny, 0.0, 1.0, 0.0, 1.0)
+    (normal_x, normal_y), _ = mesh.face_geometry()
+    rho = np.ones((ny, nx))
+    p = np.ones((ny, nx))
+    vel = np.zeros((ny, nx, 2))
+    vel[..., 0] = u(mesh.cell_centers()[..., 0])
+    qx = np.zeros((ny, nx+1))
+    qy = np.zeros((ny+1, nx))
+    edge_viscosity(gamma, c1, c2, rho, vel, p, normal_x, normal_y, qx, qy)
+    return qx, qy
+
+
+def test_no_viscosity_in_expansion_or_smooth_compression():
+    # uniform expansion or compression: the limiter sees equal jumps everywhere
+    # (up to round-off in the jumps)
+    for u in (lambda x: x, lambda x: -x):
+        qx, qy = face_q(u)
+        assert_allclose(qx, 0.0, atol=1.e-15)
+        assert_array_equal(qy, 0.0)
+
+
+def test_shock_face():
+    # a velocity step: only the face of the jump is viscous, fully
+    qx, qy = face_q(lambda x: np.where(x < 0.5, 1.0, -1.0))
+    gamma, c1, c2, a = 1.4, 0.5, 1.0, np.sqrt(1.4)
+    k = c2*(gamma+1)/4*2.0
+    assert_allclose(qx[:, 5], (k + np.sqrt(k*k + c1*c1*a*a))*2.0, rtol=1.e-14)
+    qx[:, 5] = 0.0
+    assert_array_equal(qx, 0.0)
+    assert_array_equal(qy, 0.0)
+
+
+def test_limiter():
+    # psi = clip(min((r- + r+)/2, 2 r-, 2 r+), 0, 1) with r = d_nb/d
+    for dm, d, dp in ((-1.0, -2.0, -0.5), (0.3, -1.0, -4.0), (-3.0, -1.0, -2.0)):
+        rm, rp = dm/d, dp/d
+        psi = min(max(min(0.5*(rm+rp), 2*rm, 2*rp), 0.0), 1.0)
+        D = (1.0-psi)*abs(d)
+        assert edge_q(1.4, 0.0, 1.0, 1.0, 1.0, 1.0, 1.0, dm, d, dp) == \
+            pytest.approx(2*0.6*D*D, rel=1.e-14)
+
+
+@pytest.mark.parametrize("kernel", ["numpy", "numba"])
+def test_viscous_timestep(kernel):
+    rp = RP({"mesh.nx": 16, "mesh.ny": 4, "lagrangian.kernel": kernel,
+             "lagrangian.dt_diagnostics": 0})
+    sims = []
+    for c2 in (0.0, 1.0):
+        rp.d["lagrangian.visc_coeff"] = c2
+        sim = Simulation("compressible_lagrangian_pure", "sod", sod2d_channel.init_data, rp)
+        sim.initialize()
+        x = sim.mesh.cell_centers()[..., 0]
+        sim.state.u[..., 0] = np.where(x < 0.5, 1.0, -1.0)
+        sim.state.E[:] = 1.0 + 0.5
+        sims.append(sim)
+    dt0, dt1 = (sim.compute_timestep() for sim in sims)
+    assert dt1 < dt0
+    # only the cells next to the jump are limited by the viscosity
+    changed = sims[0].work.dt_local != sims[1].work.dt_local
+    assert_array_equal(np.nonzero(changed.any(axis=0))[0], [7, 8])
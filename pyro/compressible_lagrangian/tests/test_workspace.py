@@ -0,0 +1,50 @@
+
+import tracemalloc
+
+import numpy as np
+
+from pyro.compressible_lagrangian.problems import sod2d_channel
+from pyro.compressible_lagrangian.simulation import Simulation
+from pyro.compressible_lagrangian.tests.util import RP
+
+
+def test_allocation_per_step_is_flat():
+    rp = RP({
+        "mesh.nx": 64, "mesh.ny": 32,
+        "mesh.xmax": 1.0, "mesh.ymax": 0.5,
+        "eos.gamma": 1.4, "driver.cfl": 0.3,
+    })
+    sim = Simulation("compressible_lagrangian_pure", "sod", sod2d_channel.init_data, rp)
+    sim.initialize()
+
+    # warm up, so any lazily created objects exist and the interpreter's
+    # free lists have settled
+    for _ in range(50):
+        sim.evolve(sim.compute_timestep())
+
+    tracemalloc.start()
+    try:
+        growth = np.zeros(100, dtype=np.int64)
+        peaks = np.zeros(100, dtype=np.int64)
+        start = tracemalloc.get_traced_memory()[0]
+        for n in range(100):
+            tracemalloc.reset_peak()
+            before = tracemalloc.get_traced_memory()[0]
+            sim.evolve(sim.compute_timestep())
+            current, peak = tracemalloc.get_traced_memory()
+            growth[n] = current - before
+            peaks[n] = peak - before
+        end = tracemalloc.get_traced_memory()[0]
+    finally:
+        tracemalloc.stop()
+
+    cell_bytes = sim.state.rho.nbytes
+
+    # nothing is retained from step to step
+    assert end - start < 4096
+    assert max(growth[1:]) < 1024
+
+    # the transient per-step allocation neither grows nor reaches the
+    # size of the workspace
+    assert max(peaks[50:]) <= max(peaks[:10])
+    assert max(peaks) < 16 * cell_bytes
@@ -0,0 +1,51 @@
+"""Helpers shared by the compressible_lagrangian tests."""
+
+import os
+
+import numpy as np
+
+from pyro.compressible_lagrangian.problems import sod2d_channel
+from pyro.compressible_lagrangian.simulation import Simulation
+
+SOD_EXACT = os.path.join(os.path.dirname(__file__), "..", "..", "analysis", "sod-exact.out")
+
+
+class RP:
+    """Runtime parameters from a dict, as the solver reads them."""
+
+    def __init__(self, d):
+        self.d = d
+
+    def get_param(self, k, default=None):
+        return self.d.get(k, default)
+
+
+def sod_sim(nx, cfl, params=None):
+    """The Sod shock tube on an nx x nx/4 channel, to t = 0.2, with the
+    runtime parameters in the dict `params` changed."""
+    ny = max(nx//4, 1)
+    rp = RP({"mesh.nx": nx, "mesh.ny": ny, "mesh.ymax": ny/nx, "driver.cfl": cfl,
+             "driver.tmax": 0.2, "lagrangian.kernel": "numba",
+             "lagrangian.node_velocity": "lsq", "lagrangian.dt_diagnostics": 0,
+             **(params or {})})
+    sim = Simulation("compressible_lagrangian", "sod", sod2d_channel.init_data, rp)
+    sim.initialize()
+    return sim
+
+
+def run_sod(sim):
+    """Run `sim` to its end with Pyro's timestep control (the first step
+    is 0.01 of the CFL step and the step at most doubles) and return its
+    L1 density error (inf if it blew up)."""
+    while not sim.finished():
+        dt = sim.compute_timestep()
+        dt = 0.01*dt if sim.n == 0 else min(dt, 2.0*sim.dt)
+        sim.evolve(min(dt, sim.tmax - sim.t))
+        if not np.all(np.isfinite(sim.state.E)):
+            return np.inf
+
+    exact = np.loadtxt(SOD_EXACT)
+    x = sim.mesh.cell_centers()[..., 0]
+    rho_exact = np.interp(x, exact[:, 0], exact[:, 1])
+    area = sim.mesh.cell_area()
+    return np.sum(np.abs(sim.state.rho - rho_exact)*area)/np.sum(area)
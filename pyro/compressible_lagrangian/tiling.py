@@ -0,0 +1,232 @@
+"""Multithreaded, row-band tiled execution of the Lagrangian step.
+
+The cell rows are split into contiguous bands ("tiles").  Each phase of a
+stage -- geometry, face solve, cell forces, node velocity, state update --
+is a ``prange`` over the tiles, and the end of a phase is the barrier that
+makes a tile's results visible to its neighbours.  A tile only writes the
+faces, cells and nodes it owns and reads at most two rows of its
+neighbours (the halo), so there are no write races, and every entry is computed by the
+same operations whatever the tiling.  Results are therefore identical for
+any number of tiles or threads.
+
+Selected with ``lagrangian.kernel = numba`` and ``lagrangian.ntiles > 0``;
+``lagrangian.nthreads`` sets the numba thread count.
+"""
+
+import numpy as np
+from numba import njit, prange
+
+from .kernels import solve_x_faces, solve_y_faces, cell_forces, node_average, node_lsq
+from .viscosity import viscosity_x_faces, viscosity_y_faces, viscous_speed
+
+
+def make_tiles(ny, ntiles):
+    """Row boundaries of `ntiles` nearly equal bands of `ny` cell rows:
+    tile t holds the cell rows tiles[t] <= j < tiles[t+1]."""
+    if ntiles < 1 or ntiles > ny:
+        raise ValueError(f"invalid number of tiles {ntiles} for {ny} rows")
+    return np.linspace(0, ny, ntiles+1).round().astype(np.int64)
+
+
+@njit(cache=True)
+def _node_rows(tiles, t):
+    """Node (or y-face) rows owned by tile t; the last tile also owns the
+    top row."""
+    j1 = tiles[t+1]
+    if t == len(tiles) - 2:
+        j1 += 1
+    return tiles[t], j1
+
+
+@njit(cache=True, parallel=True)
+def geometry(tiles, nodes, normal_x, normal_y, length_x, length_y,
+             area, centers, ell):
+    """Face normals/lengths and cell areas, centers and inscribed
+    diameters from the node positions; the same operations as the NumPy
+    `MovingQuadMesh` geometry."""
+    nx = area.shape[1]
+    for t in prange(len(tiles)-1):
+        j0, j1 = tiles[t], tiles[t+1]
+        for j in range(j0, j1):
+            for i in range(nx+1):
+                ex = nodes[j+1, i, 0] - nodes[j, i, 0]
+                ey = nodes[j+1, i, 1] - nodes[j, i, 1]
+                L = np.hypot(ex, ey)
+                length_x[j, i] = L
+                normal_x[j, i, 0] = ey/L
+                normal_x[j, i, 1] = -(ex/L)
+
+        r0, r1 = _node_rows(tiles, t)
+        for j in range(r0, r1):
+            for i in range(nx):
+                ex = nodes[j, i+1, 0] - nodes[j, i, 0]
+                ey = nodes[j, i+1, 1] - nodes[j, i, 1]
+                L = np.hypot(ex, ey)
+                length_y[j, i] = L
+                normal_y[j, i, 0] = -(ey/L)
+                normal_y[j, i, 1] = ex/L
+
+        for j in range(j0, j1):
+            for i in range(nx):
+                x0 = nodes[j, i, 0]
+                y0 = nodes[j, i, 1]
+                d10x = nodes[j, i+1, 0] - x0
+                d10y = nodes[j, i+1, 1] - y0
+                d11x = nodes[j+1, i+1, 0] - x0
+                d11y = nodes[j+1, i+1, 1] - y0
+                d01x = nodes[j+1, i, 0] - x0
+                d01y = nodes[j+1, i, 1] - y0
+                c1 = abs(d10x*d11y - d10y*d11x)*0.5
+                c2 = abs(d11x*d01y - d11y*d01x)*0.5
+                a = c1 + c2
+                area[j, i] = a
+                ell[j, i] = np.sqrt(a*4.0/np.pi)
+                for d in range(2):
+                    centers[j, i, d] = (((nodes[j, i, d] + nodes[j+1, i, d]) +
+                                         nodes[j, i+1, d]) + nodes[j+1, i+1, d])*0.25
+
+
+@njit(cache=True)
+def _pressure(gamma, rho, u, v, E):
+    eint = max(E - (u*u + v*v)*0.5, 0.0)
+    return (rho*(gamma-1.0))*eint
+
+
+@njit(cache=True, parallel=True)
+def lagrangian_stage(tiles, gamma, c1, c2, rho, vel, E, p,
+                     normal_x, normal_y, length_x, length_y, w_node, lsq,
+                     ustar_x, pstar_x, ustar_y, pstar_y,
+                     mom_rhs, ener_rhs, u_node, bc_kind, bc_speed):
+    """Tiled version of `kernels.lagrangian_stage`; the pressure is
+    evaluated into `p` from the state first."""
+    nt = len(tiles) - 1
+    nx = rho.shape[1]
+    for t in prange(nt):
+        for j in range(tiles[t], tiles[t+1]):
+            for i in range(nx):
+                p[j, i] = _pressure(gamma, rho[j, i], vel[j, i, 0], vel[j, i, 1], E[j, i])
+
+    # faces read the halo rows of cells around the tile (two below for
+    # the viscosity limiter)
+    visc = c1 > 0.0 or c2 > 0.0
+    for t in prange(nt):
+        solve_x_faces(tiles[t], tiles[t+1], gamma, rho, vel, p, normal_x, ustar_x, pstar_x,
+                      bc_kind, bc_speed)
+        r0, r1 = _node_rows(tiles, t)
+        solve_y_faces(r0, r1, gamma, rho, vel, p, normal_y, ustar_y, pstar_y,
+                      bc_kind, bc_speed)
+        if visc:
+            viscosity_x_faces(tiles[t], tiles[t+1], gamma, c1, c2, rho, vel, p,
+                              normal_x, pstar_x)
+            viscosity_y_faces(r0, r1, gamma, c1, c2, rho, vel, p, normal_y, pstar_y)
+
+    # cells read the halo row of y-faces above the tile
+    for t in prange(nt):
+        cell_forces(tiles[t], tiles[t+1], normal_x, normal_y, length_x, length_y,
+                    ustar_x, pstar_x, ustar_y, pstar_y, mom_rhs, ener_rhs)
+
+    # nodes gather from the faces around them
+    for t in prange(nt):
+        r0, r1 = _node_rows(tiles, t)
+        if lsq:
+            node_lsq(r0, r1, normal_x, normal_y, ustar_x, ustar_y, w_node, u_node)
+        else:
+            node_average(r0, r1, normal_x, normal_y, ustar_x, ustar_y, w_node, u_node)
+
+
+@njit(cache=True, parallel=True)
+def timestep(tiles, gamma, cfl, c1, c2, rho, vel, E, ell, normal_x, normal_y,
+             dt_local, tile_min):
+    """Local timesteps cfl * ell / a into `dt_local` (inf where a = 0) and
+    their minimum, with a the viscous signal speed if the edge viscosity
+    is on.  Each tile reduces into its own slot of `tile_min`, which is
+    then reduced in tile order."""
+    nt = len(tiles) - 1
+    nx = rho.shape[1]
+    visc = c1 > 0.0 or c2 > 0.0
+    for t in prange(nt):
+        dtmin = np.inf
+        for j in range(tiles[t], tiles[t+1]):
+            for i in range(nx):
+                p = _pressure(gamma, rho[j, i], vel[j, i, 0], vel[j, i, 1], E[j, i])
+                a = np.sqrt(max(p, 0.0)*gamma/max(rho[j, i], 1e-30))
+                if visc:
+                    a = viscous_speed(gamma, c1, c2, vel, normal_x, normal_y, j, i, a)
+                if a > 0.0:
+                    dt_local[j, i] = (ell[j, i]/a)*cfl
+                else:
+                    dt_local[j, i] = np.inf
+                dtmin = min(dtmin, dt_local[j, i])
+        tile_min[t] = dtmin
+
+    dtmin = np.inf
+    for t in range(nt):
+        dtmin = min(dtmin, tile_min[t])
+    return dtmin
+
+
+@njit(cache=True, parallel=True)
+def save_step_start(tiles, m, vel, E, nodes, mom0, Et0, nodes0):
+    """mom0 = m*u, Et0 = m*E and a copy of the nodes at the start of the
+    step."""
+    nt = len(tiles) - 1
+    nx = m.shape[1]
+    for t in prange(nt):
+        for j in range(tiles[t], tiles[t+1]):
+            for i in range(nx):
+                mom0[j, i, 0] = m[j, i]*vel[j, i, 0]
+                mom0[j, i, 1] = m[j, i]*vel[j, i, 1]
+                Et0[j, i] = m[j, i]*E[j, i]
+        r0, r1 = _node_rows(tiles, t)
+        for j in range(r0, r1):
+            for i in range(nx+1):
+                nodes0[j, i, 0] = nodes[j, i, 0]
+                nodes0[j, i, 1] = nodes[j, i, 1]
+
+
+@njit(cache=True, parallel=True)
+def rk_stage(tiles, stage, dt, m, mom0, Et0, mom1, Et1, mom_rhs, ener_rhs,
+             vel, E, nodes, nodes0, u_node):
+    """SSP-RK2 stage update of m*u, m*E (into mom1, Et1 and the state)
+    and of the nodes:  stage 1 is U1 = U0 + dt L(U0), stage 2 is
+    U2 = (U1 + dt L(U1) + U0) / 2."""
+    nt = len(tiles) - 1
+    nx = m.shape[1]
+    for t in prange(nt):
+        for j in range(tiles[t], tiles[t+1]):
+            for i in range(nx):
+                for d in range(2):
+                    if stage == 1:
+                        mom1[j, i, d] = mom0[j, i, d] + mom_rhs[j, i, d]*dt
+                    else:
+                        mom1[j, i, d] = ((mom1[j, i, d] + mom_rhs[j, i, d]*dt) +
+                                         mom0[j, i, d])*0.5
+                if stage == 1:
+                    Et1[j, i] = Et0[j, i] + ener_rhs[j, i]*dt
+                else:
+                    Et1[j, i] = ((Et1[j, i] + ener_rhs[j, i]*dt) + Et0[j, i])*0.5
+                mi = max(m[j, i], 1e-30)
+                vel[j, i, 0] = mom1[j, i, 0]/mi
+                vel[j, i, 1] = mom1[j, i, 1]/mi
+                E[j, i] = Et1[j, i]/mi
+
+        r0, r1 = _node_rows(tiles, t)
+        for j in range(r0, r1):
+            for i in range(nx+1):
+                for d in range(2):
+                    x = nodes[j, i, d] + u_node[j, i, d]*dt
+                    if stage == 1:
+                        nodes[j, i, d] = x
+                    else:
+                        nodes[j, i, d] = (x + nodes0[j, i, d])*0.5
+
+
+@njit(cache=True, parallel=True)
+def update_density(tiles, m, area, rho):
+    """rho = m / area."""
+    nt = len(tiles) - 1
+    nx = m.shape[1]
+    for t in prange(nt):
+        for j in range(tiles[t], tiles[t+1]):
+            for i in range(nx):
+                rho[j, i] = m[j, i]/max(area[j, i], 1e-30)
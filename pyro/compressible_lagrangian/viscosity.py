@@ -1,22 +1,243 @@
 
 from __future__ import annotations
 import numpy as np
+from numba import njit, prange
+
+
+@njit(cache=True)
+def edge_q(gamma, c1, c2, rL, pL, rR, pR, dm, d, dp):
+    """Viscous pressure of one face.
+
+    `d` is the jump (u_R - u_L) . n of the normal velocity across the
+    face and `dm`, `dp` those of the faces behind and ahead of it along
+    the same grid line.  Only compression (d < 0) is viscous, and the
+    part of the jump that matches its neighbours is removed by the
+    limiter psi = clip(min((r- + r+)/2, 2 r-, 2 r+), 0, 1), r = d_nb / d.
+    With d < 0 this is psi d = clip(max((dm + dp)/2, 2 dm, 2 dp), d, 0),
+    so no division is needed.  For the remaining jump D,
+
+        q = rho_f (c2 (gamma+1)/4 |D| + sqrt((c2 (gamma+1)/4 D)^2 + c1^2 a_f^2)) |D|,
+
+    with the harmonic mean density and the smaller sound speed of the
+    two cells.
+    """
+    dc = min(d, 0.0)
+    lim = max(0.5*(dm + dp), max(2.0*dm, 2.0*dp))
+    lim = min(max(lim, dc), 0.0)
+    D = lim - dc
+    if D <= 0.0:
+        return 0.0
+    rf = 2.0*rL*rR/max(rL + rR, 1e-30)
+    k = c2*(gamma + 1.0)*0.25*D
+    if c1 > 0.0:
+        a2 = gamma*max(min(pL/max(rL, 1e-30), pR/max(rR, 1e-30)), 0.0)
+        return rf*(k + np.sqrt(k*k + c1*c1*a2))*D
+    return rf*(k + k)*D
+
+
+@njit(cache=True)
+def _jump(vel, ja, ia, jb, ib, n0, n1):
+    # (u_b - u_a) . n
+    return (vel[jb, ib, 0] - vel[ja, ia, 0])*n0 + (vel[jb, ib, 1] - vel[ja, ia, 1])*n1
+
+
+@njit(cache=True)
+def viscosity_x_faces(j0, j1, gamma, c1, c2, rho, vel, p, normal_x, pstar_x):
+    """Add the edge viscosity to the interior x-faces of rows
+    j0 <= j < j1.  A face next to the boundary uses the jump on its
+    other side for both neighbours (none at all: full viscosity)."""
+    nx = rho.shape[1]
+    for j in range(j0, j1):
+        for i in range(1, nx):
+            d = _jump(vel, j, i-1, j, i, normal_x[j, i, 0], normal_x[j, i, 1])
+            dm = 0.0
+            dp = 0.0
+            if i > 1:
+                dm = _jump(vel, j, i-2, j, i-1, normal_x[j, i-1, 0], normal_x[j, i-1, 1])
+            if i < nx-1:
+                dp = _jump(vel, j, i, j, i+1, normal_x[j, i+1, 0], normal_x[j, i+1, 1])
+            if i == 1:
+                dm = dp
+            if i == nx-1:
+                dp = dm
+            pstar_x[j, i] += edge_q(gamma, c1, c2, rho[j, i-1], p[j, i-1],
+                                    rho[j, i], p[j, i], dm, d, dp)
+
+
+@njit(cache=True)
+def viscosity_y_faces(j0, j1, gamma, c1, c2, rho, vel, p, normal_y, pstar_y):
+    """Add the edge viscosity to the interior y-faces j0 <= j < j1 (the
+    boundary faces 0 and ny are skipped)."""
+    ny, nx = rho.shape
+    for j in range(max(j0, 1), min(j1, ny)):
+        for i in range(nx):
+            d = _jump(vel, j-1, i, j, i, normal_y[j, i, 0], normal_y[j, i, 1])
+            dm = 0.0
+            dp = 0.0
+            if j > 1:
+                dm = _jump(vel, j-2, i, j-1, i, normal_y[j-1, i, 0], normal_y[j-1, i, 1])
+            if j < ny-1:
+                dp = _jump(vel, j, i, j+1, i, normal_y[j+1, i, 0], normal_y[j+1, i, 1])
+            if j == 1:
+                dm = dp
+            if j == ny-1:
+                dp = dm
+            pstar_y[j, i] += edge_q(gamma, c1, c2, rho[j-1, i], p[j-1, i],
+                                    rho[j, i], p[j, i], dm, d, dp)
+
+
+@njit(cache=True)
+def viscous_speed(gamma, c1, c2, vel, normal_x, normal_y, j, i, a):
+    """Signal speed of cell (j, i) with sound speed `a` including the
+    edge viscosity: a + 2 (k D + sqrt(k^2 D^2 + c1^2 a^2)), k =
+    c2 (gamma+1)/4, where D is the largest compressive normal velocity
+    jump across its faces (unlimited, so never below the viscous speed
+    of any of them)."""
+    ny, nx = vel.shape[0], vel.shape[1]
+    D = 0.0
+    if i > 0:
+        D = max(D, -_jump(vel, j, i-1, j, i, normal_x[j, i, 0], normal_x[j, i, 1]))
+    if i < nx-1:
+        D = max(D, -_jump(vel, j, i, j, i+1, normal_x[j, i+1, 0], normal_x[j, i+1, 1]))
+    if j > 0:
+        D = max(D, -_jump(vel, j-1, i, j, i, normal_y[j, i, 0], normal_y[j, i, 1]))
+    if j < ny-1:
+        D = max(D, -_jump(vel, j, i, j+1, i, normal_y[j+1, i, 0], normal_y[j+1, i, 1]))
+    if D <= 0.0:
+        return a
+    k = c2*(gamma + 1.0)*0.25*D
+    return a + 2.0*(k + np.sqrt(k*k + c1*c1*a*a))
+
+
+@njit(cache=True)
+def add_viscous_speed(gamma, c1, c2, vel, normal_x, normal_y, a):
+    """Replace the cell sound speeds `a` by `viscous_speed`."""
+    ny, nx = a.shape
+    for j in range(ny):
+        for i in range(nx):
+            a[j, i] = viscous_speed(gamma, c1, c2, vel, normal_x, normal_y, j, i, a[j, i])
+
+
+def edge_viscosity(gamma, c1, c2, rho, vel, p, normal_x, normal_y, pstar_x, pstar_y):
+    """Caramana-Shashkov-Whalen edge viscosity: every interior face gets
+    its own q (see `edge_q`) from the velocity jump across it, added in
+    place to the face star pressures `pstar_x`, `pstar_y`.  Both cells of
+    a face see the same q, so momentum and total energy stay conserved.
+    c1 and c2 are the linear and quadratic coefficients."""
+    ny = rho.shape[0]
+    viscosity_x_faces(0, ny, gamma, c1, c2, rho, vel, p, normal_x, pstar_x)
+    viscosity_y_faces(0, ny+1, gamma, c1, c2, rho, vel, p, normal_y, pstar_y)
 
-def vn_r_viscosity(mesh, faces, state, Cq):
-    """von Neumann-Richtmyer quadratic viscosity on compressive faces."""
-    div = ((faces["u_vec_e"][...,0] - faces["u_vec_w"][...,0]) +
-           (faces["u_vec_n"][...,1] - faces["u_vec_s"][...,1]))
-    mask = div < 0.0
-    h = mesh.inscribed_diameter()
-    q = np.zeros_like(state.rho)
-    q[mask] = Cq * state.rho[mask] * (0.5*h[mask]*div[mask])**2
-    for key in ["pstar_w","pstar_e","pstar_s","pstar_n"]:
-        faces[key] += q
 
 class HourglassControl:
+    """Flanagan-Belytschko hourglass filter of the node velocity.
+
+    For a quad with corners a = 0..3 (counterclockwise from node (j, i))
+    the hourglass base vector h = (1, -1, 1, -1) is made orthogonal to
+    every linear velocity field, gamma_a = h_a - (h . x) b_a, with
+    b_a = dN_a/dx the mean-strain gradients of the bilinear shape
+    functions.  Written with the cell diagonals this is
+
+        gamma = (1 - g0, -1 - g1, 1 + g0, -1 + g1),
+
+    g0 = (h . x) b_0 and g1 = (h . x) b_1, so each cell needs only two
+    numbers.  The hourglass velocity q = sum_a gamma_a v_a vanishes for
+    rigid motion and uniform strain; a fraction `coeff` of it is removed,
+
+        dv_a = -coeff gamma_a q / |gamma|^2,
+
+    and each node takes the average of the corrections of its cells.  On
+    the domain boundary the component normal to the boundary is left
+    alone, so walls stay straight.  The node velocity carries no
+    momentum in this scheme, so the filter does not change the
+    conservation of mass, momentum or energy.
+
+    The cell pass and the node gather are one numba kernel, parallel
+    over rows; the work arrays, node weights and boundary masks are allocated
+    on the first call.
+    """
     def __init__(self, coeff=0.0):
         self.coeff = coeff
-    def apply(self, mesh, state):
-        if self.coeff <= 0.0: return
-        # Placeholder for subcell stabilization
-        pass
+        self._shape = None
+
+    def _allocate(self, ny, nx):
+        self._shape = (ny, nx)
+        self._g = np.empty((ny, nx, 2))
+        self._q = np.empty((ny, nx, 2))
+
+        # 1 / (number of cells around each node), and 0 for the
+        # component normal to the boundary
+        w = np.zeros((ny+1, nx+1))
+        w[:-1, :-1] += 1.0
+        w[:-1, 1:] += 1.0
+        w[1:, 1:] += 1.0
+        w[1:, :-1] += 1.0
+        self._w = np.repeat((1.0/w)[..., None], 2, axis=-1)
+        self._w[:, 0, 0] = 0.0
+        self._w[:, -1, 0] = 0.0
+        self._w[0, :, 1] = 0.0
+        self._w[-1, :, 1] = 0.0
+
+    def apply(self, mesh):
+        """Filter `mesh.node_velocity` in place."""
+        if self.coeff <= 0.0:
+            return
+        if self._shape != (mesh.ny, mesh.nx):
+            self._allocate(mesh.ny, mesh.nx)
+        hourglass_filter(self.coeff, mesh.nodes, self._w, self._g, self._q,
+                         mesh.node_velocity)
+
+
+@njit(cache=True, parallel=True)
+def hourglass_filter(coeff, nodes, w, g, q, v):
+    """Remove a fraction `coeff` of the hourglass velocity from the node
+    velocity `v`: a pass over the cells for g = (g0, g1) and
+    q = -coeff (hourglass velocity) / |gamma|^2, then a gather over the
+    cells around each node, weighted by `w`."""
+    ny, nx = g.shape[0], g.shape[1]
+    for j in prange(ny):
+        for i in range(nx):
+            # diagonals, h . x and the signed area 2A = d02 x d13
+            d02x = nodes[j+1, i+1, 0] - nodes[j, i, 0]
+            d02y = nodes[j+1, i+1, 1] - nodes[j, i, 1]
+            d13x = nodes[j+1, i, 0] - nodes[j, i+1, 0]
+            d13y = nodes[j+1, i, 1] - nodes[j, i+1, 1]
+            hx = (nodes[j, i, 0] - nodes[j, i+1, 0]) + (nodes[j+1, i+1, 0] - nodes[j+1, i, 0])
+            hy = (nodes[j, i, 1] - nodes[j, i+1, 1]) + (nodes[j+1, i+1, 1] - nodes[j+1, i, 1])
+            det = d02x*d13y - d02y*d13x
+
+            # a degenerate cell (or one with colinear diagonals) has no
+            # hourglass basis: leave it out of the filter
+            if abs(det) <= 1e-300:
+                for d in range(2):
+                    g[j, i, d] = 0.0
+                    q[j, i, d] = 0.0
+                continue
+            inv = 1.0/det
+
+            # b_0 = (-d13_y, d13_x) / 2A and b_1 = (d02_y, -d02_x) / 2A
+            g0 = (hy*d13x - hx*d13y)*inv
+            g1 = (hx*d02y - hy*d02x)*inv
+            s = -coeff/(4.0 + 2.0*(g0*g0 + g1*g1))
+            g[j, i, 0] = g0
+            g[j, i, 1] = g1
+            for d in range(2):
+                q[j, i, d] = s*(((v[j, i, d] - v[j, i+1, d]) + (v[j+1, i+1, d] - v[j+1, i, d])) -
+                                g0*(v[j, i, d] - v[j+1, i+1, d]) -
+                                g1*(v[j, i+1, d] - v[j+1, i, d]))
+
+    # gamma = (1 - g0, -1 - g1, 1 + g0, -1 + g1) for the corners of a
+    # cell counterclockwise from its node (j, i)
+    for j in prange(ny+1):
+        for i in range(nx+1):
+            for d in range(2):
+                dv = 0.0
+                if j < ny and i < nx:
+                    dv += (1.0 - g[j, i, 0])*q[j, i, d]
+                if j < ny and i > 0:
+                    dv += (-1.0 - g[j, i-1, 1])*q[j, i-1, d]
+                if j > 0 and i > 0:
+                    dv += (1.0 + g[j-1, i-1, 0])*q[j-1, i-1, d]
+                if j > 0 and i < nx:
+                    dv += (-1.0 + g[j-1, i, 1])*q[j-1, i, d]
+                v[j, i, d] += w[j, i, d]*dv
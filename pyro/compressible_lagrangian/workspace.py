@@ -0,0 +1,65 @@
+from __future__ import annotations
+import numpy as np
+
+
+class LagrangianWorkspace:
+    """Persistent arrays reused by every `Simulation.evolve` call.
+
+    Everything the SSP-RK2 stages need (stage copies of the cell
+    momentum/energy, the force and work accumulators, the face Riemann
+    results and their scratch space) is allocated once here, so that
+    steady-state stepping only writes into existing memory.
+    """
+    def __init__(self, ny, nx):
+        self.ny, self.nx = ny, nx
+
+        # cell momentum m*u and total energy m*E at the start of the
+        # step and after stage 1
+        self.mom0 = np.empty((ny, nx, 2))
+        self.Et0 = np.empty((ny, nx))
+        self.mom1 = np.empty((ny, nx, 2))
+        self.Et1 = np.empty((ny, nx))
+        self.nodes0 = np.empty((ny+1, nx+1, 2))
+
+        # the state a rejected step is retried from (see Simulation.evolve)
+        self.state_save = np.empty(5*ny*nx)
+        self.nodes_save = np.empty((ny+1, nx+1, 2))
+
+        # force and work accumulators
+        self.mom_rhs = np.empty((ny, nx, 2))
+        self.ener_rhs = np.empty((ny, nx))
+
+        # cell pressure and cell-sized temporaries
+        self.p = np.empty((ny, nx))
+        self.cell = [np.empty((ny, nx)) for _ in range(5)]
+        self.mask = np.empty((ny, nx), dtype=bool)
+
+        # local CFL timestep of each cell
+        self.dt_local = np.empty((ny, nx))
+
+        # face results: x-faces are (ny, nx+1), y-faces are (ny+1, nx)
+        self.ustar_x = np.empty((ny, nx+1))
+        self.pstar_x = np.empty((ny, nx+1))
+        self.ustar_y = np.empty((ny+1, nx))
+        self.pstar_y = np.empty((ny+1, nx))
+        self.u_vec_x = np.empty((ny, nx+1, 2))
+        self.u_vec_y = np.empty((ny+1, nx, 2))
+
+        # HLLC scratch for the interior x- and y-faces
+        self.hllc_x = HLLCScratch((ny, max(nx-1, 0)))
+        self.hllc_y = HLLCScratch((max(ny-1, 0), nx))
+
+        # and for the boundary faces of one side, with the mirrored
+        # normal velocity of a wall
+        self.hllc_bx = HLLCScratch((ny,))
+        self.hllc_by = HLLCScratch((nx,))
+        self.mirror_x = np.empty(ny)
+        self.mirror_y = np.empty(nx)
+
+
+class HLLCScratch:
+    """Temporaries for an in-place `riemann.hllc_star` solve."""
+    def __init__(self, shape):
+        self.aL, self.aR, self.SL, self.SR, self.t1, self.t2 = \
+            (np.empty(shape) for _ in range(6))
+        self.mask = np.empty(shape, dtype=bool)
@@ -5,6 +5,7 @@ import numpy as np
 
 from pyro.mesh import patch
 from pyro.multigrid import MG
+from pyro.multigrid.solver_cache import SolverCache
 from pyro.simulation_null import NullSimulation, bc_setup, grid_setup
 from pyro.util import msg
 
@@ -46,6 +47,9 @@ class Simulation(NullSimulation):
 
         self.cc_data = my_data
 
+        # the multigrid solver, kept across steps
+        self.mg_solvers = SolverCache()
+
         # now set the initial conditions for the problem
         self.problem_func(self.cc_data, self.rp)
 
@@ -89,15 +93,15 @@ class Simulation(NullSimulation):
         #
         # this is the form that arises with a Crank-Nicolson discretization
         # of the diffusion equation.
-        mg = MG.CellCenterMG2d(myg.nx, myg.ny,
-                               xmin=myg.xmin, xmax=myg.xmax,
-                               ymin=myg.ymin, ymax=myg.ymax,
-                               xl_BC_type=self.cc_data.BCs['phi'].xlb,
-                               xr_BC_type=self.cc_data.BCs['phi'].xrb,
-                               yl_BC_type=self.cc_data.BCs['phi'].ylb,
-                               yr_BC_type=self.cc_data.BCs['phi'].yrb,
-                               alpha=1.0, beta=0.5*self.dt*k,
-                               verbose=0)
+        mg = self.mg_solvers.get(MG.CellCenterMG2d, myg.nx, myg.ny,
+                                 xmin=myg.xmin, xmax=myg.xmax,
+                                 ymin=myg.ymin, ymax=myg.ymax,
+                                 xl_BC_type=self.cc_data.BCs['phi'].xlb,
+                                 xr_BC_type=self.cc_data.BCs['phi'].xrb,
+                                 yl_BC_type=self.cc_data.BCs['phi'].ylb,
+                                 yr_BC_type=self.cc_data.BCs['phi'].yrb,
+                                 alpha=1.0, beta=0.5*self.dt*k,
+                                 verbose=0)
 
         # form the RHS: f = phi + (dt/2) k L phi  (where L is the Laplacian)
         f = mg.soln_grid.scratch_array()
@@ -0,0 +1,70 @@
+#!/usr/bin/env python3
+
+"""V-cycles of the MAC projection on the shear problem, from zero and
+warm-started from the last step's phi-MAC.
+
+Runs shear (problems/inputs.shear) on an n x n mesh for --steps steps
+with incompressible.mac_warm_start = 1 and
+incompressible.mac_warm_start_report = 1, so every MAC projection is
+also solved from zero and the simulation's timers count the V-cycles
+the warm start saved.  Reports, for every step, the V-cycles of the MAC
+projection from zero and warm-started, the V-cycles saved, and those
+of the final projection (which always starts from the last step's
+phi).  The time of the MAC projections is compared with a run that
+starts them from zero.
+
+usage: python warm_start_shear.py [-n 128] [--steps 20]
+"""
+
+import argparse
+import contextlib
+import io
+
+import pyro
+
+
+def run(n, steps, warm_start):
+    """The V-cycles of the MAC projection (used and saved) and of the
+    final projection of every step, and the time spent in the MAC
+    projections."""
+    p = pyro.Pyro("incompressible")
+    with contextlib.redirect_stdout(io.StringIO()):
+        p.initialize_problem("shear", inputs_dict={"mesh.nx": n, "mesh.ny": n,
+                                                   "incompressible.mac_warm_start": warm_start,
+                                                   "incompressible.mac_warm_start_report": warm_start})
+
+    tm_mac = p.sim.tc.timer("MAC projection")
+    tm_proj = p.sim.tc.timer("final projection")
+    keys = [(tm_mac, "V-cycles"), (tm_mac, "V-cycles saved"), (tm_proj, "V-cycles")]
+    cycles = []
+    for _ in range(steps):
+        before = [t.counts.get(k, 0) for t, k in keys]
+        p.single_step()
+        cycles.append([t.counts.get(k, 0) - b for (t, k), b in zip(keys, before)])
+    return cycles, tm_mac.elapsed_time
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("-n", type=int, default=128, help="cells on a side")
+    parser.add_argument("--steps", type=int, default=20)
+    args = parser.parse_args()
+
+    # compile the numba kernels outside the timing
+    run(16, 1, 1)
+
+    _, t_cold = run(args.n, args.steps, 0)
+    warm, t_warm = run(args.n, args.steps, 1)
+
+    print(f"shear, {args.n} x {args.n} cells, V-cycles per step")
+    print(f"{'':>5} {'MAC projection':>26} {'final':>8}")
+    print(f"{'step':>5} {'zero':>8} {'warm':>8} {'saved':>8} {'':>8}")
+    for step, (mac, saved, final) in enumerate(warm, start=1):
+        print(f"{step:5d} {mac+saved:8d} {mac:8d} {saved:8d} {final:8d}")
+    total = [sum(c[k] for c in warm) for k in range(3)]
+    print(f"{'total':>5} {total[0]+total[1]:8d} {total[0]:8d} {total[1]:8d} {total[2]:8d}")
+    print(f"MAC projection time: {t_cold:.3f} s from zero, {t_warm:.3f} s warm-started")
+
+
+if __name__ == "__main__":
+    main()
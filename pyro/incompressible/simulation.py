@@ -7,6 +7,7 @@ from pyro.burgers import Simulation as burgers_simulation
 from pyro.incompressible import incomp_interface
 from pyro.mesh import patch, reconstruction
 from pyro.multigrid import MG
+from pyro.multigrid.solver_cache import SolverCache
 from pyro.particles import particles
 from pyro.simulation_null import bc_setup, grid_setup
 
@@ -54,6 +55,11 @@ class Simulation(burgers_simulation):
 
         self.cc_data = my_data
 
+        # the multigrid solvers for the projections, kept across steps,
+        # and whether the last MAC projection converged
+        self.mg_solvers = SolverCache()
+        self.mac_converged = False
+
         if self.rp.get_param("particles.do_particles") == 1:
             n_particles = self.rp.get_param("particles.n_particles")
             particle_generator = self.rp.get_param("particles.particle_generator")
@@ -88,14 +94,14 @@ class Simulation(burgers_simulation):
 
         # next create the multigrid object.  We want Neumann BCs on phi
         # at solid walls and periodic on phi for periodic BCs
-        mg = MG.CellCenterMG2d(myg.nx, myg.ny,
-                               xl_BC_type="periodic",
-                               xr_BC_type="periodic",
-                               yl_BC_type="periodic",
-                               yr_BC_type="periodic",
-                               xmin=myg.xmin, xmax=myg.xmax,
-                               ymin=myg.ymin, ymax=myg.ymax,
-                               verbose=0)
+        mg = self.mg_solvers.get(MG.CellCenterMG2d, myg.nx, myg.ny,
+                                 xl_BC_type="periodic",
+                                 xr_BC_type="periodic",
+                                 yl_BC_type="periodic",
+                                 yr_BC_type="periodic",
+                                 xmin=myg.xmin, xmax=myg.xmax,
+                                 ymin=myg.ymin, ymax=myg.ymax,
+                                 verbose=0)
 
         # first compute divU
         divU = mg.soln_grid.scratch_array()
@@ -240,14 +246,14 @@ class Simulation(burgers_simulation):
             print("  MAC projection")
 
         # create the multigrid object
-        mg = MG.CellCenterMG2d(myg.nx, myg.ny,
-                               xl_BC_type=self.cc_data.BCs["phi"].xlb,
-                               xr_BC_type=self.cc_data.BCs["phi"].xrb,
-                               yl_BC_type=self.cc_data.BCs["phi"].ylb,
-                               yr_BC_type=self.cc_data.BCs["phi"].yrb,
-                               xmin=myg.xmin, xmax=myg.xmax,
-                               ymin=myg.ymin, ymax=myg.ymax,
-                               verbose=0)
+        mg = self.mg_solvers.get(MG.CellCenterMG2d, myg.nx, myg.ny,
+                                 xl_BC_type=self.cc_data.BCs["phi"].xlb,
+                                 xr_BC_type=self.cc_data.BCs["phi"].xrb,
+                                 yl_BC_type=self.cc_data.BCs["phi"].ylb,
+                                 yr_BC_type=self.cc_data.BCs["phi"].yrb,
+                                 xmin=myg.xmin, xmax=myg.xmax,
+                                 ymin=myg.ymin, ymax=myg.ymax,
+                                 verbose=0)
 
         # first compute divU
         divU = mg.soln_grid.scratch_array()
@@ -256,14 +262,41 @@ class Simulation(burgers_simulation):
         divU.v()[:, :] = \
             (u_MAC.ip(1) - u_MAC.v())/myg.dx + (v_MAC.jp(1) - v_MAC.v())/myg.dy
 
-        # solve the Poisson problem
-        mg.init_zeros()
+        # solve the Poisson problem, starting from zero or, with
+        # mac_warm_start, from the last step's phi-MAC
+        phi_MAC = self.cc_data.get_var("phi-MAC")
         mg.init_RHS(divU)
+
+        tm_mac = self.tc.timer("MAC projection")
+
+        # for the report, the V-cycles the same solve takes from zero
+        report = self.rp.get_param("incompressible.mac_warm_start_report")
+        if report:
+            mg.init_zeros()
+            mg.solve(rtol=1.e-12)
+            cold_cycles = mg.num_cycles
+
+        # with only Neumann or periodic BCs phi-MAC is defined up to a
+        # constant.  A solve that stops short of rtol leaves that
+        # constant drifting, and starting from it would carry the drift
+        # on, so the warm start needs the last solve to have converged
+        if self.rp.get_param("incompressible.mac_warm_start") and self.mac_converged:
+            phiGuess = mg.soln_grid.scratch_array()
+            phiGuess.v(buf=1)[:, :] = phi_MAC.v(buf=1)
+            mg.init_solution(phiGuess)
+        else:
+            mg.init_zeros()
+
+        tm_mac.begin()
         mg.solve(rtol=1.e-12)
+        tm_mac.end()
+        tm_mac.add_count("V-cycles", mg.num_cycles)
+        if report:
+            tm_mac.add_count("V-cycles saved", cold_cycles - mg.num_cycles)
+        self.mac_converged = mg.residual_error <= 1.e-12
 
         # update the normal velocities with the pressure gradient -- these
         # constitute our advective velocities
-        phi_MAC = self.cc_data.get_var("phi-MAC")
         solution = mg.get_solution()
 
         phi_MAC.v(buf=1)[:, :] = solution.v(buf=1)
@@ -347,14 +380,14 @@ class Simulation(burgers_simulation):
             print("  final projection")
 
         # create the multigrid object
-        mg = MG.CellCenterMG2d(myg.nx, myg.ny,
-                               xl_BC_type=self.cc_data.BCs["phi"].xlb,
-                               xr_BC_type=self.cc_data.BCs["phi"].xrb,
-                               yl_BC_type=self.cc_data.BCs["phi"].ylb,
-                               yr_BC_type=self.cc_data.BCs["phi"].yrb,
-                               xmin=myg.xmin, xmax=myg.xmax,
-                               ymin=myg.ymin, ymax=myg.ymax,
-                               verbose=0)
+        mg = self.mg_solvers.get(MG.CellCenterMG2d, myg.nx, myg.ny,
+                                 xl_BC_type=self.cc_data.BCs["phi"].xlb,
+                                 xr_BC_type=self.cc_data.BCs["phi"].xrb,
+                                 yl_BC_type=self.cc_data.BCs["phi"].ylb,
+                                 yr_BC_type=self.cc_data.BCs["phi"].yrb,
+                                 xmin=myg.xmin, xmax=myg.xmax,
+                                 ymin=myg.ymin, ymax=myg.ymax,
+                                 verbose=0)
 
         # first compute divU
 
@@ -370,7 +403,11 @@ class Simulation(burgers_simulation):
         mg.init_solution(phiGuess)
 
         # solve
+        tm_proj = self.tc.timer("final projection")
+        tm_proj.begin()
         mg.solve(rtol=1.e-12)
+        tm_proj.end()
+        tm_proj.add_count("V-cycles", mg.num_cycles)
 
         # store the solution
         phi[:, :] = mg.get_solution(grid=myg)
@@ -100,7 +100,7 @@ class Simulation(incompressible.Simulation):
 
         # Solve for x-velocity
 
-        mg = MG.CellCenterMG2d(myg.nx, myg.ny,
+        mg = self.mg_solvers.get(MG.CellCenterMG2d, myg.nx, myg.ny,
                         xmin=myg.xmin, xmax=myg.xmax,
                         ymin=myg.ymin, ymax=myg.ymax,
                         xl_BC_type=self.cc_data.BCs["x-velocity"].xlb,
@@ -140,7 +140,7 @@ class Simulation(incompressible.Simulation):
 
         # Solve for y-velocity
 
-        mg = MG.CellCenterMG2d(myg.nx, myg.ny,
+        mg = self.mg_solvers.get(MG.CellCenterMG2d, myg.nx, myg.ny,
                         xmin=myg.xmin, xmax=myg.xmax,
                         ymin=myg.ymin, ymax=myg.ymax,
                         xl_BC_type=self.cc_data.BCs["y-velocity"].xlb,
@@ -6,6 +6,7 @@ import pyro.mesh.array_indexer as ai
 import pyro.mesh.boundary as bnd
 import pyro.multigrid.variable_coeff_MG as vcMG
 from pyro.mesh import patch, reconstruction
+from pyro.multigrid.solver_cache import SolverCache
 from pyro.simulation_null import NullSimulation, bc_setup, grid_setup
 
 
@@ -111,6 +112,11 @@ class Simulation(NullSimulation):
         aux_data.create()
         self.aux_data = aux_data
 
+        # the multigrid solvers for the projections, kept across steps,
+        # and whether the last MAC projection converged
+        self.mg_solvers = SolverCache()
+        self.mac_converged = False
+
         # we also need storage for the 1-d base state -- we'll store this
         # in the main class directly.
         self.base["rho0"] = Basestate(myg.ny, ng=myg.ng)
@@ -208,7 +214,7 @@ class Simulation(NullSimulation):
 
         # next create the multigrid object.  We defined phi with
         # the right BCs previously
-        mg = vcMG.VarCoeffCCMG2d(myg.nx, myg.ny,
+        mg = self.mg_solvers.get(vcMG.VarCoeffCCMG2d, myg.nx, myg.ny,
                                  xl_BC_type=self.cc_data.BCs["phi"].xlb,
                                  xr_BC_type=self.cc_data.BCs["phi"].xrb,
                                  yl_BC_type=self.cc_data.BCs["phi"].ylb,
@@ -229,7 +235,8 @@ class Simulation(NullSimulation):
 
         # solve D (beta_0^2/rho) G (phi/beta_0) = D( beta_0 U )
 
-        # set the RHS to divU and solve
+        # initialize our guess to zero, set the RHS to divU and solve
+        mg.init_zeros()
         mg.init_RHS(div_beta_U)
         mg.solve(rtol=1.e-10)
 
@@ -390,7 +397,7 @@ class Simulation(NullSimulation):
         coeff.v(buf=1)[:, :] = coeff.v(buf=1)*beta0.v2d(buf=1)**2
 
         # create the multigrid object
-        mg = vcMG.VarCoeffCCMG2d(myg.nx, myg.ny,
+        mg = self.mg_solvers.get(vcMG.VarCoeffCCMG2d, myg.nx, myg.ny,
                                  xl_BC_type=self.cc_data.BCs["phi-MAC"].xlb,
                                  xr_BC_type=self.cc_data.BCs["phi-MAC"].xrb,
                                  yl_BC_type=self.cc_data.BCs["phi-MAC"].ylb,
@@ -410,14 +417,41 @@ class Simulation(NullSimulation):
             (beta0_edges.v2dp(1)*v_MAC.jp(1) -
              beta0_edges.v2d()*v_MAC.v())/myg.dy
 
-        # solve the Poisson problem
+        # solve the Poisson problem, starting from zero or, with
+        # mac_warm_start, from the last step's phi-MAC
+        phi_MAC = self.cc_data.get_var("phi-MAC")
         mg.init_RHS(div_beta_U)
+
+        tm_mac = self.tc.timer("MAC projection")
+
+        # for the report, the V-cycles the same solve takes from zero
+        report = self.rp.get_param("lm-atmosphere.mac_warm_start_report")
+        if report:
+            mg.init_zeros()
+            mg.solve(rtol=1.e-12)
+            cold_cycles = mg.num_cycles
+
+        # phi-MAC may be defined only up to a constant, which drifts in a
+        # solve that stops short of rtol, so only start from a converged
+        # phi-MAC
+        if self.rp.get_param("lm-atmosphere.mac_warm_start") and self.mac_converged:
+            phiGuess = mg.soln_grid.scratch_array()
+            phiGuess.v(buf=1)[:, :] = phi_MAC.v(buf=1)
+            mg.init_solution(phiGuess)
+        else:
+            mg.init_zeros()
+
+        tm_mac.begin()
         mg.solve(rtol=1.e-12)
+        tm_mac.end()
+        tm_mac.add_count("V-cycles", mg.num_cycles)
+        if report:
+            tm_mac.add_count("V-cycles saved", cold_cycles - mg.num_cycles)
+        self.mac_converged = mg.residual_error <= 1.e-12
 
         # update the normal velocities with the pressure gradient -- these
         # constitute our advective velocities.  Note that what we actually
         # solved for here is phi/beta_0
-        phi_MAC = self.cc_data.get_var("phi-MAC")
         phi_MAC[:, :] = mg.get_solution(grid=myg)
 
         coeff = self.aux_data.get_var("coeff")
@@ -553,7 +587,7 @@ class Simulation(NullSimulation):
         coeff.v()[:, :] = coeff.v()*beta0.v2d()**2
 
         # create the multigrid object
-        mg = vcMG.VarCoeffCCMG2d(myg.nx, myg.ny,
+        mg = self.mg_solvers.get(vcMG.VarCoeffCCMG2d, myg.nx, myg.ny,
                                  xl_BC_type=self.cc_data.BCs["phi"].xlb,
                                  xr_BC_type=self.cc_data.BCs["phi"].xrb,
                                  yl_BC_type=self.cc_data.BCs["phi"].ylb,
@@ -579,7 +613,11 @@ class Simulation(NullSimulation):
         mg.init_solution(phiGuess)
 
         # solve
+        tm_proj = self.tc.timer("final projection")
+        tm_proj.begin()
         mg.solve(rtol=1.e-12)
+        tm_proj.end()
+        tm_proj.add_count("V-cycles", mg.num_cycles)
 
         # store the solution in our self.cc_data object -- include a single
         # ghostcell
@@ -3,6 +3,10 @@ Methods to manage boundary conditions
 """
 
 
+import numbers
+
+import numpy as np
+
 from pyro.util import msg
 
 # keep track of whether the BCs are solid walls (passed into the
@@ -61,6 +65,103 @@ def bc_is_solid(bc):
     return solid
 
 
+def _side_fill(bc_type, lo, hi, ng, q, upper):
+    """The ghost cells of one side of an axis with valid cells lo..hi
+    and q cells in all, as (dst, src, sign) with ghost[dst] = sign *
+    data[src] for the slices dst and src, or None for the types not
+    filled by fill_ghost (user-defined)."""
+    if upper:
+        dst = slice(hi+1, q)
+    else:
+        dst = slice(0, lo)
+
+    if bc_type in ["outflow", "neumann"]:
+        # the last valid cell, broadcast over the ghost cells
+        src = slice(hi, hi+1) if upper else slice(lo, lo+1)
+        return dst, src, 1.0
+    if bc_type in ["reflect-even", "reflect-odd", "dirichlet"]:
+        src = slice(hi, hi-ng, -1) if upper else slice(2*ng-1, ng-1, -1)
+        return dst, src, 1.0 if bc_type == "reflect-even" else -1.0
+    if bc_type == "periodic":
+        src = slice(lo, lo+ng) if upper else slice(hi-ng+1, hi+1)
+        return dst, src, 1.0
+    return None
+
+
+def _components(n):
+    """n as an index of the last axis: an integer, or a slice if the
+    components in the sequence n are contiguous."""
+    if isinstance(n, (numbers.Integral, slice)):
+        return n
+    n = [int(k) for k in n]
+    if n and n == list(range(n[0], n[0] + len(n))):
+        return slice(n[0], n[0] + len(n))
+    return np.array(n, dtype=np.intp)
+
+
+class GhostFillPlan:
+    """The ghost cell fill of a BC object on a grid, precomputed.
+
+    The ghost cells of each side are filled from the valid cells by one
+    slice assignment, ghost[dst] = sign * data[src] (the slices
+    reversed for a reflection, the one valid cell broadcast for
+    outflow), first in x (over all y) and then in y (over all x, so the
+    corners are filled too).  A side with an inhomogeneous Dirichlet or
+    Neumann value only sets its first ghost cell, from the value stored
+    in the BC object at the time of the fill.
+    """
+
+    def __init__(self, bc, grid):
+        # (axis, dst, src, sign) of a slice fill, or (axis, value
+        # attribute, ghost index, valid index, Neumann?, h) of an
+        # inhomogeneous side, in the order -x, +x, -y, +y
+        self.fills = []
+        for axis in (0, 1):
+            if axis == 0:
+                lo, hi, q, h = grid.ilo, grid.ihi, grid.qx, grid.dx
+            else:
+                lo, hi, q, h = grid.jlo, grid.jhi, grid.qy, grid.dy
+            for upper in (False, True):
+                side = ("x", "y")[axis] + ("r" if upper else "l")
+                bc_type = getattr(bc, f"{side}b")
+                if getattr(bc, f"{side}_value") is not None and \
+                   bc_type in ["outflow", "neumann", "reflect-odd", "dirichlet"]:
+                    neumann = bc_type in ["outflow", "neumann"]
+                    self.fills.append((axis, f"{side}_value", hi+1 if upper else lo-1,
+                                       hi if upper else lo, neumann, h if upper else -h))
+                    continue
+                fill = _side_fill(bc_type, lo, hi, grid.ng, q, upper)
+                if fill is not None:
+                    self.fills.append((axis, *fill))
+
+    def apply(self, data, n, bc):
+        """Fill the ghost cells of components n (an integer or a
+        sequence of integers) of data, (qx, qy, nvar)."""
+        d = data.view(np.ndarray)
+        # the y-fill is the x-fill of the transposed view
+        views = (d, d.swapaxes(0, 1))
+        c = _components(n)
+
+        for fill in self.fills:
+            a = views[fill[0]]
+            if len(fill) == 4:
+                _, dst, src, sign = fill
+                if sign > 0.0:
+                    a[dst, :, c] = a[src, :, c]
+                else:
+                    a[dst, :, c] = -a[src, :, c]
+                continue
+
+            # inhomogeneous Dirichlet / Neumann: first ghost cell only
+            _, attr, i_bnd, i_src, neumann, h = fill
+            value = getattr(bc, attr)[:]
+            for k in np.atleast_1d(np.arange(data.shape[-1])[c]):
+                if neumann:
+                    a[i_bnd, :, k] = a[i_src, :, k] + h*value
+                else:
+                    a[i_bnd, :, k] = 2*value - a[i_src, :, k]
+
+
 class BC:
     """Boundary condition container -- hold the BCs on each boundary
     for a single variable.
@@ -203,6 +304,19 @@ class BC:
         if yr_func is not None:
             self.yr_value = yr_func(grid.x)
 
+        self._ghost_plans = {}
+
+    def ghost_plan(self, grid):
+        """The `GhostFillPlan` of this BC on grid, built on the first
+        call for a grid of that size and kept."""
+        key = (grid.qx, grid.qy, grid.ng, self.xlb, self.xrb, self.ylb, self.yrb,
+               self.xl_value is None, self.xr_value is None,
+               self.yl_value is None, self.yr_value is None)
+        plan = self._ghost_plans.get(key)
+        if plan is None:
+            plan = self._ghost_plans[key] = GhostFillPlan(self, grid)
+        return plan
+
     def __str__(self):
         """ print out some basic information about the BC object """
 
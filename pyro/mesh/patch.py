@@ -31,6 +31,8 @@ Typical usage:
 
 """
 
+import inspect
+
 import h5py
 import numpy as np
 
@@ -39,6 +41,20 @@ from pyro.mesh.array_indexer import ArrayIndexer, ArrayIndexerFC
 from pyro.util import msg
 
 
+def _takes_ivars(function):
+    """Whether a custom BC function takes the ivars as a fifth argument,
+    (bc_name, bc_edge, variable, ccdata, ivars), rather than the first
+    four only."""
+    try:
+        inspect.signature(function).bind(None, None, None, None, None)
+    except TypeError:
+        return False
+    except ValueError:
+        # no signature to inspect
+        return False
+    return True
+
+
 class Grid2d:
     """
     the 2-d grid class.  The grid object will contain the coordinate
@@ -343,6 +359,9 @@ class CellCenterData2d:
     This last step actually allocates the storage for the state
     variables.  Once this is done, the patch is considered to be
     locked.  New variables cannot be added.
+
+    The views of the state variables returned by get_var are made
+    once and reused.  Derived variables are computed on every call.
     """
 
     # pylint: disable=too-many-instance-attributes
@@ -383,6 +402,11 @@ class CellCenterData2d:
 
         self.initialized = 0
 
+        # lookups and caches, filled in by create() and get_var()
+        self._index = {}
+        self._views = []
+        self._views_data = None
+
     def register_var(self, name, bc):
         """
         Register a variable with CellCenterData2d object.
@@ -451,8 +475,37 @@ class CellCenterData2d:
                         dtype=self.dtype)
         self.data = ArrayIndexer(_tmp, grid=self.grid)
 
+        self._plan_bcs()
+
         self.initialized = 1
 
+    def _plan_bcs(self):
+        """Work out once how the ghost cells of the variables are
+        filled.  Variables with the same BC types (or the same BC
+        object, if it holds inhomogeneous values) are filled together,
+        and the custom BC functions of each variable, with the way
+        they are called, are looked up in bnd.ext_bcs."""
+
+        self._index = {name: n for n, name in enumerate(self.names)}
+
+        groups = {}
+        self._custom_bcs = {}
+        for n, name in enumerate(self.names):
+            bc = self.BCs[name]
+            if all(v is None for v in (bc.xl_value, bc.xr_value, bc.yl_value, bc.yr_value)):
+                key = (bc.xlb, bc.xrb, bc.ylb, bc.yrb)
+            else:
+                key = id(bc)
+            groups.setdefault(key, (bc, []))[1].append(n)
+
+            self._custom_bcs[name] = [
+                (bnd.ext_bcs[bc_type], bc_type, edge, _takes_ivars(bnd.ext_bcs[bc_type]))
+                for edge, bc_type in (("xlb", bc.xlb), ("xrb", bc.xrb),
+                                      ("ylb", bc.ylb), ("yrb", bc.yrb))
+                if bc_type in bnd.ext_bcs]
+
+        self._bc_groups = list(groups.values())
+
     def __str__(self):
         """ print out some basic information about the CellCenterData2d
             object """
@@ -493,10 +546,9 @@ class CellCenterData2d:
             The array of data corresponding to the variable name
 
         """
-        # ns = [self.names.index(name) for name in self.names]
         try:
-            n = self.names.index(name)
-        except ValueError:
+            n = self._index[name]
+        except (KeyError, TypeError):
             for f in self.derives:
                 try:
                     var = f(self, name)
@@ -524,6 +576,12 @@ class CellCenterData2d:
             The array of data corresponding to the index
 
         """
+        if self._views_data is not self.data:
+            self._views = [self._make_view(k) for k in range(self.nvar)]
+            self._views_data = self.data
+        return self._views[n]
+
+    def _make_view(self, n):
         return ArrayIndexer(d=self.data[:, :, n], grid=self.grid)
 
     def get_vars(self):
@@ -569,15 +627,20 @@ class CellCenterData2d:
             The name of the variable to zero
 
         """
-        n = self.names.index(name)
+        n = self._index[name]
         self.data[:, :, n] = 0.0
 
     def fill_BC_all(self):
         """
-        Fill boundary conditions on all variables.
+        Fill boundary conditions on all variables.  The standard BCs
+        are filled for all the variables sharing the same BCs at once,
+        and then any custom BCs, variable by variable.
         """
+        for bc, comps in self._bc_groups:
+            self.data.fill_ghost(n=comps, bc=bc)
+
         for name in self.names:
-            self.fill_BC(name)
+            self._fill_custom_BC(name)
 
     def fill_BC(self, name):
         """
@@ -597,44 +660,32 @@ class CellCenterData2d:
 
         """
 
-        n = self.names.index(name)
+        n = self._index[name]
         self.data.fill_ghost(n=n, bc=self.BCs[name])
 
         # that will handle the standard type of BCs, but if we asked
         # for a custom BC, we handle it here
-        if self.BCs[name].xlb in bnd.ext_bcs:
-            try:
-                bnd.ext_bcs[self.BCs[name].xlb](self.BCs[name].xlb, "xlb", name, self, self.ivars)
-            except TypeError:
-                bnd.ext_bcs[self.BCs[name].xlb](self.BCs[name].xlb, "xlb", name, self)
-        if self.BCs[name].xrb in bnd.ext_bcs:
-            try:
-                bnd.ext_bcs[self.BCs[name].xrb](self.BCs[name].xrb, "xrb", name, self)
-            except TypeError:
-                bnd.ext_bcs[self.BCs[name].xrb](self.BCs[name].xrb, "xrb", name, self, self.ivars)
-        if self.BCs[name].ylb in bnd.ext_bcs:
-            try:
-                bnd.ext_bcs[self.BCs[name].ylb](self.BCs[name].ylb, "ylb", name, self)
-            except TypeError:
-                bnd.ext_bcs[self.BCs[name].ylb](self.BCs[name].ylb, "ylb", name, self, self.ivars)
-        if self.BCs[name].yrb in bnd.ext_bcs:
-            try:
-                bnd.ext_bcs[self.BCs[name].yrb](self.BCs[name].yrb, "yrb", name, self)
-            except TypeError:
-                bnd.ext_bcs[self.BCs[name].yrb](self.BCs[name].yrb, "yrb", name, self, self.ivars)
+        self._fill_custom_BC(name)
+
+    def _fill_custom_BC(self, name):
+        for function, bc_type, edge, pass_ivars in self._custom_bcs[name]:
+            if pass_ivars:
+                function(bc_type, edge, name, self, self.ivars)
+            else:
+                function(bc_type, edge, name, self)
 
     def min(self, name, *, ng=0):
         """
         return the minimum of the variable name in the domain's valid region
         """
-        n = self.names.index(name)
+        n = self._index[name]
         return np.min(self.data.v(buf=ng, n=n))
 
     def max(self, name, *, ng=0):
         """
         return the maximum of the variable name in the domain's valid region
         """
-        n = self.names.index(name)
+        n = self._index[name]
         return np.max(self.data.v(buf=ng, n=n))
 
     def restrict(self, varname, N=2):
@@ -841,6 +892,8 @@ class FaceCenterData2d(CellCenterData2d):
                             dtype=self.dtype)
             self.data = ArrayIndexerFC(_tmp, idir=self.idir, grid=self.grid)
 
+        self._index = {name: n for n, name in enumerate(self.names)}
+
         self.initialized = 1
 
     def __str__(self):
@@ -863,23 +916,7 @@ class FaceCenterData2d(CellCenterData2d):
 
         return my_str
 
-    def get_var_by_index(self, n):
-        """
-        Return a data array for the variable with index n in the
-        data array.  Any changes made to this are automatically
-        reflected in the CellCenterData2d object.
-
-        Parameters
-        ----------
-        n : int
-            The index of the variable to access
-
-        Returns
-        -------
-        out : ndarray
-            The array of data corresponding to the index
-
-        """
+    def _make_view(self, n):
         return ArrayIndexerFC(d=self.data[:, :, n], idir=self.idir, grid=self.grid)
 
     def get_vars(self):
@@ -895,6 +932,13 @@ class FaceCenterData2d(CellCenterData2d):
         """
         return ArrayIndexerFC(d=self.data, idir=self.idir, grid=self.grid)
 
+    def fill_BC_all(self):
+        """
+        Fill boundary conditions on all variables, one at a time.
+        """
+        for name in self.names:
+            self.fill_BC(name)
+
     def fill_BC(self, name):
         """
         Fill the boundary conditions.  This operates on a single state
@@ -913,7 +957,7 @@ class FaceCenterData2d(CellCenterData2d):
 
         """
 
-        n = self.names.index(name)
+        n = self._index[name]
         self.data.fill_ghost(n=n, bc=self.BCs[name])
 
         if self.BCs[name].xlb in bnd.ext_bcs or \
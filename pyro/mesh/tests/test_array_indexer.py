@@ -2,6 +2,7 @@ import numpy as np
 from numpy.testing import assert_array_equal
 
 import pyro.mesh.array_indexer as ai
+import pyro.mesh.boundary as bnd
 from pyro.mesh import patch
 
 
@@ -50,3 +51,38 @@ def test_is_asymmetric():
     a[:, 2] = [-1, -2, 2, 1]
 
     assert a.is_asymmetric()
+
+
+def test_fill_ghost_components():
+    g = patch.Grid2d(4, 3, ng=2)
+    bc = bnd.BC(xlb="reflect-odd", xrb="outflow", ylb="periodic", yrb="periodic")
+    rng = np.random.default_rng(1)
+    a = ai.ArrayIndexer(rng.random((g.qx, g.qy, 3)), grid=g)
+    b = a.copy()
+
+    # all the components sharing a BC at once, or one by one
+    a.fill_ghost(n=[0, 2], bc=bc)
+    b.fill_ghost(n=0, bc=bc)
+    b.fill_ghost(n=2, bc=bc)
+    assert_array_equal(a, b)
+    assert bc.ghost_plan(g) is bc.ghost_plan(g)
+
+    for n in (0, 2):
+        assert_array_equal(a[g.ilo-2:g.ilo, :, n], -a[g.ilo+1:g.ilo-1:-1, :, n])
+        assert_array_equal(a[g.ihi+1:, :, n], a[[g.ihi, g.ihi], :, n])
+        assert_array_equal(a[:, g.jlo-2:g.jlo, n], a[:, g.jhi-1:g.jhi+1, n])
+        assert_array_equal(a[:, g.jhi+1:, n], a[:, g.jlo:g.jlo+2, n])
+
+
+def test_fill_ghost_inhomogeneous():
+    g = patch.Grid2d(4, 3, ng=2)
+    bc = bnd.BC(xlb="dirichlet", xrb="neumann", grid=g,
+                xl_func=lambda y: 1.0 + y, xr_func=lambda y: 2.0*y)
+    a = ai.ArrayIndexer(np.ones((g.qx, g.qy, 2)), grid=g)
+    a.fill_ghost(n=[0, 1], bc=bc)
+    j = slice(g.jlo, g.jhi+1)
+    for n in (0, 1):
+        assert_array_equal(a[g.ilo-1, j, n], 2*(1.0 + g.y[j]) - 1.0)
+        assert_array_equal(a[g.ihi+1, j, n], 1.0 + g.dx*2.0*g.y[j])
+        # only the first ghost cell is set
+        assert_array_equal(a[g.ilo-2, :, n], 1.0)
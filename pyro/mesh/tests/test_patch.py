@@ -1,5 +1,6 @@
 # unit tests for the patch
 import numpy as np
+import pytest
 from numpy.testing import assert_array_equal
 
 import pyro.mesh.boundary as bnd
@@ -245,6 +246,28 @@ class TestCellCenterData2d:
         self.d.zero("a")
         assert self.d.min("a") == 0.0 and self.d.max("a") == 0.0
 
+    def test_derived(self):
+        def derive(myd, name):
+            if name != "c":
+                return []
+            return myd.get_var("a") + myd.get_var("b")
+
+        self.d.add_derived(derive)
+        a = self.d.get_var("a")
+        assert self.d.get_var("a") is a
+        a[:, :] = 1
+        assert np.all(self.d.get_var("c") == 1)
+
+        # writes through a view held from before are seen
+        a[:, :] = 4
+        assert np.all(self.d.get_var("c") == 4)
+
+        self.d.data[:, :, 1] = 2
+        assert np.all(self.d.get_var("c") == 6)
+
+        with pytest.raises(KeyError):
+            self.d.get_var("d")
+
 
 def test_bcs():
 
@@ -335,3 +358,49 @@ def test_bcs():
     # top
     assert_array_equal(d[myg.ilo:myg.ihi+1, myg.jhi-1:myg.jhi+1],
                        -np.fliplr(d[myg.ilo:myg.ihi+1, myg.jhi+1:myg.jhi+3]))
+
+
+def test_fill_BC_all(monkeypatch):
+
+    calls = []
+
+    def lid(bc_name, bc_edge, variable, ccdata):
+        calls.append((bc_name, bc_edge, variable))
+        v = ccdata.get_var(variable)
+        v[:, ccdata.grid.jhi+1:] = 2.0 - v[:, ccdata.grid.jhi:ccdata.grid.jhi+1]
+
+    def inflow(bc_name, bc_edge, variable, ccdata, ivars):
+        calls.append((bc_name, bc_edge, variable, ivars))
+        ccdata.get_var(variable)[:ccdata.grid.ilo, :] = 3.0
+
+    for name, function in (("lid", lid), ("inflow", inflow)):
+        monkeypatch.setitem(bnd.bc_solid, name, False)
+        monkeypatch.setitem(bnd.ext_bcs, name, function)
+
+    myg = patch.Grid2d(5, 4, ng=2)
+    bcs = {"a": bnd.BC(xlb="periodic", xrb="periodic", ylb="reflect", yrb="lid"),
+           "b": bnd.BC(xlb="outflow", xrb="reflect-odd", ylb="outflow", yrb="outflow"),
+           "c": bnd.BC(xlb="periodic", xrb="periodic", ylb="reflect", yrb="lid"),
+           "d": bnd.BC(xlb="inflow", xrb="outflow", ylb="dirichlet", yrb="neumann"),
+           "e": bnd.BC(xlb="outflow", xrb="reflect-odd", ylb="outflow", yrb="outflow")}
+    bcs["d"].yl_value = 1.0 + myg.x
+
+    data = []
+    for _ in range(2):
+        myd = patch.CellCenterData2d(myg)
+        for name, bc in bcs.items():
+            myd.register_var(name, bc)
+        myd.create()
+        myd.add_ivars("ivars")
+        rng = np.random.default_rng(1)
+        myd.data.v(n=slice(None))[:, :, :] = rng.random((5, 4, 5))
+        data.append(myd)
+
+    # the grouped fill gives the same ghost cells as variable by
+    # variable, and calls each custom BC once, the right way
+    data[0].fill_BC_all()
+    assert calls == [("lid", "yrb", "a"), ("lid", "yrb", "c"),
+                     ("inflow", "xlb", "d", "ivars")]
+    for name in bcs:
+        data[1].fill_BC(name)
+    assert_array_equal(data[0].data, data[1].data)
@@ -45,7 +45,10 @@ Then to solve, you just do::
 
    a.solve(rtol = 1.e-10)
 
-where rtol is the desired tolerance (residual norm / source norm)
+where rtol is the desired tolerance (residual norm / source norm).
+The cycles are V-cycles unless cycle_type="W" or cycle_type="F" is
+passed, and
+fmg=True starts the solve with a full multigrid pass.
 
 to access the final solution, use the get_solution method::
 
@@ -71,6 +74,7 @@ import numpy as np
 
 import pyro.mesh.boundary as bnd
 from pyro.mesh import patch
+from pyro.multigrid import smoothers
 from pyro.util import msg
 
 
@@ -90,6 +94,7 @@ class CellCenterMG2d:
                  yl_BC=None, yr_BC=None,
                  alpha=0.0, beta=-1.0,
                  nsmooth=10, nsmooth_bottom=50,
+                 smoother="numba",
                  verbose=0,
                  aux_field=None, aux_bc=None,
                  true_function=None, vis=0, vis_title=""):
@@ -141,6 +146,10 @@ class CellCenterMG2d:
         nsmooth_bottom : int, optional
             number of smoothing iterations to be done during the bottom
             solve
+        smoother : {'numba', 'python'}, optional
+            do the red-black Gauss-Seidel sweeps with the compiled
+            kernel (smoothers.rb_gauss_seidel) or with array slices.
+            Both give the same result.
         verbose : int, optional
             increase verbosity during the solve (for verbose=1)
         aux_field : list of str, optional
@@ -187,6 +196,11 @@ class CellCenterMG2d:
         self.nsmooth = nsmooth
         self.nsmooth_bottom = nsmooth_bottom
 
+        if smoother not in ("numba", "python"):
+            raise ValueError(f"ERROR: invalid smoother {smoother}")
+        self.smoother = smoother
+        self._smooth_bcs = {}
+
         self.max_cycles = 100
 
         self.verbose = verbose
@@ -567,6 +581,21 @@ class CellCenterMG2d:
         xcoeff = self.beta/myg.dx**2
         ycoeff = self.beta/myg.dy**2
 
+        # the compiled sweeps fill the ghost cells the stencil needs
+        # themselves, so we only fill them all at the end
+        if self.smoother == "numba" and self.vis != 1:
+            if level not in self._smooth_bcs:
+                self._smooth_bcs[level] = smoothers.bc_kinds(self.grids[level].BCs["v"])
+            bcs = self._smooth_bcs[level]
+            if bcs is not None:
+                kinds, values = bcs
+                smoothers.rb_gauss_seidel(np.asarray(v), np.asarray(f),
+                                          myg.ilo, myg.ihi, myg.jlo, myg.jhi,
+                                          self.alpha, xcoeff, ycoeff, nsmooth,
+                                          kinds, *values, myg.dx, myg.dy)
+                self.grids[level].fill_BC("v")
+                return
+
         # do red-black G-S
         for _ in range(nsmooth):
 
@@ -620,10 +649,10 @@ class CellCenterMG2d:
                 plt.savefig("mg_%4.4d.png" % (self.frame))
                 self.frame += 1
 
-    def solve(self, rtol=1.e-11):
+    def solve(self, rtol=1.e-11, cycle_type="V", fmg=False):
         """
         The main driver for the multigrid solution of the Helmholtz
-        equation.  This controls the V-cycles, smoothing at each
+        equation.  This controls the cycles, smoothing at each
         step of the way and uses simple smoothing at the coarsest
         level to perform the bottom solve.
 
@@ -634,9 +663,22 @@ class CellCenterMG2d:
             solve to.  Note that if the source norm is 0 (e.g. the
             righthand side of our equation is 0), then we just use
             the norm of the residual.
+        cycle_type : {'V', 'W', 'F'}, optional
+            the shape of the cycles: each coarser level is visited
+            once (V), twice (W), or with an F-cycle followed by a
+            V-cycle (F)
+        fmg : bool, optional
+            start with a full multigrid pass: solve the problem for
+            the correction on the coarsest grid and interpolate it up
+            level by level, doing a cycle on each, before the cycles
+            on the finest grid.  This usually gets the first cycle to
+            the discretization error.
 
         """
 
+        if cycle_type not in ("V", "W", "F"):
+            raise ValueError(f"ERROR: invalid cycle type {cycle_type}")
+
         # start by making sure that we've initialized the RHS
         if not self.initialized_rhs:
             msg.fail("ERROR: RHS not initialized")
@@ -644,6 +686,9 @@ class CellCenterMG2d:
         if self.verbose:
             print("source norm = ", self.source_norm)
 
+        if fmg:
+            self.fmg_guess(cycle_type)
+
         old_phi = self.grids[self.nlevels-1].get_var("v").copy()
 
         residual_error = 1.e33
@@ -659,11 +704,11 @@ class CellCenterMG2d:
                 self.grids[level].zero("v")
 
             if self.verbose:
-                print(f"<<< beginning V-cycle (cycle {cycle}) >>>\n")
+                print(f"<<< beginning {cycle_type}-cycle (cycle {cycle}) >>>\n")
 
-            # do V-cycles through the entire hierarchy
+            # do a cycle through the entire hierarchy
             level = self.nlevels-1
-            self.v_cycle(level)
+            self.v_cycle(level, cycle_type)
 
             # compute the error with respect to the previous solution
             # this is for diagnostic purposes only -- it is not used to
@@ -696,10 +741,65 @@ class CellCenterMG2d:
         self.residual_error = residual_error
         fp.fill_BC("v")
 
-    def v_cycle(self, level):
+    def fmg_guess(self, cycle_type="V"):
+        """
+        Improve the initial guess on the finest level with a full
+        multigrid pass.  The residual of the guess is restricted to
+        every level, the equation for the correction is solved on the
+        coarsest level, and then, going up a level at a time, the
+        correction is prolonged and a cycle is done on it.  The
+        coarse levels carry homogeneous BCs, so the finest level's BCs
+        (and the guess) enter only through the residual.
+
+        Parameters
+        ----------
+        cycle_type : {'V', 'W', 'F'}, optional
+            the shape of the cycle done on each level
+
+        """
+
+        fine = self.nlevels-1
+        if fine == 0:
+            return
+
+        fp = self.grids[fine]
+        fp.fill_BC("v")
+        self._compute_residual(fine)
+
+        # the RHS on every coarser level is the restricted residual
+        self.grids[fine-1].get_var("f").v()[:, :] = fp.restrict("r").v()
+        for level in range(fine-1, 0, -1):
+            self.grids[level-1].get_var("f").v()[:, :] = \
+                self.grids[level].restrict("f").v()
+
+        # bottom solve, then work up to the level below the finest
+        self.current_level = 0
+        self.grids[0].zero("v")
+        self.smooth(0, self.nsmooth_bottom)
+        self.grids[0].fill_BC("v")
+
+        for level in range(1, fine):
+            cp = self.grids[level]
+            cp.get_var("v").v()[:, :] = self.grids[level-1].prolong("v").v()
+            cp.fill_BC("v")
+
+            for lower in range(level):
+                self.grids[lower].zero("v")
+
+            self.v_cycle(level, cycle_type)
+
+        # correct the finest level
+        v = fp.get_var("v")
+        v.v()[:, :] += self.grids[fine-1].prolong("v").v()
+        fp.fill_BC("v")
+
+    def v_cycle(self, level, cycle_type="V"):
         """
         Perform a V-cycle for a single 2-level solve.  This is applied
-        recursively do V-cycle through the entire hierarchy.
+        recursively do V-cycle through the entire hierarchy.  With
+        cycle_type = 'W' the coarse problem is solved with two W-cycles
+        instead, and with cycle_type = 'F' with an F-cycle followed by a
+        V-cycle.  The levels below this one must hold zero on entry.
 
         """
 
@@ -731,8 +831,20 @@ class CellCenterMG2d:
             f_coarse = cp.get_var("f")
             f_coarse.v()[:, :] = fp.restrict("r").v()
 
-            # solve the coarse problem
-            self.v_cycle(level-1)
+            # solve the coarse problem.  Only the first visit starts
+            # from zero on the levels below the coarse one
+            if cycle_type == "V" or level == 1:
+                visits = ["V"]
+            elif cycle_type == "W":
+                visits = ["W", "W"]
+            else:
+                visits = ["F", "V"]
+
+            for n, coarse_cycle in enumerate(visits):
+                if n > 0:
+                    for lower in range(level-1):
+                        self.grids[lower].zero("v")
+                self.v_cycle(level-1, coarse_cycle)
 
             # ascending part
             self.current_level = level
@@ -20,8 +20,11 @@ general_MG implements a more general elliptic equation
    \alpha \phi + \nabla \cdot { \beta \nabla \phi } + \gamma \cdot \nabla \phi = f
 
 
-All use pure V-cycles to solve elliptic problems
+All solve elliptic problems with V-cycles (or W- or F-cycles, with an
+optional full multigrid start).  krylov wraps any of them in a
+conjugate gradient or BiCGStab iteration preconditioned by a V-cycle,
+for strongly varying coefficients.
 
 """
 
-__all__ = ['MG', 'variable_coeff_MG', 'general_MG', 'edge_coeffs']
+__all__ = ['MG', 'variable_coeff_MG', 'general_MG', 'edge_coeffs', 'krylov', 'solver_cache']
@@ -26,13 +26,15 @@ class EdgeCoeffs:
             self.x = eta_x
             self.y = eta_y
 
-    def restrict(self):
+    def restrict(self, cg=None):
         """
         restrict the edge values to a coarser grid.  Return a new
-        EdgeCoeffs object
+        EdgeCoeffs object.  The coarse grid cg, if given, must be
+        the grid coarser by a factor of 2 (as made by coarse_like).
         """
 
-        cg = self.grid.coarse_like(2)
+        if cg is None:
+            cg = self.grid.coarse_like(2)
 
         c_edge_coeffs = EdgeCoeffs(cg, None, empty=True)
 
@@ -0,0 +1,294 @@
+"""
+Krylov solvers preconditioned by one V-cycle of a multigrid hierarchy.
+
+When the coefficients vary strongly (for example the density of a
+stratified atmosphere in a VarCoeffCCMG2d solve), plain V-cycles can
+converge slowly.  Wrapping the same hierarchy in a conjugate gradient
+or BiCGStab iteration, with a V-cycle as the preconditioner, keeps the
+number of iterations small.  Typical usage::
+
+   mg = variable_coeff_MG.VarCoeffCCMG2d(nx, ny, ..., coeffs=coeffs)
+   mg.init_zeros()
+   mg.init_RHS(f)
+
+   k = krylov.MGKrylov(mg, method="cg")
+   k.solve(rtol=1.e-11)
+
+   phi = mg.get_solution()
+
+The wrapper works on the finest level of the multigrid object: it
+starts from the solution held there (set by init_zeros or
+init_solution), leaves the answer there, and applies the operator
+through the solver's own ``_compute_residual``, so it works for any of
+the multigrid classes.  Inhomogeneous BCs are allowed.
+
+"cg" is the flexible (Polak-Ribiere) preconditioned conjugate
+gradient, which does not need the V-cycle to be exactly symmetric, and
+is for symmetric operators (the Poisson and variable-coefficient
+solvers).  "bicgstab" is right-preconditioned BiCGStab, for
+non-symmetric operators (GeneralMG2d with gamma != 0).  It does two
+V-cycles per iteration to CG's one.
+"""
+
+import numpy as np
+
+from pyro.util import msg
+
+
+class MGKrylov:
+    """A Krylov solver using a multigrid object for the operator and,
+    with one V-cycle, for the preconditioner."""
+
+    def __init__(self, mg, method="cg", verbose=0):
+        """
+        Create the Krylov solver.
+
+        Parameters
+        ----------
+        mg : CellCenterMG2d object
+            The multigrid solver (of any of the multigrid classes) whose
+            problem is solved.
+        method : {'cg', 'bicgstab'}, optional
+            The Krylov method
+        verbose : int, optional
+            print the residual of every iteration (for verbose=1)
+
+        """
+
+        if method not in ("cg", "bicgstab"):
+            raise ValueError(f"ERROR: invalid Krylov method {method}")
+
+        self.mg = mg
+        self.method = method
+        self.verbose = verbose
+
+        self.max_iterations = 100
+
+        # after solving, the number of iterations and of V-cycles, the
+        # residual error (normalized to the source norm) and its
+        # history: the initial error, then one entry per iteration
+        self.num_iterations = 0
+        self.num_cycles = 0
+        self.residual_error = 1.e33
+        self.history = []
+
+        # the action of the BCs: the operator applied to zero, and the
+        # V-cycle applied to a zero residual
+        self._bc_residual = None
+        self._bc_cycle = None
+
+    def _dot(self, a, b):
+        """The inner product of a and b over the valid cells."""
+        return np.sum(a.v()*b.v())
+
+    def _residual_error(self, r):
+        """The norm of r relative to the source norm, as the multigrid
+        solvers measure it."""
+        if self.mg.source_norm != 0.0:
+            return r.norm()/self.mg.source_norm
+        return r.norm()
+
+    def _operator(self, p, out):
+        """
+        Put the operator (without the BCs) applied to p into out.  The
+        solver's residual with f = 0 is minus the operator applied to
+        p, with the BC values added in; those come out by subtracting
+        the residual of p = 0.
+        """
+        fp = self.mg.grids[self.mg.nlevels-1]
+        v = fp.get_var("v")
+        r = fp.get_var("r")
+
+        fp.zero("f")
+        v.v()[:, :] = p.v()
+        fp.fill_BC("v")
+        self.mg._compute_residual(self.mg.nlevels-1)
+
+        out.v()[:, :] = self._bc_residual.v() - r.v()
+
+    def _precondition(self, r, out):
+        """
+        Put one V-cycle on the equation with the RHS r, from zero, into
+        out.  The V-cycle on the finest level sees its BCs, so their
+        part (the V-cycle of r = 0) is removed if they are
+        inhomogeneous.
+        """
+        mg = self.mg
+        fine = mg.nlevels-1
+        fp = mg.grids[fine]
+
+        fp.get_var("f").v()[:, :] = r.v()
+        for level in range(fine+1):
+            mg.grids[level].zero("v")
+
+        mg.v_cycle(fine)
+        self.num_cycles += 1
+
+        out.v()[:, :] = fp.get_var("v").v()
+        if self._bc_cycle is not None:
+            out.v()[:, :] -= self._bc_cycle.v()
+
+    def _set_bc_terms(self):
+        """Find the BC part of the operator and of the V-cycle."""
+        mg = self.mg
+        fine = mg.nlevels-1
+        fp = mg.grids[fine]
+
+        fp.zero("f")
+        fp.zero("v")
+        fp.fill_BC("v")
+        mg._compute_residual(fine)
+        self._bc_residual = fp.get_var("r").copy()
+
+        bc = fp.BCs["v"]
+        self._bc_cycle = None
+        if any(getattr(bc, f"{side}_value") is not None for side in ("xl", "xr", "yl", "yr")):
+            bc_cycle = mg.soln_grid.scratch_array()
+            self._precondition(bc_cycle, bc_cycle)
+            self._bc_cycle = bc_cycle
+
+    def solve(self, rtol=1.e-11):
+        """
+        Solve the multigrid object's problem, starting from its current
+        solution, to a residual norm below rtol times the source norm
+        (or below rtol if the source norm is 0).
+
+        Parameters
+        ----------
+        rtol : float
+            The relative tolerance (residual norm / source norm) to
+            solve to.
+
+        """
+
+        mg = self.mg
+
+        if not mg.initialized_rhs:
+            msg.fail("ERROR: RHS not initialized")
+
+        fine = mg.nlevels-1
+        fp = mg.grids[fine]
+        myg = mg.soln_grid
+
+        self.num_iterations = 0
+        self.num_cycles = 0
+
+        # the initial guess and the residual of the full problem
+        x = fp.get_var("v").copy()
+        f = fp.get_var("f").copy()
+
+        fp.fill_BC("v")
+        mg._compute_residual(fine)
+        r = fp.get_var("r").copy()
+
+        self.residual_error = self._residual_error(r)
+        self.history = [self.residual_error]
+
+        if self.residual_error > rtol:
+            self._set_bc_terms()
+
+            # solve for the correction, with homogeneous BCs
+            e = myg.scratch_array()
+            if self.method == "cg":
+                self._cg(e, r, rtol)
+            else:
+                self._bicgstab(e, r, rtol)
+
+            x.v()[:, :] += e.v()
+
+        # put the solution and RHS back, and measure the true residual
+        fp.get_var("v").v()[:, :] = x.v()
+        fp.get_var("f").v()[:, :] = f.v()
+        fp.fill_BC("v")
+        mg._compute_residual(fine)
+        self.residual_error = self._residual_error(fp.get_var("r"))
+
+    def _iteration_done(self, r, rtol):
+        """Record the residual of an iteration and say if we are done."""
+        self.num_iterations += 1
+        self.residual_error = self._residual_error(r)
+        self.history.append(self.residual_error)
+
+        if self.verbose:
+            print(f"iteration {self.num_iterations}: residual err = {self.residual_error}")
+
+        return self.residual_error <= rtol or self.num_iterations >= self.max_iterations
+
+    def _cg(self, e, r, rtol):
+        """Flexible preconditioned conjugate gradient on e, from e = 0
+        with residual r."""
+        myg = self.mg.soln_grid
+
+        z = myg.scratch_array()
+        q = myg.scratch_array()
+
+        self._precondition(r, z)
+        p = z.copy()
+        rz = self._dot(r, z)
+
+        while True:
+            self._operator(p, q)
+            pq = self._dot(p, q)
+            if pq == 0.0 or rz == 0.0:
+                break
+            alpha = rz/pq
+
+            e.v()[:, :] += alpha*p.v()
+            r_old = r.copy()
+            r.v()[:, :] -= alpha*q.v()
+
+            if self._iteration_done(r, rtol):
+                break
+
+            self._precondition(r, z)
+            beta = (self._dot(z, r) - self._dot(z, r_old))/rz
+            rz = self._dot(r, z)
+            p.v()[:, :] = z.v() + beta*p.v()
+
+    def _bicgstab(self, e, r, rtol):
+        """Right-preconditioned BiCGStab on e, from e = 0 with
+        residual r."""
+        myg = self.mg.soln_grid
+
+        r_hat = r.copy()
+        p = myg.scratch_array()
+        v = myg.scratch_array()
+        y = myg.scratch_array()
+        z = myg.scratch_array()
+        t = myg.scratch_array()
+
+        rho = alpha = omega = 1.0
+
+        while True:
+            rho_new = self._dot(r_hat, r)
+            if rho_new == 0.0:
+                break
+            beta = (rho_new/rho)*(alpha/omega)
+            rho = rho_new
+
+            p.v()[:, :] = r.v() + beta*(p.v() - omega*v.v())
+            self._precondition(p, y)
+            self._operator(y, v)
+            rv = self._dot(r_hat, v)
+            if rv == 0.0:
+                break
+            alpha = rho/rv
+
+            # s = r - alpha v, kept in r
+            e.v()[:, :] += alpha*y.v()
+            r.v()[:, :] -= alpha*v.v()
+
+            if self._residual_error(r) <= rtol:
+                self._iteration_done(r, rtol)
+                break
+
+            self._precondition(r, z)
+            self._operator(z, t)
+            tt = self._dot(t, t)
+            omega = self._dot(t, r)/tt if tt != 0.0 else 0.0
+
+            e.v()[:, :] += omega*z.v()
+            r.v()[:, :] -= omega*t.v()
+
+            if self._iteration_done(r, rtol) or omega == 0.0:
+                break
@@ -0,0 +1,111 @@
+"""Compiled smoothers for the multigrid solvers.
+
+The red-black Gauss-Seidel smoother of the constant-coefficient
+Helmholtz equation does every sweep (both colors, and the first layer
+of ghost cells after each color) in one call, in place.  The ghost
+cells are filled as `mesh.boundary.BC` fills them, from the kind of
+each side:
+
+  * COPY: the ghost cell is the edge cell (outflow, neumann)
+  * ODD / EVEN: the ghost cell is minus / plus the edge cell
+    (reflect-odd, dirichlet / reflect-even)
+  * PERIODIC: the ghost cell is the cell at the other end
+  * DIRICHLET_VALUE / NEUMANN_VALUE: the ghost cell makes the value
+    on the boundary (or the normal derivative) the given one
+
+Only the first ghost cell next to each valid cell is filled, which is
+all the 5-point stencil reads; the caller fills all the ghost cells
+afterwards.
+"""
+
+import numpy as np
+from numba import njit
+
+COPY = 0
+ODD = 1
+EVEN = 2
+PERIODIC = 3
+DIRICHLET_VALUE = 4
+NEUMANN_VALUE = 5
+
+
+def bc_kinds(bc):
+    """The side kinds of a BC object, in the order -x, +x, -y, +y,
+    and the boundary value of each side (an empty array for the
+    homogeneous ones), or None if a side has a type that is not
+    filled by fill_ghost (a user-defined one)."""
+    kinds = np.zeros(4, dtype=np.int64)
+    values = []
+    for k, side in enumerate(("xl", "xr", "yl", "yr")):
+        bc_type = getattr(bc, f"{side}b")
+        value = getattr(bc, f"{side}_value")
+        if value is not None and bc_type in ["outflow", "neumann", "reflect-odd", "dirichlet"]:
+            kinds[k] = NEUMANN_VALUE if bc_type in ["outflow", "neumann"] else DIRICHLET_VALUE
+            values.append(np.ascontiguousarray(value, dtype=np.float64))
+            continue
+        if bc_type in ["outflow", "neumann"]:
+            kinds[k] = COPY
+        elif bc_type in ["reflect-odd", "dirichlet"]:
+            kinds[k] = ODD
+        elif bc_type == "reflect-even":
+            kinds[k] = EVEN
+        elif bc_type == "periodic":
+            kinds[k] = PERIODIC
+        else:
+            return None
+        values.append(np.zeros(0))
+    return kinds, tuple(values)
+
+
+@njit(cache=True)
+def _ghost(kind, edge, other, value, h):
+    """The first ghost cell next to the valid cell edge, with the
+    valid cell at the other end of the row other."""
+    if kind == COPY:
+        return edge
+    if kind == ODD:
+        return -edge
+    if kind == EVEN:
+        return edge
+    if kind == PERIODIC:
+        return other
+    if kind == DIRICHLET_VALUE:
+        return 2*value - edge
+    return edge + h*value
+
+
+@njit(cache=True)
+def _fill_ghosts(v, ilo, ihi, jlo, jhi, kinds, xl_value, xr_value, yl_value, yr_value,
+                 dx, dy):
+    """Fill the first ghost cells of the valid rows and columns."""
+    for j in range(jlo, jhi+1):
+        xl = xl_value[j] if kinds[0] >= DIRICHLET_VALUE else 0.0
+        xr = xr_value[j] if kinds[1] >= DIRICHLET_VALUE else 0.0
+        v[ilo-1, j] = _ghost(kinds[0], v[ilo, j], v[ihi, j], xl, -dx)
+        v[ihi+1, j] = _ghost(kinds[1], v[ihi, j], v[ilo, j], xr, dx)
+    for i in range(ilo, ihi+1):
+        yl = yl_value[i] if kinds[2] >= DIRICHLET_VALUE else 0.0
+        yr = yr_value[i] if kinds[3] >= DIRICHLET_VALUE else 0.0
+        v[i, jlo-1] = _ghost(kinds[2], v[i, jlo], v[i, jhi], yl, -dy)
+        v[i, jhi+1] = _ghost(kinds[3], v[i, jhi], v[i, jlo], yr, dy)
+
+
+@njit(cache=True)
+def rb_gauss_seidel(v, f, ilo, ihi, jlo, jhi, alpha, xcoeff, ycoeff, nsmooth,
+                    kinds, xl_value, xr_value, yl_value, yr_value, dx, dy):
+    """Do nsmooth red-black Gauss-Seidel sweeps of (alpha - beta L) v = f
+    on the valid cells of v, in place, with xcoeff = beta/dx**2 and
+    ycoeff = beta/dy**2.  The red cells are those with
+    (i - ilo) + (j - jlo) even.  The first ghost cells of v must be
+    filled on entry."""
+    denom = alpha + 2.0*xcoeff + 2.0*ycoeff
+    for _ in range(nsmooth):
+        for color in range(2):
+            for i in range(ilo, ihi+1):
+                j0 = jlo + (i - ilo + color) % 2
+                for j in range(j0, jhi+1, 2):
+                    v[i, j] = (f[i, j] +
+                               xcoeff*(v[i+1, j] + v[i-1, j]) +
+                               ycoeff*(v[i, j+1] + v[i, j-1])) / denom
+            _fill_ghosts(v, ilo, ihi, jlo, jhi, kinds, xl_value, xr_value,
+                         yl_value, yr_value, dx, dy)
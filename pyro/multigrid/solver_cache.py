@@ -0,0 +1,95 @@
+"""
+A cache of multigrid solvers, so a simulation that does the same kind
+of elliptic solve every step builds the grid hierarchy once.
+
+A solver is looked up by its class and the arguments that fix the
+hierarchy (the grid size and extent, the BC types and functions, the
+smoothing parameters and, for a variable-coefficient solver, the BC
+types of the coefficients).  The arguments that may change from one
+solve to the next -- the Helmholtz ``alpha`` and ``beta`` and the
+``coeffs`` array -- are not part of the key; they are set on the
+cached solver each time it is handed out, and ``alpha`` and ``beta``
+go back to the constructor's defaults when they are not passed (so a
+Poisson solve after a Helmholtz one with the same BCs is a Poisson
+solve).  Typical usage::
+
+   solvers = SolverCache()
+   ...
+   mg = solvers.get(MG.CellCenterMG2d, nx, ny,
+                    xl_BC_type="periodic", ..., alpha=1.0, beta=beta)
+   mg.init_RHS(f)
+   mg.init_zeros()
+   mg.solve(rtol=1.e-10)
+
+A cached solver holds the solution of its last solve, so the initial
+guess must be set (init_zeros or init_solution) before every solve.
+"""
+
+import inspect
+
+# arguments set on a cached solver rather than used to find it
+_UPDATABLE = ("alpha", "beta", "coeffs")
+
+
+def _key_value(value):
+    """A hashable stand-in for a solver argument: a BC object by its
+    types, anything else (numbers, strings, functions) by itself."""
+    if all(hasattr(value, a) for a in ("xlb", "xrb", "ylb", "yrb")):
+        return ("BC", value.xlb, value.xrb, value.ylb, value.yrb)
+    return value
+
+
+class SolverCache:
+    """Multigrid solvers kept across solves, one for each class and
+    set of hierarchy arguments."""
+
+    def __init__(self):
+        self.solvers = {}
+
+    def get(self, solver_class, nx, ny, **kwargs):
+        """
+        Return a solver of class solver_class for an nx x ny grid,
+        built with the arguments kwargs the first time and reused
+        after that, with alpha and beta set to the ones passed in (or
+        to the constructor's defaults) and coeffs (if given) set.
+
+        Parameters
+        ----------
+        solver_class : class
+            A multigrid solver class (e.g. MG.CellCenterMG2d or
+            variable_coeff_MG.VarCoeffCCMG2d)
+        nx, ny : int
+            The size of the finest grid
+        kwargs : dict
+            The arguments of the solver constructor
+
+        Returns
+        -------
+        out : solver_class object
+
+        """
+
+        key = (solver_class, nx, ny,
+               tuple(sorted((k, _key_value(v)) for k, v in kwargs.items()
+                            if k not in _UPDATABLE)))
+
+        mg = self.solvers.get(key)
+        if mg is None:
+            mg = solver_class(nx, ny, **kwargs)
+            self.solvers[key] = mg
+            return mg
+
+        params = inspect.signature(solver_class).parameters
+        for k in ("alpha", "beta"):
+            if k in kwargs:
+                setattr(mg, k, kwargs[k])
+            elif k in params:
+                setattr(mg, k, params[k].default)
+        if "coeffs" in kwargs:
+            mg.set_coeffs(kwargs["coeffs"])
+
+        return mg
+
+    def clear(self):
+        """Forget all the solvers."""
+        self.solvers.clear()
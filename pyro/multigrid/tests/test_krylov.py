@@ -0,0 +1,62 @@
+import numpy as np
+import pytest
+from numpy.testing import assert_allclose
+
+import pyro.mesh.boundary as bnd
+from pyro.mesh import patch
+from pyro.multigrid import MG, krylov, variable_coeff_MG
+
+
+def checkerboard_mg(n, contrast):
+    """A variable-coefficient solver with coefficients jumping by
+    contrast between the squares of a 4 x 4 checkerboard."""
+    g = patch.Grid2d(n, n, ng=1)
+    coeffs = g.scratch_array()
+    coeffs[:, :] = np.where((np.floor(4*g.x2d) + np.floor(4*g.y2d)) % 2 == 0, 1.0, contrast)
+    bc = bnd.BC(xlb="dirichlet", xrb="dirichlet", ylb="dirichlet", yrb="dirichlet")
+    mg = variable_coeff_MG.VarCoeffCCMG2d(n, n, coeffs=coeffs, coeffs_bc=bc)
+    mg.init_RHS(np.sin(2.0*np.pi*mg.x2d)*np.cos(np.pi*mg.y2d))
+    return mg
+
+
+@pytest.mark.parametrize("method", ["cg", "bicgstab"])
+def test_high_contrast(method):
+    mg = checkerboard_mg(16, 1.e4)
+    mg.init_zeros()
+    mg.solve(rtol=1.e-10)
+    ref = mg.get_solution()
+
+    mg.init_zeros()
+    k = krylov.MGKrylov(mg, method=method)
+    k.solve(rtol=1.e-10)
+
+    assert k.residual_error < 1.e-10
+    assert k.num_cycles < mg.num_cycles
+    assert len(k.history) == k.num_iterations + 1
+    assert k.history[-1] < 1.e-10 < k.history[0]
+    assert_allclose(mg.get_solution().v(), ref.v(), rtol=0, atol=1.e-9*np.abs(ref).max())
+
+
+def test_inhomogeneous_bcs():
+    kwargs = {"xl_BC_type": "dirichlet", "xr_BC_type": "neumann",
+              "yl_BC_type": "neumann", "yr_BC_type": "dirichlet",
+              "xl_BC": lambda y: 1.0 + y, "yr_BC": lambda x: x**2,
+              "alpha": 1.0, "beta": 0.5}
+
+    mg = MG.CellCenterMG2d(16, 16, **kwargs)
+    mg.init_zeros()
+    mg.init_RHS(np.sin(2.0*np.pi*mg.x2d)*np.cos(np.pi*mg.y2d))
+    mg.solve(rtol=1.e-12)
+    ref = mg.get_solution()
+
+    # start from a nonzero guess too
+    mg.init_solution(ref + 0.1*mg.x2d)
+    k = krylov.MGKrylov(mg, method="cg")
+    k.solve(rtol=1.e-12)
+    assert k.residual_error < 1.e-12
+    assert_allclose(mg.get_solution().v(), ref.v(), rtol=0, atol=1.e-11)
+
+
+def test_invalid_method():
+    with pytest.raises(ValueError):
+        krylov.MGKrylov(checkerboard_mg(8, 10.0), method="gmres")
@@ -1,6 +1,7 @@
 # unit tests
 
 import numpy as np
+import pytest
 from numpy.testing import assert_array_equal
 
 from pyro.mesh import patch
@@ -55,3 +56,61 @@ def test_mg_gradient():
 
     assert_array_equal(gy[gx.g.ic, :],
                        np.array([0., 36., 60., 36., 12., -12., -36., -60., -36., 0.]))
+
+
+# the compiled smoother gives the same V-cycles as the array version
+@pytest.mark.parametrize("bcs", [("dirichlet", "dirichlet", "neumann", "neumann"),
+                                 ("periodic", "periodic", "dirichlet", "reflect-even"),
+                                 ("dirichlet", "neumann", "neumann", "dirichlet")])
+def test_smoother(bcs):
+    bc_funcs = {}
+    if bcs[0] == "dirichlet" and bcs[1] == "neumann":
+        bc_funcs = {"xl_BC": lambda y: 1.0 + y, "yr_BC": lambda x: x**2}
+
+    solns = []
+    for smoother in ("python", "numba"):
+        a = MG.CellCenterMG2d(16, 16, ng=2, alpha=1.0, beta=0.5, smoother=smoother,
+                              xl_BC_type=bcs[0], xr_BC_type=bcs[1],
+                              yl_BC_type=bcs[2], yr_BC_type=bcs[3], **bc_funcs)
+        a.init_zeros()
+        a.init_RHS(np.sin(2.0*np.pi*a.x2d)*np.cos(np.pi*a.y2d))
+        a.solve(rtol=1.e-11)
+        solns.append((a.num_cycles, a.residual_error, a.grids[-1].data.copy()))
+
+    assert solns[0][:2] == solns[1][:2]
+    assert_array_equal(solns[0][2], solns[1][2])
+
+    with pytest.raises(ValueError):
+        MG.CellCenterMG2d(16, 16, smoother="jacobi")
+
+
+# every cycle shape converges, and a full multigrid pass gets to the
+# discretization error with one cycle
+@pytest.mark.parametrize("cycle_type", ["V", "W", "F"])
+def test_cycles(cycle_type):
+    def true(x, y):
+        return (x**2 - x**4)*(y**4 - y**2)
+
+    def f(x, y):
+        return -2.0*((1.0-6.0*x**2)*y**2*(1.0-y**2) + (1.0-6.0*y**2)*x**2*(1.0-x**2))
+
+    errors = {}
+    for fmg in (False, True):
+        a = MG.CellCenterMG2d(64, 64)
+        a.init_zeros()
+        a.init_RHS(f(a.x2d, a.y2d))
+        a.solve(rtol=1.e-11, cycle_type=cycle_type, fmg=fmg)
+        assert a.residual_error < 1.e-11
+        errors[fmg] = (a.get_solution() - true(a.x2d, a.y2d)).norm()
+
+        a.init_zeros()
+        a.max_cycles = 1
+        a.solve(rtol=1.e-11, cycle_type=cycle_type, fmg=fmg)
+        errors[fmg, 1] = (a.get_solution() - true(a.x2d, a.y2d)).norm()
+
+    assert errors[True] == pytest.approx(errors[False], rel=1.e-8)
+    assert errors[True, 1] < 1.05*errors[True]
+    assert errors[False, 1] > 2.0*errors[False]
+
+    with pytest.raises(ValueError):
+        a.solve(cycle_type="X")
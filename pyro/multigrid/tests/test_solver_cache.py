@@ -0,0 +1,86 @@
+import numpy as np
+from numpy.testing import assert_array_equal
+
+import pyro.mesh.boundary as bnd
+from pyro.mesh import patch
+from pyro.multigrid import MG, variable_coeff_MG
+from pyro.multigrid.solver_cache import SolverCache
+
+
+def solve(mg, f):
+    mg.init_zeros()
+    mg.init_RHS(f)
+    mg.solve(rtol=1.e-11)
+    return mg.num_cycles, mg.get_solution()
+
+
+def test_helmholtz():
+    cache = SolverCache()
+    kwargs = {"xl_BC_type": "neumann", "xr_BC_type": "neumann",
+              "yl_BC_type": "dirichlet", "yr_BC_type": "dirichlet", "alpha": 1.0}
+
+    mg = cache.get(MG.CellCenterMG2d, 16, 16, beta=0.1, **kwargs)
+    f = np.sin(2.0*np.pi*mg.x2d)*np.cos(np.pi*mg.y2d)
+    solve(mg, f)
+
+    # the same hierarchy is handed out again, with the new beta, and
+    # solves as a new solver would
+    assert cache.get(MG.CellCenterMG2d, 16, 16, beta=0.2, **kwargs) is mg
+    assert mg.beta == 0.2
+    ref = solve(MG.CellCenterMG2d(16, 16, beta=0.2, **kwargs), f)
+    cycles, soln = solve(mg, f)
+    assert cycles == ref[0]
+    assert_array_equal(soln, ref[1])
+
+    # other BCs or sizes get their own solvers
+    kwargs["xl_BC_type"] = "dirichlet"
+    assert cache.get(MG.CellCenterMG2d, 16, 16, beta=0.2, **kwargs) is not mg
+    assert cache.get(MG.CellCenterMG2d, 32, 32, beta=0.2, **kwargs) is not mg
+    assert len(cache.solvers) == 3
+
+
+def test_variable_coeffs():
+    cache = SolverCache()
+    g = patch.Grid2d(16, 16, ng=1)
+    bc = bnd.BC(xlb="periodic", xrb="periodic", ylb="periodic", yrb="periodic")
+    kwargs = {"xl_BC_type": "periodic", "xr_BC_type": "periodic",
+              "yl_BC_type": "periodic", "yr_BC_type": "periodic"}
+
+    f = g.scratch_array()
+    f.v()[:, :] = np.sin(2.0*np.pi*g.x2d.v())*np.sin(2.0*np.pi*g.y2d.v())
+
+    mg = None
+    for n in range(2):
+        coeffs = g.scratch_array()
+        coeffs[:, :] = 1.0 + (n + 1)*g.x2d*g.y2d
+        # the BC of the coefficients only matters through its types
+        coeffs_bc = bnd.BC(xlb="periodic", xrb="periodic", ylb="periodic", yrb="periodic")
+        cached = cache.get(variable_coeff_MG.VarCoeffCCMG2d, 16, 16, coeffs=coeffs,
+                           coeffs_bc=coeffs_bc, **kwargs)
+        assert mg is None or cached is mg
+        mg = cached
+
+        ref = solve(variable_coeff_MG.VarCoeffCCMG2d(16, 16, coeffs=coeffs, coeffs_bc=bc,
+                                                     **kwargs), f)
+        cycles, soln = solve(mg, f)
+        assert cycles == ref[0]
+        assert_array_equal(soln, ref[1])
+
+
+def test_defaults_restored():
+    # a Poisson solver after a Helmholtz one with the same BCs gets the
+    # default alpha and beta back
+    cache = SolverCache()
+    kwargs = {"xl_BC_type": "periodic", "xr_BC_type": "periodic",
+              "yl_BC_type": "periodic", "yr_BC_type": "periodic"}
+
+    mg = cache.get(MG.CellCenterMG2d, 16, 16, alpha=1.0, beta=0.1, **kwargs)
+    f = np.sin(2.0*np.pi*mg.x2d)*np.sin(2.0*np.pi*mg.y2d)
+    solve(mg, f)
+
+    assert cache.get(MG.CellCenterMG2d, 16, 16, **kwargs) is mg
+    assert (mg.alpha, mg.beta) == (0.0, -1.0)
+    ref = solve(MG.CellCenterMG2d(16, 16, **kwargs), f)
+    cycles, soln = solve(mg, f)
+    assert cycles == ref[0]
+    assert_array_equal(soln, ref[1])
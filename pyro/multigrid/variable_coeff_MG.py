@@ -58,11 +58,27 @@ class VarCoeffCCMG2d(MG.CellCenterMG2d):
                                    vis_title=vis_title)
 
         # set the coefficients and restrict them down the hierarchy
-        # we only need to do this once.  We need to hold the original
-        # coeffs in our grid so we can do a ghost cell fill.
+        self.set_coeffs(coeffs)
+
+    def set_coeffs(self, coeffs):
+        """
+        Set the coefficients, restrict them down the hierarchy and
+        put them on the edges of every level.  This can be called
+        again to solve with new coefficients on the same hierarchy.
+
+        Parameters
+        ----------
+        coeffs : ndarray
+            The coefficients on the finest grid, an array of the
+            same size as the finest MG level.
+
+        """
+
+        # We need to hold the original coeffs in our grid so we can
+        # do a ghost cell fill.
         c = self.grids[self.nlevels-1].get_var("coeffs")
 
-        if c.g.nx != nx or c.g.ny != ny:
+        if coeffs.g.nx != self.nx or coeffs.g.ny != self.ny:
             raise IndexError("coefficient array not the same size as multigrid problem")
 
         c.v()[:, :] = coeffs.v().copy()
@@ -70,7 +86,7 @@ class VarCoeffCCMG2d(MG.CellCenterMG2d):
         self.grids[self.nlevels-1].fill_BC("coeffs")
 
         # put the coefficients on edges
-        self.edge_coeffs.insert(0, ec.EdgeCoeffs(self.grids[self.nlevels-1].grid, c))
+        self.edge_coeffs = [ec.EdgeCoeffs(self.grids[self.nlevels-1].grid, c)]
 
         n = self.nlevels-2
         while n >= 0:
@@ -86,7 +102,7 @@ class VarCoeffCCMG2d(MG.CellCenterMG2d):
             self.grids[n].fill_BC("coeffs")
 
             # put the coefficients on edges
-            self.edge_coeffs.insert(0, self.edge_coeffs[0].restrict())  # _EdgeCoeffs(self.grids[n].grid, coeffs_c))
+            self.edge_coeffs.insert(0, self.edge_coeffs[0].restrict(c_patch.grid))  # _EdgeCoeffs(self.grids[n].grid, coeffs_c))
 
             # if we are periodic, then we should force the edge coefficients
             # to be periodic
@@ -104,6 +104,8 @@ def do_tests(out_file,
                           "inputs.acoustic_pulse", opts))
     tests.append(PyroTest("compressible_sdc", "acoustic_pulse",
                           "inputs.acoustic_pulse", opts))
+    tests.append(PyroTest("compressible_lagrangian", "sod2d_channel",
+                          "inputs.sod", opts))
     tests.append(PyroTest("diffusion", "gaussian",
                           "inputs.gaussian", opts))
     tests.append(PyroTest("incompressible", "shear", "inputs.shear", opts))
@@ -37,7 +37,12 @@ class TimerCollection:
     For best results, the block of code timed should be large enough
     to offset the overhead of the timer class method calls.
 
-    tc.report() prints out a summary of the timing.
+    A timer can also count things done in its region (for example
+    the V-cycles of a multigrid solve)::
+
+       a.add_count('V-cycles', n)
+
+    tc.report() prints out a summary of the timing and the counts.
     """
 
     def __init__(self):
@@ -91,7 +96,8 @@ class TimerCollection:
 
         spacing = '   '
         for t in self.timers:
-            print(t.stack_count*spacing + t.name + ': ', t.elapsed_time)
+            counts = [f"({k}: {v})" for k, v in t.counts.items()]
+            print(t.stack_count*spacing + t.name + ': ', t.elapsed_time, *counts)
 
 
 class Timer:
@@ -118,6 +124,8 @@ class Timer:
         self.start_time = 0
         self.elapsed_time = 0
 
+        self.counts = {}
+
     def begin(self):
         """
         Start timing
@@ -134,6 +142,19 @@ class Timer:
         self.elapsed_time += elapsed_time
         self.is_running = False
 
+    def add_count(self, name, n=1):
+        """
+        Add n to the count called name kept with this timer.
+
+        Parameters
+        ----------
+        name : str
+            What is counted
+        n : int, optional
+            How many to add
+        """
+        self.counts[name] = self.counts.get(name, 0) + n
+
 
 if __name__ == "__main__":
     tc = TimerCollection()
@@ -1,8 +1,8 @@
-from pyro.compressible_lagrangian.simulation import Simulation
+import pyro.pyro_sim as pyro
 
 def test_smoke():
-    rp={"eos.gamma":1.4,"mesh.nx":64,"mesh.xmax":1.0,"ic.density":1.0,"ic.velocity":0.0,"ic.pressure":1.0,
-        "driver.cfl":0.6,"driver.tmax":1e-3,"mesh.xlboundary":"outflow","mesh.xrboundary":"outflow"}
-    sim=Simulation(rp)
-    for _ in range(5): sim.single_step()
-    assert sim.t>0.0
+    p=pyro.Pyro("compressible_lagrangian")
+    p.initialize_problem("piston2d",inputs_dict={"mesh.nx":64,"mesh.ny":4,"driver.cfl":0.6,"driver.tmax":1e-3,
+                                                 "piston.kind":"constant","piston.u":0.1})
+    for _ in range(5): p.single_step()
+    assert p.sim.t>0.0